@@ -0,0 +1,26 @@
+# benchmarks/constant.py
+# info_more/spiders/constant.py(저장소에 없음) 대신 쓰는 벤치마크용 요청 상수
+# 실제 constant.py가 있으면 그것을 그대로 쓰고, 없을 때만 replay.py가 이 모듈을 끼워 넣는다.
+
+CATEGORY_LIST_URL = 'https://fixture.invalid/category'
+BASE_URL = 'https://fixture.invalid/catalog'
+
+MAJOR_CATEGORY_PARAMS = {'depth': '1'}
+MAJOR_CATEGORY_HEADERS = {'accept': 'application/json'}
+MAJOR_CATEGORY_COOKIES = {}
+MEDIUM_CATEGORY_HEADERS = {'accept': 'application/json'}
+MEDIUM_CATEGORY_COOKIES = {}
+
+MAJOR_HEADERS = {'accept': 'text/html'}
+MAJOR_COOKIES = {}
+MEDIUM_HEADERS = {'accept': 'text/html'}
+MEDIUM_COOKIES = {}
+SUB_HEADERS = {'accept': 'text/html'}
+SUB_COOKIES = {}
+
+LEVEL_MAJOR = 'major'
+LEVEL_MEDIUM = 'medium'
+LEVEL_SUB = 'sub'
+
+VALIDATION_INT_TYPE = 'int'
+VALIDATION_FLOAT_TYPE = 'float'
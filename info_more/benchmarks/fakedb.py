@@ -0,0 +1,197 @@
+# benchmarks/fakedb.py
+# 파이프라인이 실제로 보내는 SQL만 이해하는 메모리 DB (MySQLConnectionPool 대신 사용)
+# 파이프라인에 새 SQL이 생기면 여기에도 처리 규칙을 추가해야 한다.
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import pymysql
+
+
+def _normalize(sql):
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+class FakeDatabase:
+    def __init__(self, latency=0.0):
+        # SQL 한 번당 흉내 낼 왕복 시간(초)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.categories = {}      # naver_category_id → [id, name, level, parent_id]
+        self.products = {}        # naver_product_id → [id, row...]
+        self.product_updated_at = 0   # MAX(updated_at) 대신 상품 업서트마다 1씩 증가
+        self.snapshots = 0
+        self.statements = 0
+
+    def execute(self, sql, args, wait=True):
+        """(rows, lastrowid, rowcount). rows는 (컬럼명, 튜플) 목록"""
+        sql = _normalize(sql)
+        with self.lock:
+            self.statements += 1
+            result = self._dispatch(sql, args)
+        if wait and self.latency:
+            time.sleep(self.latency)
+        return result
+
+    def _dispatch(self, sql, args):
+        if sql.startswith('SELECT naver_category_id, id, name, level, parent_id FROM category'):
+            columns = ('naver_category_id', 'id', 'name', 'level', 'parent_id')
+            return [(columns, (key, *row)) for key, row in self.categories.items()], None, len(self.categories)
+
+        if sql.startswith('INSERT INTO category'):
+            naver_category_id, name, level, parent_id = args
+            row = self.categories.get(naver_category_id)
+            if row is None:
+                row = self.categories[naver_category_id] = [len(self.categories) + 1, name, level, parent_id]
+                return [], row[0], 1
+            row[1:] = [name, level, parent_id]
+            return [], row[0], 2
+
+        if sql.startswith('SELECT id FROM category WHERE naver_category_id'):
+            row = self.categories.get(args[0])
+            return ([(('id',), (row[0],))] if row else []), None, int(bool(row))
+
+        if sql.startswith('INSERT INTO product ('):
+            self.product_updated_at += 1
+            naver_product_id = str(args[0])
+            row = self.products.get(naver_product_id)
+            if row is None:
+                self.products[naver_product_id] = [len(self.products) + 1, *args[1:]]
+                return [], len(self.products), 1
+            row[1:] = args[1:]
+            return [], row[0], 2
+
+        if sql.startswith('SELECT id, naver_product_id FROM product WHERE naver_product_id IN'):
+            rows = [
+                (('id', 'naver_product_id'), (self.products[key][0], key))
+                for key in args if key in self.products
+            ]
+            return rows, None, len(rows)
+
+        if sql.startswith('SELECT id, original_price, discount_rate, price, delivery_fee, rating, review_count, ranking FROM product'):
+            columns = ('id', 'original_price', 'discount_rate', 'price', 'delivery_fee', 'rating', 'review_count', 'ranking')
+            return [(columns, (row[0], *row[4:11])) for row in self.products.values()], None, len(self.products)
+
+        if sql.startswith('SELECT naver_product_id, category_id, mall_name, name, original_price'):
+            columns = ('naver_product_id',) + tuple(f'col{i}' for i in range(1, 12))
+            return [(columns, (key, *row[1:])) for key, row in self.products.items()], None, len(self.products)
+
+        if sql.startswith('SELECT COUNT(*) AS row_count, MAX(updated_at) AS updated_at FROM product'):
+            updated_at = self.product_updated_at or None
+            return [(('row_count', 'updated_at'), (len(self.products), updated_at))], None, 1
+
+        if sql.startswith('SELECT naver_product_id, id FROM product'):
+            columns = ('naver_product_id', 'id')
+            return [(columns, (key, row[0])) for key, row in self.products.items()], None, len(self.products)
+
+        if sql.startswith('INSERT INTO product_snapshot'):
+            self.snapshots += 1
+            return [], self.snapshots, 1
+
+        # 스키마 확인(SchemaCheck): info_more.schema의 마이그레이션/인덱스가 모두 있는 DB로 응답
+        if sql.startswith('CREATE TABLE IF NOT EXISTS schema_migrations'):
+            return [], None, 0
+
+        if sql.startswith('SELECT COUNT(*) AS tables FROM information_schema.TABLES'):
+            return [(('tables',), (1,))], None, 1
+
+        if sql.startswith('SELECT version FROM schema_migrations'):
+            from info_more.schema import MIGRATIONS
+            return [(('version',), (version,)) for version, _, _ in MIGRATIONS], None, len(MIGRATIONS)
+
+        if sql.startswith('SELECT TABLE_NAME AS table_name, INDEX_NAME AS index_name'):
+            from info_more.schema import REQUIRED_INDEXES
+            columns = ('table_name', 'index_name', 'non_unique', 'column_name')
+            rows = [
+                (columns, (table, name, int(not unique), column))
+                for table, name, index_columns, unique, _ in REQUIRED_INDEXES
+                for column in index_columns
+            ]
+            return rows, None, len(rows)
+
+        raise NotImplementedError(f"fakedb: 처리 규칙이 없는 SQL: {sql[:80]}")
+
+
+class FakeCursor:
+    def __init__(self, db, as_dict=True):
+        self.db = db
+        self.as_dict = as_dict
+        self.rows = []
+        self.lastrowid = None
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, args=None, wait=True):
+        rows, self.lastrowid, self.rowcount = self.db.execute(sql, args, wait=wait)
+        self.rows = [dict(zip(columns, row)) if self.as_dict else row for columns, row in rows]
+        return self.rowcount
+
+    def executemany(self, sql, seq_of_args):
+        # pymysql은 multi-row INSERT 한 번으로 보내므로 왕복 시간도 한 번만
+        total = sum(self.execute(sql, args, wait=False) for args in seq_of_args)
+        if self.db.latency:
+            time.sleep(self.db.latency)
+        self.rowcount = total
+        return total
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, cursorclass=None):
+        as_dict = cursorclass is None or issubclass(cursorclass, pymysql.cursors.DictCursorMixin)
+        return FakeCursor(self.db, as_dict=as_dict)
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakeConnectionPool:
+    """MySQLConnectionPool과 같은 인터페이스"""
+
+    def __init__(self, db, size=4):
+        self.db = db
+        self.size = size
+
+    @contextmanager
+    def connection(self):
+        yield FakeConnection(self.db)
+
+    @contextmanager
+    def cursor(self):
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                yield cursor
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                yield cursor
+
+    def close(self, spider=None):
+        pass
@@ -0,0 +1,179 @@
+# benchmarks/fixtures.py
+# 스파이더 요청 URL → 기록해 둔(또는 합성한) 응답
+#
+# 기록한 응답을 쓰려면 디렉터리에 manifest.json을 두고 응답 파일을 같이 넣는다.
+#   {"responses": [{"url": "https://...", "file": "major.json"}, ...]}
+# manifest에 없는 URL은 합성 응답으로 채우지 않고 missing으로 센다.
+
+import json
+import os
+import random
+
+from scrapy.http import HtmlResponse, TextResponse
+
+CARD_TEMPLATE = """
+<li><div class="basicProductCard_basic_product_card__A1 basicProductCard_view_type_grid2__vKr1n">
+  <div class="basicProductCard_thumbnail__B2">
+    <a class="basicProductCard_link__urzND" href="https://smartstore.naver.com/shop/products/{product_id}"
+       aria-labelledby="card-body-{index}" data-shp-contents-rank="{rank}"
+       data-shp-contents-dtl='{contents_dtl}'><img src="thumb.jpg"></a>
+  </div>
+  <div class="basicProductCard_information__C3" id="card-body-{index}">
+    <div class="productCardMallLink_mall__D4"><span class="productCardMallLink_mall_name__5oWPw">{mall_name}</span></div>
+    <strong class="productCardTitle_product_card_title__E5">{name}</strong>
+    <div class="priceTag_price__F6">
+      {original_price}
+      <span class="priceTag_discount_ratio__VE866">{discount_rate}%</span>
+      <span class="priceTag_price__G7"><em>{price}</em>원</span>
+    </div>
+    <span class="productCardDeliveryFeeInfo_delivery_text__54pei">{delivery_fee}</span>
+    <div class="productCardReview_review__H8">
+      <span class="productCardReview_text__A9N9N productCardReview_star__7iHNO"><span class="blind">평점</span>{rating}</span>
+      <span class="productCardReview_text__A9N9N"><span class="blind">리뷰</span>({review_count})</span>
+    </div>
+  </div>
+</div></li>"""
+
+
+def _card_values(product_id, revision=0, change_rate=0.0):
+    """상품별로 고정된 카드 값. revision마다 change_rate 비율의 상품은 가격/리뷰 수가 바뀐다."""
+    rng = random.Random(product_id)
+    price = rng.randrange(1_000, 500_000)
+    discount = rng.choice([0, 0, 5, 10, 30])
+    review_count = rng.randrange(10_000)
+    values = {
+        'mall_name': f'쇼핑몰{rng.randrange(100)}',
+        'delivery_fee': rng.choice(['무료배송', '배송비 3,000원', '배송비 2,500원']),
+        'rating': f'{rng.uniform(3, 5):.1f}',
+    }
+    if revision and change_rate and random.Random(product_id * 1_000 + revision).random() < change_rate:
+        price = price * rng.choice([90, 95, 105, 110]) // 100
+        review_count += revision
+    values.update(price=price, discount=discount, review_count=review_count)
+    return values
+
+
+def make_listing_page(cards, seed=0, product_ids=None, revision=0, change_rate=0.0):
+    """실제 목록 페이지와 같은 클래스 구조의 합성 HTML
+
+    product_ids를 주면 그 중에서 상품을 뽑는다 (카테고리 간 중복 상품 재현용).
+    revision / change_rate: 연속 실행을 흉내 낼 때 일부 상품만 값이 바뀌도록.
+    """
+    rng = random.Random(seed)
+    parts = ['<html><body><div id="content"><ul class="basicProductCardList_list__I9">']
+    for index in range(cards):
+        if product_ids:
+            product_id = rng.choice(product_ids)
+        else:
+            product_id = rng.randrange(1_000_000_000, 99_999_999_999)
+        values = _card_values(product_id, revision, change_rate)
+        price = values['price']
+        discount = values['discount']
+        original_price = price * 100 // (100 - discount) if discount else None
+        contents_dtl = json.dumps([
+            {'key': 'prod_nm', 'value': f'상품 {product_id}'},
+            {'key': 'chnl_prod_no', 'value': str(product_id)},
+            {'key': 'price', 'value': str(price)},
+        ], ensure_ascii=False)
+        parts.append(CARD_TEMPLATE.format(
+            index=index,
+            product_id=product_id,
+            rank=index + 1,
+            contents_dtl=contents_dtl,
+            mall_name=values['mall_name'],
+            name=f'상품 {product_id}',
+            original_price=(
+                f'<span class="priceTag_original_price__jyZRY"><span class="blind">정가</span>{original_price:,}원</span>'
+                if original_price else ''
+            ),
+            discount_rate=discount,
+            price=f'{price:,}',
+            delivery_fee=values['delivery_fee'],
+            rating=values['rating'],
+            review_count=f"{values['review_count']:,}",
+        ))
+    parts.append('</ul></div></body></html>')
+    return ''.join(parts).encode('utf-8')
+
+
+def _make_response(url, body, request=None):
+    stripped = body.lstrip()
+    cls = TextResponse if stripped[:1] in (b'{', b'[') else HtmlResponse
+    return cls(url, body=body, encoding='utf-8', request=request)
+
+
+class SyntheticFixtures:
+    """ENV 상수의 URL 규칙대로 카테고리 트리와 목록 페이지를 합성.
+
+    majors × mediums × subs 카테고리, 목록 페이지마다 cards개 상품.
+    상품은 products개 풀에서 뽑으므로 상위/하위 카테고리 페이지에 같은 상품이 다시 나온다.
+    """
+
+    def __init__(self, env, majors=4, mediums=4, subs=4, cards=40, products=5000, seed=0, change_rate=0.0):
+        self.env = env
+        self.majors = majors
+        self.mediums = mediums
+        self.subs = subs
+        self.cards = cards
+        rng = random.Random(seed)
+        self.product_ids = rng.sample(range(1_000_000_000, 99_999_999_999), products)
+        self.seed = seed
+        # 연속 실행(replay --runs)에서 실행마다 값이 바뀌는 상품 비율
+        self.change_rate = change_rate
+        self.revision = 0
+
+    def _major_tree(self):
+        categories = []
+        for m in range(1, self.majors + 1):
+            major_id = str(50_000_000 + m * 1_000)
+            children = []
+            for n in range(1, self.mediums + 1):
+                medium_id = str(int(major_id) + n * 10)
+                # 절반은 소분류가 없는 중분류
+                children.append({'id': medium_id, 'name': f'중분류 {medium_id}', 'isLeaf': n % 2 == 0})
+            categories.append({'id': major_id, 'name': f'대분류 {major_id}', 'children': children})
+        return {'categories': categories}
+
+    def body_for(self, url):
+        category_list_url = self.env.CATEGORY_LIST_URL
+        if url.startswith(category_list_url + '?'):
+            return json.dumps(self._major_tree(), ensure_ascii=False).encode('utf-8')
+        if url.startswith(category_list_url + '/'):
+            medium_id = int(url.rsplit('/', 1)[1])
+            children = [
+                {'id': str(medium_id * 100 + s), 'name': f'소분류 {medium_id * 100 + s}'}
+                for s in range(1, self.subs + 1)
+            ]
+            return json.dumps({'children': children}, ensure_ascii=False).encode('utf-8')
+        if url.startswith(self.env.BASE_URL + '/'):
+            category_id = int(url.rsplit('/', 1)[1])
+            return make_listing_page(
+                self.cards, seed=self.seed + category_id, product_ids=self.product_ids,
+                revision=self.revision, change_rate=self.change_rate,
+            )
+        return None
+
+    def response_for(self, request):
+        body = self.body_for(request.url)
+        return None if body is None else _make_response(request.url, body, request=request)
+
+
+class RecordedFixtures:
+    """manifest.json에 적힌 URL → 파일"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.files = {entry['url']: entry['file'] for entry in manifest['responses']}
+        self._bodies = {}
+
+    def response_for(self, request):
+        name = self.files.get(request.url)
+        if name is None:
+            return None
+        body = self._bodies.get(name)
+        if body is None:
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                body = self._bodies[name] = f.read()
+        return _make_response(request.url, body, request=request)
@@ -0,0 +1,141 @@
+# benchmarks/item_memory.py
+# 상품 아이템 표현: 기존 dict 기반 scrapy.Item(20필드) vs 슬롯 ProductItem + 공유 CategoryContext
+# 아이템 N개를 들고 있을 때의 메모리와 생성 / ItemAdapter 조회 시간 비교
+#
+#   cd info_more && python -m benchmarks.item_memory --size 100000
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+import scrapy
+from itemadapter import ItemAdapter
+
+from info_more.items import CategoryContext, ProductItem
+
+# 파이프라인들이 ItemAdapter로 읽는 필드
+READ_FIELDS = (
+    'naver_product_id', 'sub_id', 'medium_id', 'major_id', 'mall_name', 'name', 'original_price',
+    'discount_rate', 'price', 'delivery_fee', 'rating', 'review_count', 'ranking', 'detail_url',
+)
+
+
+class LegacyProductItem(scrapy.Item):
+    """바꾸기 전 ProductItem과 같은 필드"""
+    major_id = scrapy.Field()
+    major_name = scrapy.Field()
+    medium_id = scrapy.Field()
+    medium_name = scrapy.Field()
+    sub_id = scrapy.Field()
+    sub_name = scrapy.Field()
+    is_leaf = scrapy.Field()
+    name = scrapy.Field()
+    price = scrapy.Field()
+    naver_product_id = scrapy.Field()
+    category_id = scrapy.Field()
+    detail_url = scrapy.Field()
+    ranking = scrapy.Field()
+    mall_name = scrapy.Field()
+    original_price = scrapy.Field()
+    discount_rate = scrapy.Field()
+    delivery_fee = scrapy.Field()
+    rating = scrapy.Field()
+    review_count = scrapy.Field()
+
+
+def make_cards(size, categories, seed):
+    """(카테고리 kwargs, 카드 값) 목록. 문자열은 두 표현이 같이 쓰도록 미리 만들어 둠"""
+    rng = random.Random(seed)
+    paths = [
+        {
+            'major_id': str(50000000 + index // 100), 'major_name': f'대분류{index // 100}',
+            'medium_id': str(50001000 + index // 10), 'medium_name': f'중분류{index // 10}',
+            'sub_id': str(50010000 + index), 'sub_name': f'소분류{index}',
+        }
+        for index in range(categories)
+    ]
+    cards = []
+    for index in range(size):
+        naver_product_id = str(rng.randrange(1_000_000_000, 99_999_999_999))
+        price = rng.randrange(1000, 500000)
+        cards.append((paths[index * categories // size], {
+            'naver_product_id': naver_product_id,
+            'name': f'상품 {naver_product_id}',
+            'price': price,
+            'detail_url': f'https://smartstore.naver.com/shop/products/{naver_product_id}',
+            'ranking': index % 40 + 1,
+            'mall_name': f'쇼핑몰{rng.randrange(100)}',
+            'original_price': price,
+            'discount_rate': 0,
+            'delivery_fee': 0,
+            'rating': 4.5,
+            'review_count': rng.randrange(10000),
+        }))
+    return cards
+
+
+def build_legacy(cards):
+    return [
+        LegacyProductItem(category_id=path['sub_id'] or path['medium_id'], **path, **values)
+        for path, values in cards
+    ]
+
+
+def build_compact(cards):
+    # 스파이더와 같이 목록(카테고리)마다 한 번 intern
+    items = []
+    last_path = category = None
+    for path, values in cards:
+        if path is not last_path:
+            category = CategoryContext.intern(**path)
+            last_path = path
+        items.append(ProductItem(category=category, **values))
+    return items
+
+
+def measure(build, cards):
+    """build(cards)가 만든 아이템 목록이 차지하는 메모리(bytes)와 생성 시간(s)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    items = build(cards)
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, size, elapsed
+
+
+def adapter_ns(items):
+    """아이템 하나를 ItemAdapter로 감싸 파이프라인이 읽는 필드를 모두 읽는 평균 시간(ns)"""
+    started = time.perf_counter_ns()
+    for item in items:
+        adapter = ItemAdapter(item)
+        for field in READ_FIELDS:
+            adapter.get(field)
+    return (time.perf_counter_ns() - started) / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='상품 아이템 표현 메모리/처리 시간 비교')
+    parser.add_argument('--size', type=int, default=100_000, help='아이템 수')
+    parser.add_argument('--categories', type=int, default=2_000, help='상품 목록(소분류) 수')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cards = make_cards(args.size, args.categories, args.seed)
+
+    print(f"size={args.size:,} categories={args.categories:,}")
+    print(f"{'item':<22}{'memory':>12}{'bytes/item':>12}{'build':>10}{'adapter':>10}")
+    for name, build in (('scrapy.Item (dict)', build_legacy), ('ProductItem (slots)', build_compact)):
+        items, size, elapsed = measure(build, cards)
+        print(
+            f"{name:<22}{size / 2**20:>10.1f}MB{size / args.size:>12.1f}"
+            f"{elapsed:>9.2f}s{adapter_ns(items):>8.0f}ns"
+        )
+        del items
+
+
+if __name__ == '__main__':
+    main()
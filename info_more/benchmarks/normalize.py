@@ -0,0 +1,111 @@
+# benchmarks/normalize.py
+# 상품 카드 한 장의 숫자 정제 비용: 예전 스파이더 헬퍼(re.sub + print) vs info_more.normalize
+#
+#   cd info_more && python -m benchmarks.normalize
+
+import argparse
+import contextlib
+import io
+import random
+import re
+import time
+
+from info_more.normalize import Normalizer
+
+
+### 예전 NaverStoreSpider 헬퍼 그대로
+def legacy_to_int(val_str):
+    cleaned = re.sub(r'\D', '', val_str)
+    if not cleaned:
+        print(f'{val_str}는 유요한 정수값이 아닙니다.')
+        return None
+    return int(cleaned)
+
+
+def legacy_to_float(val_str):
+    cleaned = re.sub(r'[^\d.]', '', val_str)
+    if not cleaned:
+        print(f'{val_str}는 유요한 소수값이 아닙니다.')
+        return None
+    return float(cleaned)
+
+
+def legacy_validation(validation_target, validation_type):
+    if not validation_target:
+        return None
+    if validation_type == 'int':
+        return legacy_to_int(validation_target)
+    elif validation_type == 'float':
+        return legacy_to_float(validation_target)
+    raise ValueError(validation_type)
+
+
+def make_cards(count, seed=0):
+    """카드당 parse_page가 정제하는 값 7개 (price, ranking, 정가, 할인율, 배송비, 평점, 리뷰 수)"""
+    rng = random.Random(seed)
+    cards = []
+    for rank in range(1, count + 1):
+        price = rng.randrange(1_000, 500_000)
+        cards.append((
+            str(price),
+            str(rank),
+            rng.choice([None, f'정가{price * 11 // 10:,}원']),
+            rng.choice([None, '5', '10', '30']),
+            rng.choice(['무료배송', '배송비 3,000원', '배송비 2,500원']),
+            f'{rng.uniform(3, 5):.1f}',
+            f'리뷰({rng.randrange(10_000):,})',
+        ))
+    return cards
+
+
+def run_legacy(cards):
+    for price, ranking, original, discount, delivery, rating, review in cards:
+        legacy_validation(price, 'int')
+        legacy_validation(ranking, 'int')
+        legacy_validation(original, 'int')
+        legacy_validation(discount, 'int')
+        legacy_validation(delivery, 'int')
+        legacy_validation(rating, 'float')
+        legacy_validation(review, 'int')
+
+
+def run_normalizer(cards, normalizer):
+    to_int = normalizer.to_int
+    to_float = normalizer.to_float
+    for price, ranking, original, discount, delivery, rating, review in cards:
+        to_int(price)
+        to_int(ranking)
+        to_int(original)
+        to_int(discount)
+        to_int(delivery)
+        to_float(rating)
+        to_int(review)
+
+
+def per_card_us(func, cards, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func(cards)
+    return (time.perf_counter() - started) / (len(cards) * rounds) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='카드당 숫자 정제 비용 비교')
+    parser.add_argument('--cards', type=int, default=10_000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    cards = make_cards(args.cards)
+    normalizer = Normalizer()
+
+    # 예전 헬퍼의 print는 버리되 비용은 그대로 측정
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy = per_card_us(run_legacy, cards, args.rounds)
+    current = per_card_us(lambda c: run_normalizer(c, normalizer), cards, args.rounds)
+
+    print(f"{'legacy (re.sub + print)':<28}{legacy:>8.2f}µs/card")
+    print(f"{'info_more.normalize':<28}{current:>8.2f}µs/card{legacy / current:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/parse_page.py
+# 상품 카드 추출 엔진(selector vs lxml) 속도 비교 + 결과가 같은지 확인
+#
+#   cd info_more && python -m benchmarks.parse_page                 # 합성 목록 페이지
+#   cd info_more && python -m benchmarks.parse_page page1.html ...  # 저장해 둔 목록 페이지
+
+import argparse
+import time
+
+from scrapy.http import HtmlResponse
+
+from benchmarks.fixtures import make_listing_page
+from info_more.spiders.cards import CARD_PARSERS
+
+
+def load_pages(paths, cards):
+    if not paths:
+        return [HtmlResponse('https://search.shopping.naver.com/synthetic', body=make_listing_page(cards))]
+    responses = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            responses.append(HtmlResponse(f'file://{path}', body=f.read(), encoding='utf-8'))
+    return responses
+
+
+def run(parser, responses, rounds):
+    """카드당 평균 추출 시간(µs). HTML 파싱(response.selector)은 미리 해 두고 추출만 잰다."""
+    cards = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for response in responses:
+            for _ in parser(response):
+                cards += 1
+    return (time.perf_counter() - started) / cards * 1e6, cards // rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='상품 카드 추출 엔진 비교')
+    parser.add_argument('pages', nargs='*', help='저장해 둔 목록 페이지 HTML (없으면 합성 페이지)')
+    parser.add_argument('--cards', type=int, default=80, help='합성 페이지의 카드 수')
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    responses = load_pages(args.pages, args.cards)
+    for response in responses:
+        response.selector  # 파싱 미리
+
+    expected = [list(CARD_PARSERS['selector'](response)) for response in responses]
+    baseline = None
+    for name, card_parser in CARD_PARSERS.items():
+        if [list(card_parser(response)) for response in responses] != expected:
+            raise SystemExit(f"{name}: selector 엔진과 결과가 다릅니다")
+        per_card, cards = run(card_parser, responses, args.rounds)
+        baseline = baseline or per_card
+        print(f"{name:<10}{cards:>6} cards/round{per_card:>10.1f}µs/card{baseline / per_card:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/product_id_index.py
+# 스냅샷 파이프라인의 product_id 캐시: 기존 dict(str → int) vs ProductIdIndex 메모리/조회 시간 비교
+#
+#   cd info_more && python -m benchmarks.product_id_index --size 2000000
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from array import array
+
+from info_more.caches import ProductIdIndex
+
+
+def build_dict(pairs):
+    return {str(naver_product_id): product_id for naver_product_id, product_id in pairs}
+
+
+def build_index(pairs):
+    index = ProductIdIndex()
+    keys = array('q', (naver_product_id for naver_product_id, _ in pairs))
+    values = array('q', (product_id for _, product_id in pairs))
+    index._set_sorted(keys, values)
+    return index
+
+
+def measure(build, pairs):
+    """build(pairs)가 만든 구조가 차지하는 메모리(bytes)와 생성 시간(s)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    cache = build(pairs)
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cache, size, elapsed
+
+
+def lookup_ns(cache, keys):
+    """str 키 조회 한 번당 평균 시간(ns). 파이프라인은 항상 문자열로 조회한다."""
+    get = cache.get
+    started = time.perf_counter_ns()
+    for key in keys:
+        get(key)
+    return (time.perf_counter_ns() - started) / len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='product_id 캐시 메모리/조회 시간 비교')
+    parser.add_argument('--size', type=int, default=1_000_000, help='상품 수')
+    parser.add_argument('--lookups', type=int, default=200_000, help='조회 횟수')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # 실제 chnl_prod_no와 비슷한 10~11자리 숫자, 적재 순서는 무작위
+    naver_ids = rng.sample(range(1_000_000_000, 99_999_999_999), args.size)
+    pairs = [(naver_product_id, product_id) for product_id, naver_product_id in enumerate(naver_ids, 1)]
+
+    hits = [str(naver_product_id) for naver_product_id in rng.choices(naver_ids, k=args.lookups)]
+    misses = [str(rng.randrange(100_000_000_000, 999_999_999_999)) for _ in range(args.lookups)]
+
+    print(f"size={args.size:,} lookups={args.lookups:,}")
+    print(f"{'cache':<16}{'memory':>12}{'bytes/item':>12}{'build':>10}{'hit':>10}{'miss':>10}")
+    for name, build in (('dict[str,int]', build_dict), ('ProductIdIndex', build_index)):
+        cache, size, elapsed = measure(build, pairs)
+        hit = lookup_ns(cache, hits)
+        miss = lookup_ns(cache, misses)
+        print(
+            f"{name:<16}{size / 2**20:>10.1f}MB{size / args.size:>12.1f}"
+            f"{elapsed:>9.2f}s{hit:>8.0f}ns{miss:>8.0f}ns"
+        )
+        del cache
+
+
+if __name__ == '__main__':
+    main()
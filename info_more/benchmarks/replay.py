@@ -0,0 +1,372 @@
+# benchmarks/replay.py
+# 기록한(또는 합성한) 응답을 스파이더 콜백 → 아이템 파이프라인으로 재생하는 오프라인 벤치마크
+# 네이버/MySQL 없이 실행되며 결과는 JSON으로 남겨 버전 간 비교에 쓴다.
+#
+#   cd info_more && python -m benchmarks.replay --output before.json
+#   cd info_more && python -m benchmarks.replay -s NAVER_PARSER_ENGINE=lxml --output after.json --baseline before.json
+#   cd info_more && python -m benchmarks.replay --fixtures path/to/recorded   # manifest.json이 있는 디렉터리
+
+import argparse
+import importlib
+import json
+import logging
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+
+import scrapy
+from scrapy import signals
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.utils.misc import load_object
+from scrapy.utils.test import get_crawler
+
+from benchmarks.fakedb import FakeConnectionPool, FakeDatabase
+from benchmarks.fixtures import RecordedFixtures, SyntheticFixtures
+
+
+def install_constant():
+    """info_more/spiders/constant.py가 없으면 벤치마크용 상수 모듈을 대신 끼워 넣음"""
+    try:
+        importlib.import_module('info_more.spiders.constant')
+        return False
+    except ModuleNotFoundError as e:
+        if e.name != 'info_more.spiders.constant':
+            raise
+    import info_more.spiders
+    from benchmarks import constant
+    sys.modules['info_more.spiders.constant'] = constant
+    info_more.spiders.constant = constant
+    return True
+
+
+def summarize(samples):
+    """초 단위 측정값 → ms 단위 요약 (nearest-rank 백분위)"""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pct(p):
+        return round(ordered[max(-(-p * n // 100) - 1, 0)] * 1000, 4)
+
+    total = sum(ordered)
+    return {
+        'count': n,
+        'total_ms': round(total * 1000, 3),
+        'mean_ms': round(total / n * 1000, 4),
+        'p50_ms': pct(50),
+        'p90_ms': pct(90),
+        'p99_ms': pct(99),
+        'max_ms': round(ordered[-1] * 1000, 4),
+    }
+
+
+def project_settings(overrides):
+    from info_more import settings as module
+    settings = {name: getattr(module, name) for name in dir(module) if name.isupper()}
+    # 실행마다 같은 요청을 재생하도록 카테고리 트리 디스크 캐시는 기본으로 끔
+    settings['CATEGORY_TREE_CACHE_ENABLED'] = False
+    settings.update(overrides)
+    return settings
+
+
+def load_pipelines(crawler, db):
+    """ITEM_PIPELINES 순서대로 생성. 커넥션 풀 자리에 메모리 DB를 넣어 둔다."""
+    from info_more.db import _pools
+    _pools[crawler] = FakeConnectionPool(db, size=crawler.settings.getint('MYSQL_POOL_SIZE', 4))
+
+    pipelines = []
+    for path, order in sorted(crawler.settings.getdict('ITEM_PIPELINES').items(), key=lambda entry: entry[1]):
+        if order is None:
+            continue
+        try:
+            pipelines.append(load_object(path).from_crawler(crawler))
+        except NotConfigured:
+            # 설정으로 꺼진 파이프라인 (Scrapy와 같이 건너뜀)
+            pass
+    return pipelines
+
+
+class Replay:
+    def __init__(self, crawler, spider, pipelines, fixtures):
+        self.crawler = crawler
+        self.spider = spider
+        self.pipelines = pipelines
+        self.fixtures = fixtures
+
+        self.callback_times = defaultdict(list)
+        self.pipeline_times = defaultdict(list)
+        self.counts = defaultdict(int)
+        self.wall = 0.0
+
+    def _process_item(self, item):
+        from twisted.internet import defer
+
+        @defer.inlineCallbacks
+        def _run():
+            current = item
+            for pipeline in self.pipelines:
+                started = time.perf_counter()
+                try:
+                    current = yield defer.maybeDeferred(pipeline.process_item, current, self.spider)
+                except DropItem:
+                    self.counts['items_dropped'] += 1
+                    return None
+                finally:
+                    self.pipeline_times[type(pipeline).__name__].append(time.perf_counter() - started)
+            return current
+
+        return _run()
+
+    def run(self):
+        from twisted.internet import defer
+
+        @defer.inlineCallbacks
+        def _run():
+            spider = self.spider
+            started = time.perf_counter()
+
+            # open_spider / close_spider는 Scrapy처럼 있는 파이프라인만 호출
+            for pipeline in self.pipelines:
+                if hasattr(pipeline, 'open_spider'):
+                    yield defer.maybeDeferred(pipeline.open_spider, spider)
+            yield self.crawler.signals.send_catch_log_deferred(signal=signals.spider_opened, spider=spider)
+
+            # start_requests도 콜백처럼 요청과 아이템을 섞어서 낼 수 있음
+            t0 = time.perf_counter()
+            output = list(spider.start_requests())
+            self.callback_times['start_requests'].append(time.perf_counter() - t0)
+
+            queue = deque()
+            while True:
+                for obj in output:
+                    if isinstance(obj, scrapy.Request):
+                        queue.append(obj)
+                        continue
+                    self.counts['items'] += 1
+                    self.counts[f'items/{type(obj).__name__}'] += 1
+                    yield self._process_item(obj)
+
+                if not queue:
+                    break
+                request = queue.popleft()
+                self.counts['requests'] += 1
+                response = self.fixtures.response_for(request)
+                if response is None:
+                    self.counts['missing_responses'] += 1
+                    output = ()
+                    continue
+
+                callback = request.callback or spider.parse
+                t0 = time.perf_counter()
+                output = list(callback(response, **request.cb_kwargs))
+                self.callback_times[callback.__name__].append(time.perf_counter() - t0)
+
+            for pipeline in self.pipelines:
+                if hasattr(pipeline, 'close_spider'):
+                    yield defer.maybeDeferred(pipeline.close_spider, spider)
+            # 풀/라이터/디스크 캐시 정리는 spider_closed 시그널에 연결되어 있음
+            yield self.crawler.signals.send_catch_log_deferred(
+                signal=signals.spider_closed, spider=spider, reason='finished'
+            )
+            self.wall = time.perf_counter() - started
+
+        return _run()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(args, replay, db, crawler, fixture_desc):
+    items = replay.counts['items']
+    stats = {
+        key: value for key, value in crawler.stats.get_stats().items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'fixtures': fixture_desc,
+            'settings': dict(args.set),
+        },
+        'totals': {
+            'wall_s': round(replay.wall, 4),
+            'items_per_sec': round(items / replay.wall, 1) if replay.wall else None,
+            **dict(sorted(replay.counts.items())),
+        },
+        'callbacks': {name: summarize(samples) for name, samples in sorted(replay.callback_times.items())},
+        'pipelines': {name: summarize(samples) for name, samples in replay.pipeline_times.items()},
+        'memory': {
+            # Linux에서 ru_maxrss 단위는 KB
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'tracemalloc_peak_kb': (
+                round(tracemalloc.get_traced_memory()[1] / 1024) if tracemalloc.is_tracing() else None
+            ),
+        },
+        'db': {
+            'statements': db.statements,
+            'categories': len(db.categories),
+            'products': len(db.products),
+            'snapshots': db.snapshots,
+        },
+        'stats': stats,
+    }
+
+
+def _flatten(report):
+    """비교용 숫자 지표만 'section.name.metric' 형태로"""
+    flat = {'totals.items_per_sec': report['totals'].get('items_per_sec')}
+    for section in ('callbacks', 'pipelines'):
+        for name, summary in report.get(section, {}).items():
+            for metric in ('p50_ms', 'p90_ms', 'p99_ms'):
+                flat[f'{section}.{name}.{metric}'] = summary.get(metric)
+    for metric, value in report.get('memory', {}).items():
+        flat[f'memory.{metric}'] = value
+    flat['db.statements'] = report.get('db', {}).get('statements')
+    return flat
+
+
+def compare(baseline, current):
+    before, after = _flatten(baseline), _flatten(current)
+    print(f"\n{'metric':<58}{'baseline':>14}{'current':>14}{'change':>10}")
+    for key in sorted(set(before) | set(after)):
+        old, new = before.get(key), after.get(key)
+        change = f"{(new - old) / old * 100:+.1f}%" if old and new is not None else '-'
+        print(f"{key:<58}{old if old is not None else '-':>14}{new if new is not None else '-':>14}{change:>10}")
+
+
+def print_summary(report):
+    totals = report['totals']
+    print(f"items={totals.get('items', 0)} wall={totals['wall_s']}s items/sec={totals['items_per_sec']}")
+    for section in ('callbacks', 'pipelines'):
+        for name, summary in report[section].items():
+            print(
+                f"  {name:<36}n={summary['count']:<6} p50={summary.get('p50_ms')}ms "
+                f"p90={summary.get('p90_ms')}ms p99={summary.get('p99_ms')}ms"
+            )
+    print(f"  peak_rss={report['memory']['peak_rss_kb']}KB tracemalloc_peak={report['memory']['tracemalloc_peak_kb']}KB")
+
+
+def _setting(value):
+    name, sep, val = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"NAME=VALUE 형식이어야 합니다: {value}")
+    return name, val
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='스파이더 콜백 + 파이프라인 오프라인 재생 벤치마크')
+    parser.add_argument('--fixtures', help='manifest.json이 있는 기록 응답 디렉터리 (없으면 합성)')
+    parser.add_argument('--majors', type=int, default=4)
+    parser.add_argument('--mediums', type=int, default=4)
+    parser.add_argument('--subs', type=int, default=4)
+    parser.add_argument('--cards', type=int, default=40, help='목록 페이지당 상품 카드 수')
+    parser.add_argument('--products', type=int, default=5000, help='합성 상품 풀 크기')
+    parser.add_argument('--runs', type=int, default=1, help='같은 메모리 DB로 연속 실행할 횟수 (결과는 마지막 실행)')
+    parser.add_argument('--warm', action='store_true', help='데몬 모드처럼 연속 실행 사이에 캐시를 넘김')
+    parser.add_argument('--run-interval-hours', type=int, default=6, help='연속 실행 간 snapshot_time 간격')
+    parser.add_argument('--change-rate', type=float, default=0.05, help='연속 실행마다 값이 바뀌는 상품 비율 (합성)')
+    parser.add_argument('--sql-latency-ms', type=float, default=0.0, help='SQL 한 번당 흉내 낼 왕복 시간')
+    parser.add_argument('--tracemalloc', action='store_true', help='파이썬 힙 최대치 측정 (느려짐)')
+    parser.add_argument('-s', '--set', action='append', type=_setting, default=[], metavar='NAME=VALUE')
+    parser.add_argument('-a', '--spider-arg', action='append', type=_setting, default=[], metavar='NAME=VALUE',
+                        help='스파이더 인자 (예: -a shard_plan=plan.json -a shard=0)')
+    parser.add_argument('--output', help='결과 JSON 경로')
+    parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level)
+    stand_in = install_constant()
+
+    from info_more.caches import WarmCaches
+    from info_more.spiders.naver import NaverStoreSpider
+
+    from benchmarks import constant
+    env = constant if stand_in else importlib.import_module('info_more.spiders.constant')
+    if args.fixtures:
+        fixtures = RecordedFixtures(args.fixtures)
+        fixture_desc = {'recorded': args.fixtures}
+    else:
+        fixtures = SyntheticFixtures(
+            env, majors=args.majors, mediums=args.mediums, subs=args.subs,
+            cards=args.cards, products=args.products, change_rate=args.change_rate,
+        )
+        fixture_desc = {
+            'synthetic': {
+                'majors': args.majors, 'mediums': args.mediums, 'subs': args.subs,
+                'cards': args.cards, 'products': args.products, 'change_rate': args.change_rate,
+            },
+        }
+    fixture_desc['sql_latency_ms'] = args.sql_latency_ms
+    fixture_desc['runs'] = args.runs
+    fixture_desc['warm'] = args.warm
+
+    db = FakeDatabase(latency=args.sql_latency_ms / 1000)
+    settings = project_settings(dict(args.set))
+    # --warm: 데몬 모드처럼 실행 사이에 캐시를 넘김
+    warm = WarmCaches() if args.warm else None
+
+    def _prepare(run):
+        # 리액터 설치(get_crawler)가 info_more.db 임포트(load_pipelines)보다 먼저여야 함
+        crawler = get_crawler(NaverStoreSpider, settings)
+        if warm is not None:
+            warm.adopt(crawler)
+        spider = crawler.spider = NaverStoreSpider.from_crawler(crawler, **dict(args.spider_arg))
+        spider.snapshot_time += timedelta(hours=args.run_interval_hours * run)
+        if isinstance(fixtures, SyntheticFixtures):
+            fixtures.revision = run
+        return Replay(crawler, spider, load_pipelines(crawler, db), fixtures)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    from twisted.internet import defer, task
+
+    @defer.inlineCallbacks
+    def _run_all(_reactor):
+        runs = []
+        for run in range(args.runs):
+            statements, snapshots = db.statements, db.snapshots
+            replay = _prepare(run)
+            yield replay.run()
+            if warm is not None:
+                warm.keep(replay.crawler)
+            runs.append({
+                'snapshot_time': replay.spider.snapshot_time.isoformat(),
+                'wall_s': round(replay.wall, 4),
+                'items': replay.counts['items'],
+                'statements': db.statements - statements,
+                'snapshots': db.snapshots - snapshots,
+            })
+
+        report = build_report(args, replay, db, replay.crawler, fixture_desc)
+        report['runs'] = runs
+        print_summary(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        if args.baseline:
+            with open(args.baseline, encoding='utf-8') as f:
+                compare(json.load(f), report)
+
+    # task.react는 끝나면 sys.exit으로 종료 (실패 시 traceback 출력 후 1)
+    task.react(_run_all)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,571 @@
+# info_more/caches.py
+# 스파이더 시작 시 DB에서 한 번에 적재해 두고 파이프라인들이 같이 쓰는 캐시
+# + 실행 간에 유지하는 카테고리 트리 디스크 캐시
+
+import hashlib
+import json
+import os
+import time
+import weakref
+from array import array
+from bisect import bisect_left
+from decimal import Decimal
+
+import pymysql
+from scrapy import signals
+from scrapy.utils.project import data_path
+from twisted.internet import defer
+
+# crawler 하나당 캐시 하나
+_category_maps = weakref.WeakKeyDictionary()
+_seen_products = weakref.WeakKeyDictionary()
+_category_trees = weakref.WeakKeyDictionary()
+# crawler → {인덱스 클래스: 인덱스}
+_indexes = weakref.WeakKeyDictionary()
+
+
+def _product_key(naver_product_id):
+    """숫자 naver_product_id는 int로 (str 객체보다 작고 해시가 빠름)"""
+    try:
+        return int(naver_product_id)
+    except (TypeError, ValueError):
+        return str(naver_product_id)
+
+
+class CategoryIdMap:
+    """naver_category_id → category.id (+ 마지막으로 기록한 name/level/parent_id)
+
+    카테고리 테이블은 작고 거의 바뀌지 않으므로 open_spider에서 통째로 읽어 둔다.
+    새로 INSERT한 카테고리는 cursor.lastrowid로 바로 추가한다.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        # naver_category_id → (name, level, parent_id): 바뀐 게 없으면 기록 생략
+        self.rows = {}
+        self.loaded = False
+        self._lock = defer.DeferredLock()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        category_map = _category_maps.get(crawler)
+        if category_map is None:
+            category_map = _category_maps[crawler] = cls()
+        return category_map
+
+    def __contains__(self, naver_category_id):
+        return naver_category_id in self.ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get(self, naver_category_id, default=None):
+        return self.ids.get(naver_category_id, default)
+
+    def set_id(self, naver_category_id, category_id):
+        """DB에서 따로 조회한 id만 추가 (name 등은 모름)"""
+        self.ids[naver_category_id] = category_id
+
+    def set(self, naver_category_id, category_id, name=None, level=None, parent_id=None):
+        self.ids[naver_category_id] = category_id
+        self.rows[naver_category_id] = (name, level, parent_id)
+
+    def is_unchanged(self, naver_category_id, name, level, parent_id):
+        return self.rows.get(naver_category_id) == (name, level, parent_id)
+
+    def ensure_loaded(self, writer, pool):
+        """아직 적재 전이면 라이터 스레드에서 적재. 여러 파이프라인이 불러도 한 번만 읽음."""
+        return self._lock.run(self._load_once, writer, pool)
+
+    def _load_once(self, writer, pool):
+        if self.loaded:
+            return defer.succeed(len(self.ids))
+        return writer.run(self.load, pool)
+
+    def load(self, pool):
+        """서버 측 커서(SSCursor)로 category 테이블 전체를 한 번의 쿼리로 스트리밍 적재."""
+        sql = "SELECT naver_category_id, id, name, level, parent_id FROM category"
+        with pool.connection() as conn:
+            with conn.cursor(pymysql.cursors.SSCursor) as cursor:
+                cursor.execute(sql)
+                for naver_category_id, category_id, name, level, parent_id in cursor:
+                    self.set(str(naver_category_id), category_id, name, level, parent_id)
+        self.loaded = True
+        return len(self.ids)
+
+
+
+class ProductIdIndex:
+    """naver_product_id → product.id 인덱스 (dict 대신 정렬된 정수 배열 + 이진 탐색)
+
+    상품 테이블이 수백만 행이 되면 str 키 dict는 항목당 80바이트 이상을 쓴다.
+    시작할 때 적재한 id는 array('q') 두 개(항목당 16바이트)에 정렬해 두고,
+    실행 중에 새로 알게 된 id만 int 키 dict(self.extra)에 추가한다.
+    숫자가 아닌 naver_product_id는 문자열 그대로 self.extra에 둔다.
+    """
+
+    def __init__(self):
+        self.keys = array('q')
+        self.values = array('q')
+        self.extra = {}
+        # load()로 테이블 전체를 읽었는지
+        self.loaded = False
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """crawler가 (데몬 모드에서는 이어지는 실행들도) 같이 쓰는 인덱스"""
+        indexes = _indexes.setdefault(crawler, {})
+        index = indexes.get(cls)
+        if index is None:
+            index = indexes[cls] = cls()
+        return index
+
+    def __len__(self):
+        return len(self.keys) + len(self.extra)
+
+    def __contains__(self, naver_product_id):
+        return self.get(naver_product_id) is not None
+
+    def get(self, naver_product_id, default=None):
+        key = _product_key(naver_product_id)
+        value = self.extra.get(key)
+        if value is not None:
+            return value
+        if type(key) is int:
+            i = bisect_left(self.keys, key)
+            if i < len(self.keys) and self.keys[i] == key:
+                return self.values[i]
+        return default
+
+    def __setitem__(self, naver_product_id, product_id):
+        self.extra[_product_key(naver_product_id)] = product_id
+
+    def update(self, product_ids):
+        for naver_product_id, product_id in product_ids.items():
+            self[naver_product_id] = product_id
+
+    def load(self, pool):
+        """서버 측 커서(SSCursor)로 product 테이블의 id 쌍을 스트리밍 적재 (라이터 스레드에서 실행)"""
+        keys = array('q')
+        values = array('q')
+        sql = "SELECT naver_product_id, id FROM product"
+        with pool.connection() as conn:
+            with conn.cursor(pymysql.cursors.SSCursor) as cursor:
+                cursor.execute(sql)
+                for naver_product_id, product_id in cursor:
+                    key = _product_key(naver_product_id)
+                    if type(key) is int:
+                        keys.append(key)
+                        values.append(product_id)
+                    else:
+                        self.extra[key] = product_id
+        self._set_sorted(keys, values)
+        self.loaded = True
+        return len(self)
+
+    def _set_sorted(self, keys, values):
+        # 보통 이미 정렬된 순서로 오지 않으므로 한 번 정렬 (정렬용 인덱스 리스트는 임시로만 사용)
+        if any(keys[i] > keys[i + 1] for i in range(len(keys) - 1)):
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            keys = array('q', (keys[i] for i in order))
+            values = array('q', (values[i] for i in order))
+        self.keys = keys
+        self.values = values
+
+    def compact(self):
+        """실행 중에 추가된 int 키(self.extra)를 정렬 배열에 병합"""
+        updates = sorted((key, value) for key, value in self.extra.items() if type(key) is int)
+        if not updates:
+            return
+        keys = array('q')
+        values = array('q')
+        start = 0
+        for key, value in updates:
+            i = bisect_left(self.keys, key, start)
+            keys.extend(self.keys[start:i])
+            values.extend(self.values[start:i])
+            keys.append(key)
+            values.append(value)
+            start = i + 1 if i < len(self.keys) and self.keys[i] == key else i
+        keys.extend(self.keys[start:])
+        values.extend(self.values[start:])
+        self.keys, self.values = keys, values
+        self.extra = {key: value for key, value in self.extra.items() if type(key) is not int}
+
+
+
+def snapshot_fingerprint(original_price, discount_rate, price, delivery_fee, rating, review_count, ranking):
+    """스냅샷 추적 필드의 해시 (같은 프로세스 안에서만 비교). DB의 DECIMAL 평점은 float로 맞춘다."""
+    return hash((
+        original_price, discount_rate, price, delivery_fee,
+        float(rating) if rating is not None else None,
+        review_count, ranking,
+    ))
+
+
+class SnapshotStateIndex(ProductIdIndex):
+    """product.id → 마지막으로 기록한 스냅샷 상태의 fingerprint (delta 스냅샷 모드)
+
+    ProductIdIndex와 같은 정렬 배열 구조. 상품 파이프라인이 매 실행 같은 값으로
+    product 행을 갱신하므로 마지막 상태는 product 테이블에서 바로 읽는다
+    (product_snapshot을 GROUP BY로 훑지 않음).
+    """
+
+    def changed(self, product_id, fingerprint):
+        """마지막으로 기록한 상태와 다르면 True (기록 성공 후 remember로 갱신)"""
+        return self.get(product_id) != fingerprint
+
+    def remember(self, product_id, fingerprint):
+        self[product_id] = fingerprint
+
+    def load(self, pool):
+        keys = array('q')
+        values = array('q')
+        sql = """
+            SELECT id, original_price, discount_rate, price, delivery_fee, rating, review_count, ranking
+            FROM product
+            """
+        with pool.connection() as conn:
+            with conn.cursor(pymysql.cursors.SSCursor) as cursor:
+                cursor.execute(sql)
+                for product_id, *state in cursor:
+                    keys.append(product_id)
+                    values.append(snapshot_fingerprint(*state))
+        self._set_sorted(keys, values)
+        self.loaded = True
+        return len(self)
+
+
+def _canonical(value):
+    """DB 값(Decimal 등)과 아이템 값(int/float)을 같은 문자열로 맞춤"""
+    if value is None:
+        return ''
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        number = float(value)
+        return str(int(number)) if number.is_integer() else repr(number)
+    return str(value)
+
+
+def product_fingerprint(*values):
+    """product의 갱신 대상 컬럼 해시 (부호 있는 64비트 정수)
+
+    디스크에 저장해 다음 실행에서도 비교하므로 hash() 대신 실행마다 같은 값이 나오는 blake2b 사용.
+    """
+    data = '\x1f'.join(_canonical(value) for value in values).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little', signed=True)
+
+
+class ProductFingerprintIndex(ProductIdIndex):
+    """naver_product_id → 마지막으로 기록한 product 행의 fingerprint
+
+    바뀐 게 없는 상품은 업서트를 보내지 않기 위해 사용한다 (MYSQL_PRODUCT_SKIP_UNCHANGED).
+    종료할 때 product 테이블의 행 수와 MAX(updated_at)(stamp)을 같이 기록해 두고,
+    다음 실행 시작 때 stamp가 같으면 테이블을 훑지 않는다.
+    (데몬 모드에서 이어받은 인덱스는 그대로, 아니면 디스크에 저장한 파일에서 적재)
+    """
+
+    COLUMNS = (
+        'category_id', 'mall_name', 'name', 'original_price', 'discount_rate', 'price',
+        'delivery_fee', 'rating', 'review_count', 'ranking', 'detail_url',
+    )
+    STAMP_SQL = "SELECT COUNT(*) AS row_count, MAX(updated_at) AS updated_at FROM product"
+
+    def __init__(self):
+        super().__init__()
+        # 마지막 checkpoint 때의 테이블 stamp
+        self.stamp = None
+
+    def changed(self, naver_product_id, fingerprint):
+        """마지막으로 기록한 행과 다르면 True (기록 성공 후 remember로 갱신)"""
+        return self.get(naver_product_id) != fingerprint
+
+    def remember(self, naver_product_id, fingerprint):
+        self[naver_product_id] = fingerprint
+
+    def load(self, pool):
+        """product 테이블을 SSCursor로 스트리밍하며 fingerprint 계산 (라이터 스레드에서 실행)"""
+        keys = array('q')
+        values = array('q')
+        sql = f"SELECT naver_product_id, {', '.join(self.COLUMNS)} FROM product"
+        with pool.connection() as conn:
+            with conn.cursor(pymysql.cursors.SSCursor) as cursor:
+                cursor.execute(sql)
+                for naver_product_id, *columns in cursor:
+                    key = _product_key(naver_product_id)
+                    if type(key) is int:
+                        keys.append(key)
+                        values.append(product_fingerprint(*columns))
+                    else:
+                        self.extra[key] = product_fingerprint(*columns)
+        self._set_sorted(keys, values)
+        self.loaded = True
+        return len(self)
+
+    def _stamp(self, pool):
+        with pool.cursor() as cursor:
+            cursor.execute(self.STAMP_SQL)
+            row = cursor.fetchone()
+        updated_at = row['updated_at']
+        return [row['row_count'], str(updated_at) if updated_at is not None else None]
+
+    def ensure_loaded(self, pool, path):
+        """지금 테이블과 맞는 인덱스를 준비. (개수, 'memory' / 'file' / 'table')을 돌려줌 (라이터 스레드)
+
+        memory: 이전 실행(데몬 모드)에서 이어받은 인덱스를 그대로 사용
+        file  : 저장해 둔 파일에서 적재
+        table : product 테이블을 훑어서 계산
+        """
+        if self.stamp is not None and self.stamp == self._stamp(pool):
+            return len(self), 'memory'
+        self.keys, self.values, self.extra = array('q'), array('q'), {}
+        self.stamp = None
+        return self.load_persisted(pool, path)
+
+    def load_persisted(self, pool, path):
+        """저장된 파일이 지금 테이블과 맞으면 파일에서, 아니면 테이블에서 적재."""
+        if path:
+            try:
+                with open(path, 'rb') as f:
+                    header = json.loads(f.readline())
+                    if header.get('stamp') == self._stamp(pool):
+                        keys = array('q')
+                        values = array('q')
+                        keys.fromfile(f, header['rows'])
+                        values.fromfile(f, header['rows'])
+                        self.keys, self.values, self.extra = keys, values, {}
+                        self.loaded = True
+                        return len(self), 'file'
+            except FileNotFoundError:
+                pass
+            except (ValueError, KeyError, EOFError):
+                # 깨진 파일은 무시하고 테이블에서 다시 계산
+                pass
+        return self.load(pool), 'table'
+
+    def checkpoint(self, pool, path=None):
+        """기록이 모두 끝난 뒤 호출: 지금 테이블 stamp를 기억하고, path가 있으면 원자적으로 저장 (라이터 스레드)"""
+        self.compact()
+        self.stamp = self._stamp(pool)
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            header = {'rows': len(self.keys), 'stamp': self.stamp}
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(json.dumps(header).encode('utf-8') + b'\n')
+                self.keys.tofile(f)
+                self.values.tofile(f)
+            os.replace(tmp_path, path)
+        return len(self.keys)
+
+
+class SeenProducts:
+    """이번 실행에서 이미 통과한 naver_product_id → 카테고리 깊이 (1 대분류 ~ 3 소분류)
+
+    같은 상품이 대/중/소분류 목록에 모두 나오므로 중복 제거 파이프라인이 사용한다.
+    """
+
+    def __init__(self):
+        self.depths = {}
+        # 더 깊은 카테고리 복사본이 다시 통과한 상품 (스냅샷은 이미 기록했으므로 건너뜀)
+        self.upgraded = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        seen = _seen_products.get(crawler)
+        if seen is None:
+            seen = _seen_products[crawler] = cls()
+        return seen
+
+    def __len__(self):
+        return len(self.depths)
+
+    def admit(self, naver_product_id, depth, deepest_wins=False):
+        """처음 보는 상품이거나 (deepest_wins일 때) 더 깊은 카테고리의 복사본이면 True"""
+        key = _product_key(naver_product_id)
+        seen_depth = self.depths.get(key)
+        if seen_depth is None:
+            self.depths[key] = depth
+            return True
+        if deepest_wins and depth > seen_depth:
+            self.depths[key] = depth
+            self.upgraded.add(key)
+            return True
+        return False
+
+    def pop_upgraded(self, naver_product_id):
+        """다시 통과한 복사본이면 True (한 번만)"""
+        if not self.upgraded:
+            return False
+        key = _product_key(naver_product_id)
+        if key in self.upgraded:
+            self.upgraded.discard(key)
+            return True
+        return False
+
+
+
+class CategoryTreeCache:
+    """카테고리 문서(URL → JSON 본문 + ETag/Last-Modified) 디스크 캐시
+
+    카테고리 트리는 실행 사이에 거의 바뀌지 않는다.
+    ttl초 안에 받은 문서는 요청 없이 그대로 쓰고, 지난 문서는 조건부 요청으로 재검증한다.
+    항목은 스파이더가 요청한 URL로 저장한다 (리다이렉트된 응답도 다음 실행에서 같은 URL로 찾도록).
+    """
+
+    def __init__(self, path, ttl, stats=None):
+        self.path = path
+        self.ttl = ttl
+        self.stats = stats
+        # 요청 url → {'body', 'sha1', 'etag', 'last_modified', 'fetched_at'}
+        self.entries = {}
+        self.dirty = False
+        self.load()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('CATEGORY_TREE_CACHE_ENABLED', False):
+            return None
+        cache = _category_trees.get(crawler)
+        if cache is None:
+            path = data_path(settings.get('CATEGORY_TREE_CACHE_PATH', 'category_tree.json'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            cache = _category_trees[crawler] = cls(
+                path=path,
+                ttl=settings.getfloat('CATEGORY_TREE_CACHE_TTL', 43200),
+            )
+        # 데몬 모드에서 이어받은 캐시도 이번 crawler의 스탯/종료 시그널에 연결
+        cache.stats = crawler.stats
+        crawler.signals.connect(cache.save, signal=signals.spider_closed)
+        return cache
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        except ValueError:
+            # 깨진 캐시 파일은 버리고 새로 받음
+            self.entries = {}
+
+    def save(self, spider=None):
+        if not self.dirty:
+            return
+        # 샤드 실행처럼 여러 프로세스가 같은 파일을 쓰면 다른 프로세스가 저장한 더 새 항목은 유지
+        entries = dict(self.entries)
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for url, entry in json.load(f).items():
+                    if url not in entries or entry['fetched_at'] > entries[url]['fetched_at']:
+                        entries[url] = entry
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            pass
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def _inc(self, key, count=1):
+        if self.stats:
+            self.stats.inc_value(f'category_cache/{key}', count)
+
+    def fresh(self, url):
+        """ttl 안에 받은 문서면 파싱한 JSON, 아니면 None"""
+        entry = self.entries.get(url)
+        if entry is None or time.time() - entry['fetched_at'] > self.ttl:
+            return None
+        self._inc('hits')
+        self._inc('bytes_saved', len(entry['body'].encode('utf-8')))
+        return json.loads(entry['body'])
+
+    def validators(self, url):
+        """조건부 요청 헤더 (캐시에 없으면 빈 dict)"""
+        entry = self.entries.get(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    @staticmethod
+    def request_url(response):
+        """응답을 받으려고 처음 보낸 요청의 URL (리다이렉트되었으면 리다이렉트 전 URL)"""
+        redirect_urls = response.meta.get('redirect_urls')
+        return redirect_urls[0] if redirect_urls else response.request.url
+
+    def revalidated(self, response):
+        """304 응답: 캐시 본문을 그대로 쓰고 유효 기간만 연장"""
+        entry = self.entries[self.request_url(response)]
+        entry['fetched_at'] = time.time()
+        self.dirty = True
+        self._inc('revalidated')
+        self._inc('bytes_saved', len(entry['body'].encode('utf-8')))
+        return json.loads(entry['body'])
+
+    def store(self, response):
+        """200 응답 저장. 본문이 캐시와 달라졌으면 True"""
+        url = self.request_url(response)
+        body = response.text
+        sha1 = hashlib.sha1(response.body).hexdigest()
+        entry = self.entries.get(url)
+        changed = entry is None or entry['sha1'] != sha1
+        self._inc('misses' if entry is None else ('changed' if changed else 'unchanged'))
+
+        headers = response.headers
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        self.entries[url] = {
+            'body': body,
+            'sha1': sha1,
+            'etag': etag.decode('latin-1') if etag else None,
+            'last_modified': last_modified.decode('latin-1') if last_modified else None,
+            'fetched_at': time.time(),
+        }
+        self.dirty = True
+        return changed
+
+
+
+class WarmCaches:
+    """데몬 모드(info_more.daemon)에서 실행 사이에 이어 쓰는 캐시
+
+    crawler마다 새로 만들던 캐시를 새 crawler에 그대로 넘긴다.
+      - CategoryIdMap            : naver_category_id → category.id
+      - ProductIdIndex 계열      : naver_product_id → product.id / 상품 fingerprint
+      - CategoryTreeCache        : 카테고리 문서
+    실행마다 새로 시작해야 하는 SeenProducts(중복 제거)는 넘기지 않는다.
+    """
+
+    def __init__(self):
+        self.category_map = None
+        self.category_tree = None
+        self.indexes = {}
+
+    def adopt(self, crawler):
+        """crawler를 만든 직후, 크롤링 시작 전에 호출"""
+        if self.category_map is not None:
+            _category_maps[crawler] = self.category_map
+        if self.category_tree is not None:
+            _category_trees[crawler] = self.category_tree
+        if self.indexes:
+            _indexes[crawler] = dict(self.indexes)
+
+    def keep(self, crawler):
+        """크롤링이 끝난 뒤 호출: 이번 실행의 캐시를 다음 실행용으로 보관"""
+        self.category_map = _category_maps.get(crawler, self.category_map)
+        self.category_tree = _category_trees.get(crawler, self.category_tree)
+        for cls, index in _indexes.get(crawler, {}).items():
+            # 실행 중에 dict로 쌓인 항목을 정렬 배열로 옮겨 메모리를 줄임
+            index.compact()
+            self.indexes[cls] = index
+
+    def sizes(self):
+        return {
+            'category_ids': len(self.category_map) if self.category_map is not None else 0,
+            **{cls.__name__: len(index) for cls, index in self.indexes.items()},
+        }
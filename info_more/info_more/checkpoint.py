@@ -0,0 +1,221 @@
+# info_more/checkpoint.py
+# 실행 체크포인트: 중간에 죽은 실행을 같은 snapshot_time으로 다시 띄우면 끝난 카테고리 목록은 건너뜀
+#
+#   scrapy crawl naver -a snapshot_time=2026-01-01T06:00   # 같은 시각으로 다시 실행하면 이어서 크롤링
+#
+# 상품 목록 요청(CHECKPOINT_CALLBACKS)은 다음 조건을 모두 만족해야 완료로 기록한다.
+#   1) 콜백이 끝까지 실행됨
+#   2) 그 응답에서 나온 아이템이 모두 파이프라인을 통과함 (item_scraped / item_dropped / item_error)
+#   3) 파이프라인 버퍼가 DB에 기록됨 (buffers_drain_requested로 flush 후 기록)
+#      그 사이 실패한 배치(mysql/failed_batches)가 있으면 이번 묶음은 기록하지 않음 → 재시작 때 다시 받음
+# 완료 목록은 CHECKPOINT_INTERVAL초마다 모아서 파일 끝에 덧붙인다(append + fsync).
+# 정상 종료(finished)하면 마지막 줄에 #finished를 남기고, 그런 파일은 다음 실행에서 새로 시작한다.
+
+import os
+from collections import defaultdict
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.utils.project import data_path
+from twisted.internet import task
+
+from info_more import signals as info_signals
+
+FINISHED = '#finished'
+
+
+class CrawlCheckpoint:
+    """체크포인트 기록 + 재시작 시 끝난 목록 요청을 거르는 스파이더 미들웨어"""
+
+    def __init__(self, crawler, root, callbacks=('parse_page',), interval=30.0):
+        self.crawler = crawler
+        self.root = root
+        self.callbacks = frozenset(callbacks)
+        self.interval = interval
+        self.stats = crawler.stats
+        self.path = None
+        # 이전 실행에서 끝난 url
+        self.completed = set()
+        # url → 아직 파이프라인을 통과하지 않은 아이템 수 / 콜백이 끝난 url
+        self.outstanding = defaultdict(int)
+        self.exhausted = set()
+        # 아이템까지 모두 끝나 다음 체크포인트에 기록할 url
+        self.ready = []
+        self.loop = None
+        self.committing = None
+        # 마지막 체크포인트 때의 mysql/failed_batches
+        self.failed_batches = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('CHECKPOINT_ENABLED', False):
+            raise NotConfigured
+        checkpoint = cls(
+            crawler,
+            root=data_path(settings.get('CHECKPOINT_DIR', 'checkpoints'), createdir=True),
+            callbacks=settings.getlist('CHECKPOINT_CALLBACKS', ['parse_page']),
+            interval=settings.getfloat('CHECKPOINT_INTERVAL', 30),
+        )
+        crawler.signals.connect(checkpoint.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(checkpoint.spider_closed, signal=signals.spider_closed)
+        for signal in (signals.item_scraped, signals.item_dropped, signals.item_error):
+            crawler.signals.connect(checkpoint._item_done, signal=signal)
+        return checkpoint
+
+    def _file_name(self, spider):
+        name = f'{spider.name}-{spider.snapshot_time:%Y%m%dT%H%M}'
+        # 샤드마다 따로 (한 샤드가 먼저 끝나도 다른 샤드의 체크포인트는 이어짐)
+        shard = getattr(spider, 'shard', None)
+        if shard is not None:
+            name += f'-shard{shard}'
+        return os.path.join(self.root, f'{name}.log')
+
+    def spider_opened(self, spider):
+        self.path = self._file_name(spider)
+        self.completed = self._read(self.path)
+        if self.completed:
+            self.stats.set_value('checkpoint/resumed', len(self.completed))
+            spider.logger.info(
+                f"CrawlCheckpoint: {os.path.basename(self.path)}에서 이어서 실행 (완료된 목록 {len(self.completed)}개 건너뜀)"
+            )
+        self.loop = task.LoopingCall(self.commit)
+        self.loop.start(self.interval, now=False)
+
+    @staticmethod
+    def _read(path):
+        """끝난 url 집합. 파일이 없거나 정상 종료(#finished)로 끝난 파일이면 빈 집합"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                # 쓰다 만 마지막 줄(줄바꿈 없음)은 버림
+                lines = [line[:-1] for line in f if line.endswith('\n')]
+        except FileNotFoundError:
+            return set()
+        if lines and lines[-1] == FINISHED:
+            os.remove(path)
+            return set()
+        return set(lines)
+
+    def _tracked(self, request):
+        return getattr(request.callback, '__name__', None) in self.callbacks
+
+    @staticmethod
+    def _key(request):
+        # 리다이렉트된 응답도 처음 요청한 url로 기록
+        return request.meta.get('redirect_urls', [request.url])[0]
+
+    def _skip(self, request):
+        """이전 실행에서 끝난 목록 요청이면 True"""
+        if self._tracked(request) and self._key(request) in self.completed:
+            self.stats.inc_value('checkpoint/skipped')
+            return True
+        return False
+
+    async def process_start(self, start):
+        # 카테고리 트리 캐시가 유효하면 목록 요청이 start()에서 바로 나오는데,
+        # start()의 출력은 process_spider_output을 거치지 않으므로 여기서도 거름
+        async for item_or_request in start:
+            if isinstance(item_or_request, Request) and self._skip(item_or_request):
+                continue
+            yield item_or_request
+
+    def process_spider_output(self, response, result):
+        tracked = self._tracked(response.request)
+        url = self._key(response.request)
+        for item_or_request in result:
+            if isinstance(item_or_request, Request):
+                if self._skip(item_or_request):
+                    continue
+            elif tracked:
+                self.outstanding[url] += 1
+            yield item_or_request
+        if tracked:
+            self.exhausted.add(url)
+            self._maybe_ready(url)
+
+    async def process_spider_output_async(self, response, result):
+        tracked = self._tracked(response.request)
+        url = self._key(response.request)
+        async for item_or_request in result:
+            if isinstance(item_or_request, Request):
+                if self._skip(item_or_request):
+                    continue
+            elif tracked:
+                self.outstanding[url] += 1
+            yield item_or_request
+        if tracked:
+            self.exhausted.add(url)
+            self._maybe_ready(url)
+
+    def _item_done(self, response=None, **kwargs):
+        if response is None:
+            return
+        url = self._key(response.request)
+        if url in self.outstanding:
+            self.outstanding[url] -= 1
+            self._maybe_ready(url)
+
+    def _maybe_ready(self, url):
+        if url in self.exhausted and self.outstanding.get(url, 0) <= 0:
+            self.exhausted.discard(url)
+            self.outstanding.pop(url, None)
+            self.ready.append(url)
+
+    def commit(self):
+        """파이프라인 버퍼를 기록한 뒤 그 전에 준비된 url을 파일에 덧붙임"""
+        if not self.ready or self.committing is not None:
+            return self.committing
+        batch, self.ready = self.ready, []
+        # 버퍼 파이프라인이 없으면 바로 발생하므로 콜백을 붙이기 전에 committing부터 설정
+        d = self.committing = self.crawler.signals.send_catch_log_deferred(
+            signal=info_signals.buffers_drain_requested, spider=self.crawler.spider,
+        )
+
+        def _append(_):
+            failed, self.failed_batches = self.failed_batches, self.stats.get_value('mysql/failed_batches', 0)
+            if self.failed_batches > failed:
+                self.stats.inc_value('checkpoint/discarded', len(batch))
+                self.crawler.spider.logger.warning(
+                    f"CrawlCheckpoint: 기록 실패한 배치가 있어 목록 {len(batch)}개를 완료로 남기지 않음"
+                )
+                return
+            self._append(batch)
+            self.stats.inc_value('checkpoint/committed', len(batch))
+            self.stats.inc_value('checkpoint/commits')
+
+        def _done(result):
+            self.committing = None
+            return result
+
+        d.addCallback(_append)
+        d.addBoth(_done)
+        return d
+
+    def _append(self, lines):
+        data = ''.join(f'{line}\n' for line in lines).encode('utf-8')
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    async def spider_closed(self, spider, reason):
+        if self.loop is not None and self.loop.running:
+            self.loop.stop()
+        # 진행 중인 체크포인트가 있으면 먼저 끝낸 뒤 (#finished가 마지막 줄이 되게)
+        if self.committing is not None:
+            await maybe_deferred_to_future(self.committing)
+        self._close(reason)
+
+    def _close(self, reason):
+        # 파이프라인은 이미 닫혀(버퍼 기록 완료) 있으므로 남은 url을 바로 기록
+        lines, self.ready = self.ready, []
+        if self.stats.get_value('mysql/failed_batches', 0) > self.failed_batches:
+            lines = []
+        if reason == 'finished':
+            lines.append(FINISHED)
+        if lines:
+            self._append(lines)
@@ -0,0 +1,179 @@
+# info_more/daemon.py
+# 데몬 모드: 프로세스 하나를 계속 띄워 두고 스케줄마다 같은 리액터 위에서 크롤링 실행
+#
+#   cd info_more
+#   python -m info_more.daemon                 # DAEMON_SCHEDULE 시각마다 실행
+#   python -m info_more.daemon --at :35 --now  # 매시 35분 + 시작하자마자 한 번 (demo_video_main.py와 같은 주기)
+#
+# main.py처럼 실행마다 scrapy crawl 프로세스를 새로 띄우지 않으므로
+# 인터프리터/Scrapy/프로젝트 로딩을 한 번만 하고, 카테고리·상품 id 캐시를 다음 실행에 그대로 넘긴다(WarmCaches).
+# 이전 실행이 끝나지 않았으면 다음 실행은 건너뛴다(겹쳐 실행하지 않음).
+
+import argparse
+import logging
+import time
+
+import schedule
+from scrapy import signals
+from scrapy.crawler import CrawlerRunner
+from scrapy.utils.log import configure_logging
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.reactor import install_reactor
+
+from info_more.caches import WarmCaches
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlDaemon:
+    """스케줄에 맞춰 CrawlerRunner로 크롤링을 하나씩 실행"""
+
+    def __init__(self, runner, spider_name='naver', times=(), rollup_at=None, warm=True):
+        self.runner = runner
+        self.spider_name = spider_name
+        self.times = list(times)
+        self.rollup_at = rollup_at
+        self.warm = WarmCaches() if warm else None
+        # 진행 중인 크롤링 / 롤업 (겹쳐 실행 방지)
+        self.running = None
+        self.rolling_up = None
+        self.runs = 0
+        self.skipped = 0
+        self.scheduler = schedule.Scheduler()
+        self.loop = None
+        # 이번 실행의 시작 시각 / crawler (spider_opened에서 시작 지연 계산)
+        self.started = None
+        self.crawler = None
+
+    @classmethod
+    def from_settings(cls, settings, runner, **kwargs):
+        options = {
+            'spider_name': settings.get('DAEMON_SPIDER', 'naver'),
+            'times': settings.getlist('DAEMON_SCHEDULE', ['00:00', '06:00', '12:00', '18:00']),
+            'rollup_at': settings.get('DAEMON_ROLLUP_AT') or None,
+            'warm': settings.getbool('DAEMON_WARM_CACHES', True),
+        }
+        options.update({key: value for key, value in kwargs.items() if value is not None})
+        return cls(runner, **options)
+
+    def _every(self, at):
+        """'HH:MM' → 매일, ':MM' → 매시"""
+        if at.startswith(':'):
+            return self.scheduler.every().hour.at(at)
+        return self.scheduler.every().day.at(at)
+
+    def start(self, now=False):
+        from twisted.internet import task
+
+        for at in self.times:
+            self._every(at).do(self.trigger)
+        if self.rollup_at:
+            self._every(self.rollup_at).do(self.trigger_rollup)
+        self.loop = task.LoopingCall(self.scheduler.run_pending)
+        self.loop.start(1, now=False)
+        logger.info(f"CrawlDaemon: 시작 (실행 시각 {self.times}, 롤업 {self.rollup_at or '-'})")
+        if now:
+            self.trigger()
+
+    def stop(self):
+        """리액터 종료 전: 스케줄을 멈추고 진행 중인 크롤링이 정리될 때까지 대기"""
+        if self.loop is not None and self.loop.running:
+            self.loop.stop()
+        return self.runner.stop()
+
+    def trigger(self):
+        if self.running is not None:
+            self.skipped += 1
+            logger.warning(f"CrawlDaemon: 이전 실행이 아직 진행 중이라 건너뜀 (누적 {self.skipped}회)")
+            return None
+
+        self.runs += 1
+        self.started = time.perf_counter()
+        crawler = self.crawler = self.runner.create_crawler(self.spider_name)
+        if self.warm is not None:
+            self.warm.adopt(crawler)
+        crawler.signals.connect(self._spider_opened, signal=signals.spider_opened)
+
+        d = self.running = self.runner.crawl(crawler)
+        d.addErrback(lambda failure: logger.error(f"CrawlDaemon: 실행 실패: {failure.getErrorMessage()}"))
+        d.addBoth(self._finished, crawler)
+        return d
+
+    def _spider_opened(self, spider):
+        # create_crawler ~ spider_opened: 스파이더/미들웨어/파이프라인 생성 + open_spider(캐시 적재 포함)
+        startup_ms = (time.perf_counter() - self.started) * 1000
+        stats = self.crawler.stats
+        stats.set_value('daemon/run', self.runs)
+        stats.set_value('daemon/startup_ms', round(startup_ms, 1))
+        if self.warm is not None:
+            for name, size in self.warm.sizes().items():
+                stats.set_value(f'daemon/warm/{name}', size)
+        logger.info(f"CrawlDaemon: {self.runs}번째 실행 시작 지연 {startup_ms:.0f}ms")
+
+    def _finished(self, _, crawler):
+        elapsed = time.perf_counter() - self.started
+        if self.warm is not None:
+            self.warm.keep(crawler)
+        stats = crawler.stats.get_stats() if crawler.stats else {}
+        logger.info(
+            f"CrawlDaemon: {self.runs}번째 실행 종료 ({elapsed:.1f}s, "
+            f"아이템 {stats.get('item_scraped_count', 0)}개, "
+            f"종료 사유 {stats.get('finish_reason', '-')})"
+        )
+        self.running = None
+        self.crawler = None
+
+    def trigger_rollup(self):
+        """스냅샷 롤업(info_more.rollup)을 리액터 스레드 풀에서 실행"""
+        from twisted.internet import threads
+
+        if self.rolling_up is not None:
+            logger.warning("CrawlDaemon: 이전 롤업이 아직 진행 중이라 건너뜀")
+            return None
+
+        def _rollup():
+            from info_more.rollup import SnapshotRollup
+
+            rollup = SnapshotRollup.from_settings(self.runner.settings)
+            try:
+                return rollup.run()
+            finally:
+                rollup.pool.close()
+
+        def _done(result):
+            self.rolling_up = None
+            return result
+
+        d = self.rolling_up = threads.deferToThread(_rollup)
+        d.addCallback(lambda summary: logger.info(f"CrawlDaemon: 롤업 완료 {summary}"))
+        d.addErrback(lambda failure: logger.error(f"CrawlDaemon: 롤업 실패: {failure.getErrorMessage()}"))
+        d.addBoth(_done)
+        return d
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="info_more 데몬 모드 (한 프로세스에서 스케줄 실행)")
+    parser.add_argument('--at', action='append', default=None,
+                        help="실행 시각 'HH:MM'(매일) 또는 ':MM'(매시). 여러 번 지정 가능 (기본: DAEMON_SCHEDULE)")
+    parser.add_argument('--now', action='store_true', help="시작하자마자 한 번 실행")
+    parser.add_argument('--no-warm', action='store_true', help="실행 사이에 캐시를 넘기지 않음")
+    args = parser.parse_args(argv)
+
+    settings = get_project_settings()
+    # 리액터는 info_more.db 등이 임포트되기 전에 설치해야 함
+    if settings.get('TWISTED_REACTOR'):
+        install_reactor(settings.get('TWISTED_REACTOR'), settings.get('ASYNCIO_EVENT_LOOP'))
+    configure_logging(settings)
+    from twisted.internet import reactor
+
+    daemon = CrawlDaemon.from_settings(
+        settings, CrawlerRunner(settings),
+        times=args.at, warm=False if args.no_warm else None,
+    )
+    reactor.addSystemEventTrigger('before', 'shutdown', daemon.stop)
+    reactor.callWhenRunning(daemon.start, now=args.now)
+    reactor.run()
+
+
+if __name__ == '__main__':
+    main()
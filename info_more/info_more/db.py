@@ -0,0 +1,295 @@
+# info_more/db.py
+# 파이프라인들이 같이 쓰는 MySQL 커넥션 풀
+
+import queue
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+import pymysql
+from scrapy import signals
+from twisted.internet import defer, reactor, threads
+from twisted.python.threadpool import ThreadPool
+
+# crawler 하나당 풀/라이터 하나 (세 파이프라인이 같이 사용)
+_pools = weakref.WeakKeyDictionary()
+_writers = weakref.WeakKeyDictionary()
+
+
+class MySQLConnectionPool:
+    def __init__(self, host, user, password, db, port, charset,
+                 size=4, recycle=3600, ping_interval=30, timeout=30, stats=None):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.db_name = db
+        self.port = port
+        self.charset = charset
+
+        self.size = max(int(size), 1)
+        # recycle초 이상 된 커넥션은 새로 연결, ping_interval초 이상 놀던 커넥션은 ping 후 사용
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.timeout = timeout
+        self.stats = stats
+
+        # (conn, created_at, last_used) 튜플. 최근 쓴 커넥션부터 재사용
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._closed = False
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pool = _pools.get(crawler)
+        if pool is not None:
+            return pool
+
+        pool = cls.from_settings(crawler.settings, stats=crawler.stats)
+        # 파이프라인 close_spider가 모두 끝난 뒤 정리
+        crawler.signals.connect(pool.close, signal=signals.spider_closed)
+        _pools[crawler] = pool
+        return pool
+
+    @classmethod
+    def from_settings(cls, settings, stats=None):
+        """크롤러 밖(롤업 작업 등)에서 같은 설정으로 풀을 만들 때"""
+        return cls(
+            host=settings.get('MYSQL_HOST'),
+            user=settings.get('MYSQL_USER'),
+            password=settings.get('MYSQL_PASSWORD'),
+            db=settings.get('MYSQL_DB'),
+            port=settings.getint('MYSQL_PORT'),
+            charset=settings.get('MYSQL_CHARSET'),
+            size=settings.getint('MYSQL_POOL_SIZE', 4),
+            recycle=settings.getint('MYSQL_POOL_RECYCLE', 3600),
+            ping_interval=settings.getint('MYSQL_POOL_PING_INTERVAL', 30),
+            timeout=settings.getfloat('MYSQL_POOL_TIMEOUT', 30),
+            stats=stats,
+        )
+
+    def _connect(self):
+        conn = pymysql.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            db=self.db_name,
+            port=self.port,
+            charset=self.charset,
+            cursorclass=pymysql.cursors.DictCursor,
+            autocommit=True,   # 배치 기록은 transaction()으로 명시적 트랜잭션 사용
+        )
+        if self.stats:
+            with self._lock:
+                self.stats.inc_value('mysql/pool/connections_created')
+        now = time.monotonic()
+        return conn, now, now
+
+    def acquire(self):
+        """커넥션 하나를 빌려옴. 풀이 가득 차 있으면 반납될 때까지 대기."""
+        started = time.perf_counter()
+        entry = None
+
+        try:
+            entry = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    entry = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    entry = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(
+                        f"MySQL 커넥션 풀 대기 시간 초과 ({self.timeout}s, size={self.size})"
+                    )
+
+        entry = self._check(entry)
+
+        wait_ms = (time.perf_counter() - started) * 1000
+        # 라이터 스레드들이 동시에 부르므로 스탯 갱신도 락 안에서
+        with self._lock:
+            self._in_use += 1
+            if self.stats:
+                self.stats.inc_value('mysql/pool/checkouts')
+                self.stats.inc_value('mysql/pool/wait_time_ms', wait_ms)
+                self.stats.max_value('mysql/pool/wait_time_max_ms', round(wait_ms, 2))
+                self.stats.max_value('mysql/pool/connections_max_in_use', self._in_use)
+        return entry
+
+    def _check(self, entry):
+        """헬스 체크: 오래된 커넥션은 교체, 오래 놀던 커넥션은 ping."""
+        conn, created_at, last_used = entry
+        now = time.monotonic()
+
+        try:
+            if self.recycle and now - created_at > self.recycle:
+                self._close_quietly(conn)
+                return self._connect()
+
+            if self.ping_interval is not None and now - last_used > self.ping_interval:
+                if self.stats:
+                    with self._lock:
+                        self.stats.inc_value('mysql/pool/pings')
+                try:
+                    conn.ping(reconnect=True)
+                except Exception:
+                    self._close_quietly(conn)
+                    return self._connect()
+        except Exception:
+            # 재연결 실패: 자리 반납
+            with self._lock:
+                self._created -= 1
+            raise
+        return entry
+
+    def release(self, entry, broken=False):
+        conn, created_at, _ = entry
+        with self._lock:
+            self._in_use -= 1
+
+        if broken or self._closed:
+            self._close_quietly(conn)
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put((conn, created_at, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        entry = self.acquire()
+        broken = False
+        try:
+            yield entry[0]
+        except pymysql.err.OperationalError:
+            # 연결 자체가 끊긴 경우 풀에 돌려놓지 않음
+            broken = True
+            raise
+        finally:
+            self.release(entry, broken=broken)
+
+    @contextmanager
+    def cursor(self):
+        """autocommit 커서 (단건 조회/기록용)"""
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                yield cursor
+
+    @contextmanager
+    def transaction(self):
+        """begin ~ commit 을 묶은 커서. 예외가 나면 rollback."""
+        with self.connection() as conn:
+            conn.begin()
+            try:
+                with conn.cursor() as cursor:
+                    yield cursor
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def close(self, spider=None):
+        self._closed = True
+        while True:
+            try:
+                conn, _, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close_quietly(conn)
+            with self._lock:
+                self._created -= 1
+        if spider is not None:
+            spider.logger.info("MySQLConnectionPool: DB 연결 종료")
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+
+class MySQLWriter:
+    """SQL을 리액터 스레드 밖의 제한된 스레드 풀에서 실행.
+
+    run()은 Deferred를 돌려주고, 대기/실행 중인 작업이 max_pending 이상이면
+    wait_for_capacity()가 자리가 날 때까지 기다리게 해서 크롤러에 backpressure를 건다.
+    """
+
+    def __init__(self, threads=4, max_pending=16, stats=None):
+        self.threadpool = ThreadPool(minthreads=1, maxthreads=max(int(threads), 1), name='mysql-writer')
+        self.max_pending = max(int(max_pending), 1)
+        self.stats = stats
+        self.pending = 0
+        self._waiters = []
+        self._shutdown_trigger = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        writer = _writers.get(crawler)
+        if writer is not None:
+            return writer
+
+        settings = crawler.settings
+        writer = cls(
+            threads=settings.getint('MYSQL_WRITER_THREADS', settings.getint('MYSQL_POOL_SIZE', 4)),
+            max_pending=settings.getint('MYSQL_WRITER_QUEUE_SIZE', 16),
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(writer.close, signal=signals.spider_closed)
+        _writers[crawler] = writer
+        return writer
+
+    @property
+    def saturated(self):
+        return self.pending >= self.max_pending
+
+    def run(self, func, *args, **kwargs):
+        """func(*args, **kwargs)를 라이터 스레드에서 실행. 결과는 리액터 스레드에서 받음."""
+        if not self.threadpool.started:
+            self.threadpool.start()
+            self._shutdown_trigger = reactor.addSystemEventTrigger(
+                'during', 'shutdown', self.threadpool.stop
+            )
+
+        self.pending += 1
+        if self.stats:
+            self.stats.max_value('mysql/writer/queue_depth_max', self.pending)
+
+        d = threads.deferToThreadPool(reactor, self.threadpool, func, *args, **kwargs)
+        d.addBoth(self._on_done)
+        return d
+
+    def _on_done(self, result):
+        self.pending -= 1
+        while self._waiters and not self.saturated:
+            self._waiters.pop(0).callback(None)
+        return result
+
+    def wait_for_capacity(self):
+        """큐에 자리가 있으면 바로, 아니면 자리가 날 때 발생하는 Deferred."""
+        if not self.saturated:
+            return defer.succeed(None)
+        if self.stats:
+            self.stats.inc_value('mysql/writer/backpressure_waits')
+        d = defer.Deferred()
+        self._waiters.append(d)
+        return d
+
+    def close(self, spider=None):
+        if self.threadpool.started:
+            self.threadpool.stop()
+        if self._shutdown_trigger is not None:
+            reactor.removeSystemEventTrigger(self._shutdown_trigger)
+            self._shutdown_trigger = None
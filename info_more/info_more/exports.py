@@ -0,0 +1,210 @@
+# info_more/exports.py
+# 실행마다 상품 스냅샷을 컬럼형 파일(Parquet / Arrow IPC)로 내보내기
+# 분석용 조회가 MySQL(product_snapshot)을 훑지 않도록 snapshot_date / 카테고리로 나눠 저장
+# pyarrow는 선택 의존성: 내보내기를 켤 때만 필요 (pip install pyarrow)
+
+import os
+
+# 형식 → 확장자
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+# 파티션 기준 카테고리 단계 → ProductItem 필드
+CATEGORY_LEVELS = {'major': 'major_id', 'medium': 'medium_id', 'sub': 'sub_id'}
+
+# (컬럼명, pyarrow 타입 이름)
+COLUMNS = (
+    ('naver_product_id', 'string'),
+    ('snapshot_time', 'timestamp'),
+    ('major_id', 'string'),
+    ('medium_id', 'string'),
+    ('sub_id', 'string'),
+    ('name', 'string'),
+    ('mall_name', 'string'),
+    ('original_price', 'int64'),
+    ('discount_rate', 'int32'),
+    ('price', 'int64'),
+    ('delivery_fee', 'int64'),
+    ('rating', 'float64'),
+    ('review_count', 'int64'),
+    ('ranking', 'int32'),
+)
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("스냅샷 내보내기에는 pyarrow가 필요합니다: pip install pyarrow") from e
+    return pyarrow
+
+
+def snapshot_schema():
+    pa = _require_pyarrow()
+    types = {
+        'string': pa.string(),
+        'timestamp': pa.timestamp('s'),
+        'int32': pa.int32(),
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+class PartitionFile:
+    """파티션 하나(snapshot_date, 카테고리)의 이번 실행 파일
+
+    행은 row group 크기만큼만 모아 두었다가 기록한다.
+    기록 중에는 .tmp 이름으로 쓰고 close()에서 이름을 바꾸므로 읽는 쪽은 완성된 파일만 본다.
+    """
+
+    def __init__(self, path, schema, fmt, compression):
+        self.path = path
+        self.schema = schema
+        self.fmt = fmt
+        self.compression = compression
+        self.rows = []
+        self.writer = None
+        self.sink = None
+
+    def _claim_path(self):
+        # 같은 snapshot_time으로 이어서 실행(체크포인트)하면 앞 실행이 남긴 파일은 두고 -2, -3 ...으로
+        # (이어서 실행할 때는 끝난 목록을 건너뛰므로 덮어쓰면 앞 실행의 행이 사라짐)
+        base, ext = os.path.splitext(self.path)
+        attempt = 1
+        while os.path.exists(self.path):
+            attempt += 1
+            self.path = f'{base}-{attempt}{ext}'
+
+    def _open(self):
+        pa = _require_pyarrow()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._claim_path()
+        tmp_path = f'{self.path}.tmp'
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(tmp_path, self.schema, compression=self.compression)
+        else:
+            self.sink = pa.OSFile(tmp_path, 'wb')
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            self.writer = pa.ipc.new_file(self.sink, self.schema, options=options)
+
+    def flush(self):
+        """모아 둔 행을 row group 하나로 기록. 기록한 행 수를 돌려줌"""
+        if not self.rows:
+            return 0
+        pa = _require_pyarrow()
+        if self.writer is None:
+            self._open()
+        columns = list(zip(*self.rows))
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema,
+        )
+        # write_batch 한 번 = row group(Parquet) / record batch(Arrow IPC) 하나
+        self.writer.write_batch(batch)
+        count = len(self.rows)
+        self.rows = []
+        return count
+
+    def close(self):
+        """남은 행 기록 후 파일 완성. 파일 크기(바이트)를 돌려줌"""
+        self.flush()
+        if self.writer is None:
+            return 0
+        self.writer.close()
+        if self.sink is not None:
+            self.sink.close()
+        os.replace(f'{self.path}.tmp', self.path)
+        return os.path.getsize(self.path)
+
+
+class SnapshotExporter:
+    """한 실행(snapshot_time 하나)의 스냅샷 행을 파티션별 파일로 나눠 기록
+
+    경로: {root}/snapshot_date=YYYY-MM-DD/category_id={네이버 카테고리 ID}/part-YYYYmmddTHHMM[-N]{ext}
+    (hive 방식 파티션이라 pyarrow.dataset 등에서 경로만으로 걸러 읽을 수 있음)
+    같은 snapshot_time으로 다시 실행(체크포인트에서 이어서)하면 앞 실행의 파일 옆에 part-...-2 등으로 추가한다.
+
+    메모리에는 파티션마다 최대 row_group_size 행, 전체로는 최대 max_buffered_rows 행만 둔다.
+    """
+
+    def __init__(self, root, fmt='parquet', compression='zstd', category_level='major',
+                 row_group_size=50000, max_buffered_rows=200000):
+        if fmt not in FORMATS:
+            raise ValueError(f"지원하지 않는 SNAPSHOT_EXPORT_FORMAT 입니다: {fmt}")
+        if category_level not in CATEGORY_LEVELS:
+            raise ValueError(f"지원하지 않는 SNAPSHOT_EXPORT_CATEGORY_LEVEL 입니다: {category_level}")
+        self.root = root
+        self.fmt = fmt
+        self.compression = compression
+        self.category_index = [name for name, _ in COLUMNS].index(CATEGORY_LEVELS[category_level])
+        self.row_group_size = max(int(row_group_size), 1)
+        self.max_buffered_rows = max(int(max_buffered_rows), self.row_group_size)
+        self.schema = snapshot_schema()
+        # (snapshot_date, category) → PartitionFile
+        self.partitions = {}
+        self.buffered = 0
+        self.rows = 0
+        self.row_groups = 0
+
+    def _partition(self, snapshot_time, category):
+        key = (snapshot_time.date(), category)
+        partition = self.partitions.get(key)
+        if partition is None:
+            path = os.path.join(
+                self.root,
+                f'snapshot_date={key[0].isoformat()}',
+                f'category_id={category}',
+                f'part-{snapshot_time:%Y%m%dT%H%M}{FORMATS[self.fmt]}',
+            )
+            partition = self.partitions[key] = PartitionFile(
+                path, self.schema, self.fmt, self.compression
+            )
+        return partition
+
+    def add(self, snapshot_time, row):
+        """row: COLUMNS 순서의 튜플"""
+        category = row[self.category_index] or 'unknown'
+        partition = self._partition(snapshot_time, category)
+        partition.rows.append(row)
+        self.buffered += 1
+        if len(partition.rows) >= self.row_group_size:
+            self._flush(partition)
+        elif self.buffered >= self.max_buffered_rows:
+            # 파티션이 많아 작은 버퍼가 잔뜩 쌓였으면 가장 큰 것부터 기록
+            self._flush(max(self.partitions.values(), key=lambda p: len(p.rows)))
+
+    def _flush(self, partition):
+        count = partition.flush()
+        self.buffered -= count
+        self.rows += count
+        self.row_groups += 1
+
+    def close(self):
+        """모든 파티션 파일 완성. (파일 수, 전체 바이트)를 돌려줌"""
+        total_bytes = 0
+        for partition in self.partitions.values():
+            if partition.rows:
+                self._flush(partition)
+            total_bytes += partition.close()
+        files = sum(1 for partition in self.partitions.values() if partition.writer is not None)
+        self.partitions = {}
+        return files, total_bytes
+
+
+def open_dataset(root, fmt='parquet'):
+    """내보낸 스냅샷을 pyarrow.dataset으로 열기 (파티션 컬럼: snapshot_date, category_id)
+
+    Arrow IPC 파일은 메모리 매핑으로 읽으므로 복사 없이 컬럼 단위로 바로 계산할 수 있다.
+    예) open_dataset(root).to_table(filter=ds.field('snapshot_date') == '2026-01-01')
+    """
+    _require_pyarrow()
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    return ds.dataset(
+        root,
+        format='parquet' if fmt == 'parquet' else 'ipc',
+        partitioning='hive',
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
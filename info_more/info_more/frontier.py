@@ -0,0 +1,483 @@
+# info_more/frontier.py
+# 분산 프런티어: 여러 노드가 한 스냅샷 실행의 상품 목록 요청을 공유 큐에서 나눠 처리
+#
+#   FRONTIER_URL = 'sqlite:///frontier.sqlite3'   # 로컬/같은 파일 시스템의 노드 (상대 경로는 .scrapy/ 아래)
+#   FRONTIER_URL = 'redis://redis-host:6379/0'     # 운영 (pip install redis)
+#
+# - 각 노드는 카테고리 트리를 직접 읽고, 상품 목록 요청(FRONTIER_CALLBACKS)만 공유 큐에 넣는다.
+#   같은 요청(fingerprint)은 실행마다 한 번만 들어가므로 노드가 몇 개든 목록 페이지는 한 번씩만 받는다.
+# - 큐에서 꺼낸 요청은 FRONTIER_LEASE_SECONDS 동안 그 노드가 임대한다. 콜백이 끝나면 완료로 표시하고,
+#   노드가 죽어 임대가 만료되면 다른 노드가 다시 가져간다 (FRONTIER_MAX_ATTEMPTS번까지).
+#   완료 표시는 지금 임대한 노드만 할 수 있다 (임대가 만료된 노드는 다시 임대한 노드의 요청을 끝내지 못함).
+# - 실행 id(FRONTIER_RUN_ID)는 모든 노드에 같은 값을 줘야 한다. 실행마다 처음 들어온 노드의
+#   snapshot_time을 기록해 모든 노드가 같은 snapshot_time으로 저장한다.
+# - 공유 큐에는 요청을 JSON(request.to_dict)으로 저장한다.
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import weakref
+from datetime import datetime
+from urllib.parse import urlparse
+
+from scrapy.core.scheduler import Scheduler
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
+from scrapy.utils.request import request_from_dict
+
+from info_more.items import CATEGORY_FIELDS, CategoryContext
+
+logger = logging.getLogger(__name__)
+
+# crawler → Frontier (스케줄러와 스파이더 미들웨어가 같은 객체를 씀)
+_frontiers = weakref.WeakKeyDictionary()
+
+
+def _json_default(value):
+    # cb_kwargs의 카테고리 객체는 필드 값으로 저장 (꺼낼 때 intern으로 같은 객체를 씀)
+    if isinstance(value, CategoryContext):
+        return {'__category__': [getattr(value, name) for name in CATEGORY_FIELDS]}
+    raise TypeError(f"프런티어 요청에 JSON으로 저장할 수 없는 값입니다: {type(value).__name__}")
+
+
+def _json_object(obj):
+    if len(obj) == 1 and '__category__' in obj:
+        return CategoryContext.intern(*obj['__category__'])
+    return obj
+
+
+def dump_request(request, spider):
+    """요청 → 공유 큐에 넣을 JSON(bytes). 헤더/본문 bytes는 latin-1 문자열로 (손실 없음)"""
+    data = request.to_dict(spider=spider)
+    data['headers'] = {
+        name.decode('latin-1'): [value.decode('latin-1') for value in values]
+        for name, values in data['headers'].items()
+    }
+    data['body'] = data['body'].decode('latin-1')
+    return json.dumps(data, default=_json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def load_request(payload, spider):
+    data = json.loads(payload, object_hook=_json_object)
+    data['body'] = data['body'].encode('latin-1')
+    return request_from_dict(data, spider=spider)
+
+
+class SQLiteFrontierBackend:
+    """SQLite 파일 하나를 큐로 사용 (테스트 / 한 서버 / 공유 디렉터리의 노드)
+
+    요청 상태: queued → leased → done / failed. 임대 만료는 claim 때 한 트랜잭션 안에서 정리한다.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS frontier_run (
+            run_id        TEXT PRIMARY KEY,
+            snapshot_time TEXT NOT NULL,
+            finished_at   REAL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS frontier_request (
+            seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id      TEXT NOT NULL,
+            key         TEXT NOT NULL,
+            payload     BLOB,
+            state       TEXT NOT NULL DEFAULT 'queued',
+            worker      TEXT,
+            lease_until REAL,
+            attempts    INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (run_id, key)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_frontier_state ON frontier_request (run_id, state, seq)",
+    )
+
+    def __init__(self, path):
+        self.path = path
+        # isolation_level=None: 자동 커밋, claim만 BEGIN IMMEDIATE로 묶음
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        for ddl in self.SCHEMA:
+            self.conn.execute(ddl)
+
+    def open_run(self, run_id, snapshot_time):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO frontier_run (run_id, snapshot_time) VALUES (?, ?)",
+            (run_id, snapshot_time),
+        )
+        row = self.conn.execute(
+            "SELECT snapshot_time FROM frontier_run WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        return row[0]
+
+    def push(self, run_id, key, payload):
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO frontier_request (run_id, key, payload) VALUES (?, ?, ?)",
+            (run_id, key, payload),
+        )
+        return cursor.rowcount == 1
+
+    def claim(self, run_id, worker, lease_seconds, max_attempts):
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 만료된 임대: 시도 횟수가 남았으면 다시 큐로, 아니면 실패 처리
+            self.conn.execute(
+                "UPDATE frontier_request SET state = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END, "
+                "worker = NULL, lease_until = NULL "
+                "WHERE run_id = ? AND state = 'leased' AND lease_until < ?",
+                (max_attempts, run_id, now),
+            )
+            row = self.conn.execute(
+                "SELECT seq, key, payload FROM frontier_request "
+                "WHERE run_id = ? AND state = 'queued' ORDER BY seq LIMIT 1",
+                (run_id,),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE frontier_request SET state = 'leased', worker = ?, lease_until = ?, "
+                    "attempts = attempts + 1 WHERE seq = ?",
+                    (worker, now + lease_seconds, row[0]),
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return None if row is None else (row[1], row[2])
+
+    def complete(self, run_id, key, worker, ok=True):
+        """worker가 지금 임대 중인 요청만 완료로 표시. 표시했으면 True"""
+        cursor = self.conn.execute(
+            "UPDATE frontier_request SET state = ?, payload = NULL, lease_until = NULL "
+            "WHERE run_id = ? AND key = ? AND state = 'leased' AND worker = ?",
+            ('done' if ok else 'failed', run_id, key, worker),
+        )
+        return cursor.rowcount == 1
+
+    def pending(self, run_id):
+        """대기 중 + 임대 중인 요청 수 (0이면 실행 완료)"""
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM frontier_request WHERE run_id = ? AND state IN ('queued', 'leased')",
+            (run_id,),
+        ).fetchone()
+        return row[0]
+
+    def finish_run(self, run_id):
+        self.conn.execute(
+            "UPDATE frontier_run SET finished_at = ? WHERE run_id = ? AND finished_at IS NULL",
+            (time.time(), run_id),
+        )
+
+    def close(self):
+        self.conn.close()
+
+
+class RedisFrontierBackend:
+    """Redis 큐 (운영). redis-py는 선택 의존성
+
+    키 ({prefix}:{run_id}:...): meta(hash) / seen(set) / queue(list) / payload(hash)
+    / leases(zset, 점수=만료 시각) / owners(hash, 임대한 노드) / attempts(hash) / failed(set)
+    넣기/꺼내기는 Lua 스크립트로 원자적으로 처리한다. 만료 시각은 노드 시계 기준이므로 노드 시계를 맞춰 둘 것.
+    """
+
+    PUSH_SCRIPT = """
+        if redis.call('SADD', KEYS[1], ARGV[1]) == 0 then
+            return 0
+        end
+        redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+        redis.call('LPUSH', KEYS[3], ARGV[1])
+        return 1
+        """
+
+    CLAIM_SCRIPT = """
+        local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+        for _, key in ipairs(expired) do
+            redis.call('ZREM', KEYS[2], key)
+            redis.call('HDEL', KEYS[6], key)
+            if tonumber(redis.call('HGET', KEYS[4], key) or '0') < tonumber(ARGV[3]) then
+                redis.call('RPUSH', KEYS[1], key)
+            else
+                redis.call('SADD', KEYS[5], key)
+                redis.call('HDEL', KEYS[3], key)
+            end
+        end
+        local key = redis.call('RPOP', KEYS[1])
+        if not key then
+            return nil
+        end
+        redis.call('ZADD', KEYS[2], ARGV[2], key)
+        redis.call('HSET', KEYS[6], key, ARGV[4])
+        redis.call('HINCRBY', KEYS[4], key, 1)
+        return {key, redis.call('HGET', KEYS[3], key)}
+        """
+
+    COMPLETE_SCRIPT = """
+        if redis.call('HGET', KEYS[3], ARGV[1]) ~= ARGV[2] then
+            return 0
+        end
+        redis.call('ZREM', KEYS[1], ARGV[1])
+        redis.call('HDEL', KEYS[3], ARGV[1])
+        redis.call('HDEL', KEYS[2], ARGV[1])
+        if ARGV[3] == '0' then
+            redis.call('SADD', KEYS[4], ARGV[1])
+        end
+        return 1
+        """
+
+    def __init__(self, url, prefix='info_more:frontier', run_ttl=7 * 86400):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("Redis 프런티어에는 redis 패키지가 필요합니다: pip install redis") from e
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.run_ttl = run_ttl
+        self._push = self.client.register_script(self.PUSH_SCRIPT)
+        self._claim = self.client.register_script(self.CLAIM_SCRIPT)
+        self._complete = self.client.register_script(self.COMPLETE_SCRIPT)
+
+    def _key(self, run_id, name):
+        return f'{self.prefix}:{run_id}:{name}'
+
+    def open_run(self, run_id, snapshot_time):
+        meta = self._key(run_id, 'meta')
+        self.client.hsetnx(meta, 'snapshot_time', snapshot_time)
+        return self.client.hget(meta, 'snapshot_time').decode()
+
+    def push(self, run_id, key, payload):
+        keys = [self._key(run_id, name) for name in ('seen', 'payload', 'queue')]
+        return self._push(keys=keys, args=[key, payload]) == 1
+
+    def claim(self, run_id, worker, lease_seconds, max_attempts):
+        now = time.time()
+        keys = [self._key(run_id, name) for name in ('queue', 'leases', 'payload', 'attempts', 'failed', 'owners')]
+        claimed = self._claim(keys=keys, args=[now, now + lease_seconds, max_attempts, worker])
+        if not claimed:
+            return None
+        return claimed[0].decode(), claimed[1]
+
+    def complete(self, run_id, key, worker, ok=True):
+        keys = [self._key(run_id, name) for name in ('leases', 'payload', 'owners', 'failed')]
+        return self._complete(keys=keys, args=[key, worker, int(ok)]) == 1
+
+    def pending(self, run_id):
+        pipe = self.client.pipeline()
+        pipe.llen(self._key(run_id, 'queue'))
+        pipe.zcard(self._key(run_id, 'leases'))
+        return sum(pipe.execute())
+
+    def finish_run(self, run_id):
+        meta = self._key(run_id, 'meta')
+        if self.client.hsetnx(meta, 'finished_at', time.time()):
+            # 끝난 실행의 키는 run_ttl 뒤 정리 (seen이 남아 있는 동안은 늦게 들어온 노드도 다시 크롤링하지 않음)
+            for name in ('meta', 'seen', 'queue', 'payload', 'leases', 'owners', 'attempts', 'failed'):
+                self.client.expire(self._key(run_id, name), self.run_ttl)
+
+    def close(self):
+        self.client.close()
+
+
+def backend_from_url(url):
+    parsed = urlparse(url)
+    if parsed.scheme == 'sqlite':
+        # sqlite:///relative.db → .scrapy/relative.db, sqlite:////abs/path.db → /abs/path.db
+        path = url[len('sqlite:///'):]
+        if not os.path.isabs(path):
+            path = data_path(path, createdir=True)
+        return SQLiteFrontierBackend(path)
+    if parsed.scheme in ('redis', 'rediss', 'unix'):
+        return RedisFrontierBackend(url)
+    raise ValueError(f"지원하지 않는 FRONTIER_URL 입니다: {url}")
+
+
+class Frontier:
+    """한 크롤러가 참여한 실행(run_id)의 공유 큐"""
+
+    def __init__(self, backend, run_id, callbacks=('parse_page',), lease_seconds=300,
+                 max_attempts=3, stats=None):
+        self.backend = backend
+        self.callbacks = frozenset(callbacks)
+        self.run_id = run_id
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.stats = stats
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.spider = None
+        self.fingerprinter = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """FRONTIER_URL이 없으면 None"""
+        settings = crawler.settings
+        if not settings.get('FRONTIER_URL'):
+            return None
+        frontier = _frontiers.get(crawler)
+        if frontier is None:
+            run_id = settings.get('FRONTIER_RUN_ID')
+            if not run_id:
+                # 노드마다 자기 시계로 정하면 정시 전후에 뜬 노드들이 서로 다른 실행에 들어가 전체를 두 번 크롤링함
+                raise ValueError("FRONTIER_URL을 쓰려면 모든 노드에 같은 FRONTIER_RUN_ID를 주어야 합니다")
+            frontier = _frontiers[crawler] = cls(
+                backend_from_url(settings.get('FRONTIER_URL')),
+                run_id=run_id,
+                callbacks=settings.getlist('FRONTIER_CALLBACKS', ['parse_page']),
+                lease_seconds=settings.getfloat('FRONTIER_LEASE_SECONDS', 300),
+                max_attempts=settings.getint('FRONTIER_MAX_ATTEMPTS', 3),
+                stats=crawler.stats,
+            )
+            frontier.fingerprinter = crawler.request_fingerprinter
+        return frontier
+
+    def _inc(self, key, count=1):
+        if self.stats:
+            self.stats.inc_value(f'frontier/{key}', count)
+
+    def open(self, spider):
+        """실행에 참여. 실행의 snapshot_time(처음 들어온 노드의 값)을 스파이더에 맞춤"""
+        self.spider = spider
+        snapshot_time = getattr(spider, 'snapshot_time', None)
+        proposed = (snapshot_time or datetime.now()).isoformat()
+        shared = self.backend.open_run(self.run_id, proposed)
+        if snapshot_time is not None:
+            spider.snapshot_time = datetime.fromisoformat(shared)
+        logger.info(f"Frontier: 실행 {self.run_id} 참여 (worker {self.worker}, snapshot_time {shared})")
+
+    def accepts(self, request):
+        """공유 큐로 보낼 요청: 지정한 콜백의 요청 중 아직 큐에서 꺼낸 적 없는 것 (재시도/리다이렉트는 로컬)"""
+        callback = getattr(request.callback, '__name__', None)
+        return callback in self.callbacks and 'frontier_key' not in request.meta
+
+    def push(self, request):
+        key = self.fingerprinter.fingerprint(request).hex()
+        payload = dump_request(request, self.spider)
+        if self.backend.push(self.run_id, key, payload):
+            self._inc('pushed')
+            return True
+        self._inc('duplicates')
+        return False
+
+    def claim(self):
+        claimed = self.backend.claim(self.run_id, self.worker, self.lease_seconds, self.max_attempts)
+        if claimed is None:
+            return None
+        key, payload = claimed
+        request = load_request(payload, self.spider)
+        request.meta['frontier_key'] = key
+        if request.errback is None:
+            request.errback = self._download_failed
+        self._inc('claimed')
+        return request
+
+    def complete(self, key, ok=True):
+        """이 노드의 임대가 그대로면 완료(실패)로 표시. 임대가 만료돼 다른 노드가 가져갔으면 False"""
+        if not self.backend.complete(self.run_id, key, self.worker, ok):
+            logger.warning(f"Frontier: 임대가 만료된 요청이라 완료로 표시하지 않음 ({key})")
+            self._inc('lease_lost')
+            return False
+        self._inc('completed' if ok else 'failed')
+        return True
+
+    def _download_failed(self, failure):
+        request = failure.request
+        logger.error(f"Frontier: 요청 실패 {request.url}: {failure.getErrorMessage()}")
+        self.complete(request.meta['frontier_key'], ok=False)
+
+    def pending(self):
+        return self.backend.pending(self.run_id)
+
+    def close(self):
+        """남은 요청이 없으면 실행을 완료로 기록"""
+        remaining = self.pending()
+        if remaining == 0:
+            self.backend.finish_run(self.run_id)
+            logger.info(f"Frontier: 실행 {self.run_id} 완료")
+        else:
+            logger.info(f"Frontier: 실행 {self.run_id}에 남은 요청 {remaining}개 (다른 노드가 이어서 처리)")
+        self.backend.close()
+
+
+class FrontierScheduler(Scheduler):
+    """FRONTIER_URL이 있으면 상품 목록 요청을 공유 큐로 보내고, 로컬 큐가 비면 공유 큐에서 가져옴
+
+    FRONTIER_URL이 없으면 Scrapy 기본 스케줄러와 같다.
+    """
+
+    # 공유 큐 남은 개수 확인 간격(초). 엔진이 유휴 여부를 자주 묻기 때문에 매번 조회하지 않음
+    PENDING_CHECK_INTERVAL = 1.0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        scheduler = super().from_crawler(crawler)
+        scheduler.frontier = Frontier.from_crawler(crawler)
+        scheduler._pending = (0.0, 0)
+        return scheduler
+
+    def open(self, spider):
+        result = super().open(spider)
+        if self.frontier is not None:
+            self.frontier.open(spider)
+        return result
+
+    def close(self, reason):
+        if self.frontier is not None:
+            self.frontier.close()
+        return super().close(reason)
+
+    def enqueue_request(self, request):
+        if self.frontier is None or not self.frontier.accepts(request):
+            return super().enqueue_request(request)
+        return self.frontier.push(request)
+
+    def next_request(self):
+        request = super().next_request()
+        if request is None and self.frontier is not None:
+            request = self.frontier.claim()
+        return request
+
+    def has_pending_requests(self):
+        if super().has_pending_requests():
+            return True
+        if self.frontier is None:
+            return False
+        checked_at, pending = self._pending
+        now = time.monotonic()
+        if now - checked_at >= self.PENDING_CHECK_INTERVAL:
+            pending = self.frontier.pending()
+            self._pending = (now, pending)
+        return pending > 0
+
+
+class FrontierMiddleware:
+    """공유 큐에서 꺼낸 요청의 콜백이 끝나면 완료로 표시 (스파이더 미들웨어)"""
+
+    def __init__(self, frontier):
+        self.frontier = frontier
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        frontier = Frontier.from_crawler(crawler)
+        if frontier is None:
+            raise NotConfigured
+        return cls(frontier)
+
+    def _done(self, response, ok=True):
+        key = response.meta.get('frontier_key')
+        if key is not None:
+            self.frontier.complete(key, ok)
+
+    def process_spider_output(self, response, result):
+        yield from result
+        self._done(response)
+
+    async def process_spider_output_async(self, response, result):
+        async for item_or_request in result:
+            yield item_or_request
+        self._done(response)
+
+    def process_spider_exception(self, response, exception):
+        self._done(response, ok=False)
+        return None
@@ -3,7 +3,12 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/items.html
 
+from dataclasses import dataclass, replace
+from operator import attrgetter
+
 import scrapy
+from itemadapter import ItemAdapter
+from itemadapter.adapter import AdapterInterface
 
 class CategoryItem(scrapy.Item):
     level = scrapy.Field()          # major / medium / sub
@@ -17,29 +22,127 @@ class CategoryItem(scrapy.Item):
 
 
 
-class ProductItem(scrapy.Item):
-    major_id = scrapy.Field()
-    major_name = scrapy.Field()
-    medium_id = scrapy.Field()
-    medium_name = scrapy.Field()
-    sub_id = scrapy.Field()
-    sub_name = scrapy.Field()
-    is_leaf = scrapy.Field()    
+@dataclass(frozen=True, slots=True)
+class CategoryContext:
+    """상품 목록 하나의 카테고리 위치 (대/중/소분류 id와 이름)
+
+    같은 목록의 상품들이 문자열 6개를 각자 들고 있지 않도록 intern()으로 만든 객체 하나를 같이 가리킨다.
+    스파이더 요청도 cb_kwargs에 이 객체 하나만 넣는다 (대기 중인 요청마다 dict에 id/이름을 복사하지 않음).
+    """
+
+    major_id: str = None
+    major_name: str = None
+    medium_id: str = None
+    medium_name: str = None
+    sub_id: str = None
+    sub_name: str = None
+
+    @classmethod
+    def intern(cls, major_id, major_name, medium_id=None, medium_name=None, sub_id=None, sub_name=None):
+        """같은 값이면 같은 객체 (카탈로그의 카테고리 수만큼만 생김)"""
+        key = (major_id, major_name, medium_id, medium_name, sub_id, sub_name)
+        context = _contexts.get(key)
+        if context is None:
+            context = _contexts[key] = cls(*key)
+        return context
+
+    def medium(self, medium_id, medium_name):
+        """이 대분류 아래 중분류"""
+        return self.intern(self.major_id, self.major_name, medium_id, medium_name)
+
+    def sub(self, sub_id, sub_name):
+        """이 중분류 아래 소분류"""
+        return self.intern(self.major_id, self.major_name, self.medium_id, self.medium_name, sub_id, sub_name)
+
+    def __reduce__(self):
+        # 프런티어/디스크 큐에서 요청을 되살릴 때도 같은 객체를 쓰도록 intern으로 복원
+        return CategoryContext.intern, tuple(getattr(self, name) for name in CATEGORY_FIELDS)
+
+    @property
+    def category_id(self):
+        """상품 목록의 가장 깊은 카테고리 (소분류가 없으면 중분류)"""
+        return self.sub_id or self.medium_id
+
+
+_contexts = {}
+
+CATEGORY_FIELDS = ('major_id', 'major_name', 'medium_id', 'medium_name', 'sub_id', 'sub_name')
+
+
+@dataclass(slots=True)
+class ProductItem:
+    """상품 카드 하나. dict 기반 scrapy.Item 대신 슬롯 클래스 + 공유 CategoryContext
+
+    파이프라인/피드 익스포트는 ItemAdapter로 예전과 같은 필드(major_id ... review_count, category_id)를 본다.
+    """
+
+    category: CategoryContext
+    naver_product_id: str = None
+    name: str = None
+    price: int = None
+    detail_url: str = None
+    ranking: int = None
+    mall_name: str = None
+    original_price: int = None
+    discount_rate: int = None
+    delivery_fee: int = None
+    rating: float = None
+    review_count: int = None
+
+
+PRODUCT_FIELDS = (
+    'naver_product_id', 'name', 'price', 'detail_url', 'ranking', 'mall_name',
+    'original_price', 'discount_rate', 'delivery_fee', 'rating', 'review_count',
+)
+
+
+class ProductItemAdapter(AdapterInterface):
+    """ProductItem을 예전 ProductItem(scrapy.Item)과 같은 평평한 필드로 보여 주는 어댑터
+
+    카테고리 필드는 item.category에서 읽고, 바꾸면 값을 바꾼 CategoryContext로 교체한다.
+    category_id는 category에서 계산하는 읽기 전용 필드.
+    """
+
+    FIELDS = CATEGORY_FIELDS + PRODUCT_FIELDS + ('category_id',)
+    # 필드 이름 → 값 꺼내는 함수 (파이프라인이 아이템마다 여러 번 읽으므로 분기 없이 한 번에)
+    GETTERS = {
+        **{name: attrgetter(f'category.{name}') for name in CATEGORY_FIELDS + ('category_id',)},
+        **{name: attrgetter(name) for name in PRODUCT_FIELDS},
+    }
+
+    @classmethod
+    def is_item_class(cls, item_class):
+        return isinstance(item_class, type) and issubclass(item_class, ProductItem)
+
+    @classmethod
+    def is_item(cls, item):
+        return isinstance(item, ProductItem)
+
+    @classmethod
+    def get_field_names_from_class(cls, item_class):
+        return list(cls.FIELDS)
+
+    def __getitem__(self, field_name):
+        return self.GETTERS[field_name](self.item)
 
-    name = scrapy.Field()    
-    price = scrapy.Field()    
-    naver_product_id = scrapy.Field()
-    category_id = scrapy.Field()
-    detail_url = scrapy.Field()
-    ranking = scrapy.Field()
-    mall_name = scrapy.Field()
-    original_price = scrapy.Field()
-    discount_rate = scrapy.Field()
-    delivery_fee = scrapy.Field()
-    rating = scrapy.Field()
-    review_count = scrapy.Field()
+    def __setitem__(self, field_name, value):
+        if field_name in PRODUCT_FIELDS:
+            setattr(self.item, field_name, value)
+        elif field_name in CATEGORY_FIELDS:
+            category = replace(self.item.category, **{field_name: value})
+            self.item.category = CategoryContext.intern(*(getattr(category, name) for name in CATEGORY_FIELDS))
+        else:
+            raise KeyError(f"ProductItem does not support field: {field_name}")
 
+    def __delitem__(self, field_name):
+        raise KeyError(f"ProductItem fields cannot be deleted: {field_name}")
 
+    def __iter__(self):
+        return iter(self.FIELDS)
 
+    def __len__(self):
+        return len(self.FIELDS)
 
 
+# 데이터클래스 어댑터보다 먼저 확인하도록 맨 앞에 등록
+ItemAdapter.ADAPTER_CLASSES.appendleft(ProductItemAdapter)
@@ -1,26 +1,71 @@
+import sys
 import time
 import subprocess
 import schedule
+from datetime import datetime
 
 SPIDER_NAME = "naver"
+# 크롤러가 비정상 종료하면 같은 snapshot_time으로 다시 실행 (체크포인트에서 이어서 크롤링)
+RETRIES = 2
+# 실행 중인 롤업 프로세스 (오래 걸려도 크롤링 스케줄을 막지 않도록 기다리지 않고 루프에서 확인)
+rollup_process = None
 
 def run_spider():
     start_time = time.localtime()
     format_start_time = time.strftime('%Y-%m-%d %I:%M:%S', start_time)
     print(f'{format_start_time} 크롤러 실행\n')
-    subprocess.run(["scrapy", "crawl", SPIDER_NAME], check=True)
+    snapshot_time = datetime.now().replace(minute=0, second=0, microsecond=0).isoformat(timespec='minutes')
+    command = ["scrapy", "crawl", SPIDER_NAME, "-a", f"snapshot_time={snapshot_time}"]
+    for attempt in range(1, RETRIES + 2):
+        result = subprocess.run(command)
+        if result.returncode == 0:
+            break
+        if attempt > RETRIES:
+            # 실패해도 스케줄러는 계속 (다음 예약 시각에 다시 실행)
+            print(f"{time.strftime('%Y-%m-%d %I:%M:%S')} 크롤러 비정상 종료 (코드 {result.returncode}), 재시도 횟수 초과\n\n\n")
+            return
+        print(f'크롤러 비정상 종료 (코드 {result.returncode}), 이어서 다시 실행 ({attempt}/{RETRIES})\n')
     end_time = time.localtime()
     format_end_time = time.strftime('%Y-%m-%d %I:%M:%S', end_time)
     print(f'{format_end_time} 크롤러 실행 완료\n\n\n')
 
+def run_rollup():
+    # 지난 날짜의 스냅샷을 일/주 단위로 집계하고 보존 기간이 지난 원본 삭제
+    global rollup_process
+    if rollup_process is not None and rollup_process.poll() is None:
+        print(f"{time.strftime('%Y-%m-%d %I:%M:%S')} 이전 스냅샷 롤업이 아직 실행 중이라 건너뜀\n")
+        return
+    print(f"{time.strftime('%Y-%m-%d %I:%M:%S')} 스냅샷 롤업 실행\n")
+    try:
+        rollup_process = subprocess.Popen([sys.executable, "-m", "info_more.rollup"])
+    except OSError as e:
+        rollup_process = None
+        print(f'스냅샷 롤업을 시작하지 못함: {e}\n')
+
+def check_rollup():
+    # 끝난 롤업의 결과만 기록 (실패해도 스케줄러는 계속, 롤업은 다음 실행에서 이어서 처리)
+    global rollup_process
+    if rollup_process is None:
+        return
+    returncode = rollup_process.poll()
+    if returncode is None:
+        return
+    rollup_process = None
+    if returncode != 0:
+        print(f"{time.strftime('%Y-%m-%d %I:%M:%S')} 스냅샷 롤업 비정상 종료 (코드 {returncode})\n")
+        return
+    print(f"{time.strftime('%Y-%m-%d %I:%M:%S')} 스냅샷 롤업 완료\n")
+
 if __name__ == "__main__":
     # 스케줄 등록
     schedule.every().day.at("00:00").do(run_spider)
     schedule.every().day.at("06:00").do(run_spider)
     schedule.every().day.at("12:00").do(run_spider)
     schedule.every().day.at("18:00").do(run_spider)
+    schedule.every().day.at("03:00").do(run_rollup)
 
     # 무한 반복
     while True:
         schedule.run_pending()
+        check_rollup()
         time.sleep(1)
\ No newline at end of file
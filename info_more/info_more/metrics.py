@@ -0,0 +1,385 @@
+# info_more/metrics.py
+# 단계별 지연/처리량 계측: 이번 실행에서 시간이 어디에 쓰이는지(네이버 / 파싱 / MySQL) 보기 위함
+#
+#   download_latency_seconds{callback}   요청 → 응답 도착 (request.meta['download_latency'])
+#   parse_cpu_seconds{callback}          응답 하나의 콜백 실행 CPU 시간 (리액터 스레드)
+#   items_per_page{callback}             응답 하나에서 나온 아이템 수
+#   pipeline_seconds{pipeline}           process_item 동기 처리 시간 (리액터 스레드)
+#   sql_seconds{pipeline}                라이터 스레드에서 SQL 실행 시간 (큐 대기 제외)
+#   cache_lookups_total{cache, result}   파이프라인 id 캐시 hit / miss
+#
+# METRICS_INTERVAL초마다 요약을 스탯(metrics/...)과 로그에 남기고,
+# METRICS_FILE이 있으면 Prometheus 텍스트 형식으로 기록 (node_exporter textfile collector 등),
+# METRICS_PORT가 있으면 http://METRICS_HOST:METRICS_PORT/metrics 로 같은 내용을 제공한다.
+
+import functools
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import defaultdict
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import defer, task
+
+logger = logging.getLogger(__name__)
+
+# crawler 하나당 하나 (스파이더 미들웨어 / 파이프라인 / 익스포터가 같이 사용)
+_metrics = weakref.WeakKeyDictionary()
+
+# 초 단위 히스토그램 버킷 (Prometheus 기본값에 1ms 미만 두 개 추가)
+SECONDS_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 20, 40, 60, 80, 100, 200)
+
+HELP = {
+    'download_latency_seconds': ('요청부터 응답 도착까지 (콜백별)', SECONDS_BUCKETS),
+    'parse_cpu_seconds': ('응답 하나의 콜백 실행 CPU 시간 (콜백별)', SECONDS_BUCKETS),
+    'items_per_page': ('응답 하나에서 나온 아이템 수 (콜백별)', COUNT_BUCKETS),
+    'pipeline_seconds': ('process_item 처리 시간 (파이프라인별)', SECONDS_BUCKETS),
+    'sql_seconds': ('라이터 스레드 SQL 실행 시간 (파이프라인별)', SECONDS_BUCKETS),
+    'cache_lookups_total': ('파이프라인 id 캐시 조회 (hit / miss)', None),
+}
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # 버킷별 (누적이 아닌) 개수 + 마지막은 +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """버킷 안에서 선형 보간한 분위수 (Prometheus histogram_quantile과 같은 방식)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        # +Inf 버킷: 가장 큰 유한 경계로
+        return self.buckets[-1]
+
+
+class StageMetrics:
+    """단계별 히스토그램과 카운터. 라이터 스레드에서도 기록하므로 락으로 보호"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = defaultdict(float)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """crawler 공용 인스턴스. METRICS_ENABLED가 꺼져 있으면 None (기록하는 쪽에서 건너뜀)"""
+        if not crawler.settings.getbool('METRICS_ENABLED', False):
+            return None
+        metrics = _metrics.get(crawler)
+        if metrics is None:
+            metrics = _metrics[crawler] = cls()
+        return metrics
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(HELP[name][1])
+            histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] += value
+
+    def totals(self):
+        """{(name, labels): (count, sum)} — 구간별 차이 계산용"""
+        with self._lock:
+            totals = {key: (h.count, h.sum) for key, h in self.histograms.items()}
+            totals.update({key: (value, value) for key, value in self.counters.items()})
+        return totals
+
+    def snapshot(self):
+        """([((name, labels), Histogram)], [((name, labels), 값)]) 복사본"""
+        with self._lock:
+            return sorted(self.histograms.items()), sorted(self.counters.items())
+
+    def render(self):
+        """Prometheus 텍스트 형식 (exposition format 0.0.4)"""
+        histograms, counters = self.snapshot()
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f'# HELP info_more_{name} {HELP[name][0]}')
+                lines.append(f'# TYPE info_more_{name} {kind}')
+
+        for (name, labels), histogram in histograms:
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                lines.append(f'info_more_{name}_bucket{_labels(labels, le=le)} {cumulative}')
+            lines.append(f'info_more_{name}_sum{_labels(labels)} {histogram.sum!r}')
+            lines.append(f'info_more_{name}_count{_labels(labels)} {histogram.count}')
+        for (name, labels), value in counters:
+            describe(name, 'counter')
+            lines.append(f'info_more_{name}{_labels(labels)} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels, **extra):
+    # 라벨 값은 콜백/파이프라인 클래스 이름 등 식별자뿐이라 이스케이프하지 않음
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+
+def timed_process_item(method):
+    """파이프라인 process_item의 동기 처리 시간을 pipeline_seconds{pipeline}로 기록
+
+    Deferred를 돌려주는 경우(캐시 미스 조회 / backpressure)는 리액터 스레드에서 쓴 시간만 잰다.
+    대기 시간은 sql_seconds와 mysql/writer/* 스탯에서 본다.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, item, spider):
+        metrics = self.metrics
+        if metrics is None:
+            return method(self, item, spider)
+        started = time.perf_counter()
+        try:
+            return method(self, item, spider)
+        finally:
+            metrics.observe('pipeline_seconds', time.perf_counter() - started, pipeline=type(self).__name__)
+
+    return wrapper
+
+
+class ParseTimingMiddleware:
+    """콜백 실행 CPU 시간 / 응답당 아이템 수 (스파이더에 가장 가까운 쪽에 둠)
+
+    콜백은 제너레이터라 결과를 꺼낼 때 실행되므로, 결과를 하나 꺼내는 데 든 스레드 CPU 시간을 더한다.
+    (뒤쪽 미들웨어/엔진이 결과를 처리하는 시간은 포함하지 않음)
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        metrics = StageMetrics.from_crawler(crawler)
+        if metrics is None:
+            raise NotConfigured
+        return cls(metrics)
+
+    @staticmethod
+    def _callback(response):
+        request = response.request
+        return getattr(request.callback, '__name__', None) or 'parse'
+
+    def _record(self, response, cpu, items):
+        callback = self._callback(response)
+        self.metrics.observe('parse_cpu_seconds', cpu, callback=callback)
+        self.metrics.observe('items_per_page', items, callback=callback)
+
+    def process_spider_output(self, response, result):
+        cpu = 0.0
+        items = 0
+        iterator = iter(result)
+        while True:
+            started = time.thread_time()
+            try:
+                item_or_request = next(iterator)
+            except StopIteration:
+                cpu += time.thread_time() - started
+                break
+            cpu += time.thread_time() - started
+            if not isinstance(item_or_request, Request):
+                items += 1
+            yield item_or_request
+        self._record(response, cpu, items)
+
+    async def process_spider_output_async(self, response, result):
+        cpu = 0.0
+        items = 0
+        iterator = result.__aiter__()
+        while True:
+            started = time.thread_time()
+            try:
+                item_or_request = await iterator.__anext__()
+            except StopAsyncIteration:
+                cpu += time.thread_time() - started
+                break
+            cpu += time.thread_time() - started
+            if not isinstance(item_or_request, Request):
+                items += 1
+            yield item_or_request
+        self._record(response, cpu, items)
+
+
+class MetricsExporter:
+    """다운로드 지연을 기록하고, 주기적으로 요약(스탯/로그)과 Prometheus 텍스트를 내보내는 확장"""
+
+    def __init__(self, crawler, metrics, interval=60.0, path=None, port=0, host='127.0.0.1'):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.metrics = metrics
+        self.interval = interval
+        self.path = path
+        self.port = port
+        self.host = host
+        self.writer_threads = crawler.settings.getint(
+            'MYSQL_WRITER_THREADS', crawler.settings.getint('MYSQL_POOL_SIZE', 4)
+        )
+        self.loop = None
+        self.listener = None
+        self.last_totals = {}
+        self.last_tick = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        metrics = StageMetrics.from_crawler(crawler)
+        if metrics is None:
+            raise NotConfigured
+        settings = crawler.settings
+        path = settings.get('METRICS_FILE')
+        exporter = cls(
+            crawler,
+            metrics,
+            interval=settings.getfloat('METRICS_INTERVAL', 60),
+            path=os.path.abspath(path) if path else None,
+            port=settings.getint('METRICS_PORT', 0),
+            host=settings.get('METRICS_HOST', '127.0.0.1'),
+        )
+        crawler.signals.connect(exporter.response_received, signal=signals.response_received)
+        crawler.signals.connect(exporter.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(exporter.spider_closed, signal=signals.spider_closed)
+        return exporter
+
+    def response_received(self, response, request, spider):
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            callback = getattr(request.callback, '__name__', None) or 'parse'
+            self.metrics.observe('download_latency_seconds', latency, callback=callback)
+
+    def spider_opened(self, spider):
+        self.last_tick = time.monotonic()
+        if self.port:
+            self._listen(spider)
+        self.loop = task.LoopingCall(self.tick)
+        self.loop.start(self.interval, now=False)
+
+    def _listen(self, spider):
+        from twisted.internet import reactor
+        from twisted.web import resource, server
+
+        metrics = self.metrics
+
+        class MetricsResource(resource.Resource):
+            isLeaf = True
+
+            def render_GET(self, request):
+                request.setHeader(b'Content-Type', b'text/plain; version=0.0.4; charset=utf-8')
+                return metrics.render().encode('utf-8')
+
+        self.listener = reactor.listenTCP(self.port, server.Site(MetricsResource()), interface=self.host)
+        spider.logger.info(f"MetricsExporter: http://{self.host}:{self.port}/metrics")
+
+    def tick(self):
+        now = time.monotonic()
+        elapsed = max(now - self.last_tick, 1e-9)
+        totals = self.metrics.totals()
+        window = {
+            key: (count - self.last_totals.get(key, (0, 0.0))[0], total - self.last_totals.get(key, (0, 0.0))[1])
+            for key, (count, total) in totals.items()
+        }
+        self.last_totals, self.last_tick = totals, now
+        self._update_stats()
+        self._log(window, elapsed)
+        if self.path:
+            self._write_file()
+
+    def _update_stats(self):
+        """누적 요약을 스탯에 (metrics/<이름>/<라벨값>/...)"""
+        histograms, counters = self.metrics.snapshot()
+        for (name, labels), histogram in histograms:
+            prefix = '/'.join(['metrics', name] + [str(value) for _, value in labels])
+            self.stats.set_value(f'{prefix}/count', histogram.count)
+            if name == 'items_per_page':
+                self.stats.set_value(f'{prefix}/avg', round(histogram.sum / histogram.count, 1))
+                continue
+            self.stats.set_value(f'{prefix}/avg_ms', round(histogram.sum / histogram.count * 1000, 3))
+            self.stats.set_value(f'{prefix}/p90_ms', round(histogram.quantile(0.9) * 1000, 3))
+        for (name, labels), value in counters:
+            prefix = '/'.join(['metrics', name] + [str(value) for _, value in labels])
+            self.stats.set_value(prefix, int(value))
+
+    def _log(self, window, elapsed):
+        """지난 구간: 단계별 시간 합 / 구간 길이 = 사용률 (어디가 병목인지 한 줄로)"""
+
+        def total(name):
+            return sum(s for (key, _), (_, s) in window.items() if key == name)
+
+        def count(name):
+            return sum(c for (key, _), (c, _) in window.items() if key == name)
+
+        responses = count('download_latency_seconds')
+        if not responses and not count('items_per_page'):
+            return
+        download_avg = total('download_latency_seconds') / responses * 1000 if responses else 0.0
+        parse = total('parse_cpu_seconds') / elapsed * 100
+        pipeline = total('pipeline_seconds') / elapsed * 100
+        sql = total('sql_seconds') / (elapsed * max(self.writer_threads, 1)) * 100
+        hits = sum(c for (key, labels), (c, _) in window.items()
+                   if key == 'cache_lookups_total' and ('result', 'hit') in labels)
+        lookups = count('cache_lookups_total')
+        hit_rate = f'{hits / lookups * 100:.0f}%' if lookups else '-'
+        logger.info(
+            f"StageMetrics: 응답 {responses / elapsed:.1f}/s (평균 지연 {download_avg:.0f}ms), "
+            f"아이템 {total('items_per_page') / elapsed:.1f}건/s | 리액터 사용률 파싱 {parse:.0f}% + "
+            f"파이프라인 {pipeline:.0f}%, SQL 스레드 사용률 {sql:.0f}%, 캐시 적중 {hit_rate}"
+        )
+
+    def _write_file(self):
+        # textfile collector가 쓰다 만 파일을 읽지 않도록 임시 파일 후 교체
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.metrics.render())
+        os.replace(tmp_path, self.path)
+
+    async def spider_closed(self, spider):
+        if self.loop is not None and self.loop.running:
+            self.loop.stop()
+        self.tick()
+        if self.listener is not None:
+            listener, self.listener = self.listener, None
+            await maybe_deferred_to_future(defer.maybeDeferred(listener.stopListening))
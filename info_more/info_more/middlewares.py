@@ -3,11 +3,21 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import logging
+import random
+import statistics
+import time
+from collections import deque
+
 from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.httpobj import urlparse_cached
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+logger = logging.getLogger(__name__)
+
 
 class InfoMoreSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -53,48 +63,226 @@ class InfoMoreSpiderMiddleware:
         spider.logger.info("Spider opened: %s" % spider.name)
 
 
+class ConcurrencyController:
+    """엔드포인트 묶음(family) 하나의 동시성/지연 피드백 제어
+
+    interval초(최소 min_samples개 응답)마다 지난 구간을 보고 조정한다.
+    - 429/403, 비정상적으로 작은 본문(차단/캡차 페이지 추정), 다운로드 오류가 많으면
+      동시성을 절반으로 줄이고 지연을 지수적으로 늘림 (base_delay * 2^(단계-1), 지터 포함)
+      429/403은 구간이 끝나기를 기다리지 않고 바로 반영 (interval/2에 한 번까지)
+    - p90 지연이 기준 지연(건강한 구간 p50의 최솟값)의 latency_factor배를 넘으면 동시성을 25% 줄임
+    - 건강하면 백오프 단계를 하나씩 되돌리고, 백오프가 끝나면 동시성을 10%씩(최소 1) 늘림
+    백오프가 없어도 지연을 0으로 두지 않고 기준 지연 / 동시성으로 간격을 둔다.
+    (asyncio 리액터에서는 지연 0인 슬롯의 대기열이 한 번에 풀려 동시성 제한을 넘는 순간이 생김)
+    """
+
+    THROTTLE_STATUSES = (429, 403)
+
+    def __init__(self, family, concurrency, min_concurrency=1, max_concurrency=64, interval=5.0,
+                 min_samples=10, latency_factor=3.0, anomaly_ratio=0.2, error_rate=0.1,
+                 base_delay=0.5, max_delay=60.0):
+        self.family = family
+        self.min_concurrency = max(int(min_concurrency), 1)
+        self.max_concurrency = max(int(max_concurrency), self.min_concurrency)
+        self.concurrency = min(max(int(concurrency), self.min_concurrency), self.max_concurrency)
+        self.delay = 0.0
+        self.backoff = 0
+        self.interval = interval
+        self.min_samples = min_samples
+        self.latency_factor = latency_factor
+        self.anomaly_ratio = anomaly_ratio
+        self.error_rate = error_rate
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # 기준 지연 / 정상 응답 본문 크기 (이상치 판단용)
+        self.min_latency = None
+        self.body_sizes = deque(maxlen=200)
+        self.retry_after = 0.0
+        self._reset(time.monotonic())
+
+    def _reset(self, now):
+        self.window_started = now
+        self.latencies = []
+        self.responses = 0
+        self.throttled = 0
+        self.anomalies = 0
+        self.errors = 0
+
+    def observe(self, latency, status, size, retry_after=None):
+        """응답 하나 기록. 바로 조정해야 하면(429/403) True"""
+        self.responses += 1
+        # 지연은 정상 응답만: 바로 돌아오는 429가 기준 지연을 낮추지 않게
+        if latency is not None and status == 200:
+            self.latencies.append(latency)
+        if status in self.THROTTLE_STATUSES:
+            self.throttled += 1
+            if retry_after:
+                self.retry_after = max(self.retry_after, retry_after)
+            return time.monotonic() - self.window_started >= self.interval / 2
+        if status == 200:
+            if len(self.body_sizes) >= 20 and size < statistics.median(self.body_sizes) * self.anomaly_ratio:
+                self.anomalies += 1
+            else:
+                self.body_sizes.append(size)
+        return False
+
+    def observe_error(self):
+        self.responses += 1
+        self.errors += 1
+
+    def due(self):
+        return (
+            self.responses >= self.min_samples
+            and time.monotonic() - self.window_started >= self.interval
+        )
+
+    def adjust(self):
+        """지난 구간으로 동시성/지연 조정. 결정('backoff' / 'latency' / 'recover' / 'increase' / None)을 돌려줌"""
+        decision = None
+        p50 = p90 = None
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            p50 = ordered[len(ordered) // 2]
+            p90 = ordered[min(int(len(ordered) * 0.9), len(ordered) - 1)]
+
+        if (self.throttled or self.anomalies > self.responses * 0.05
+                or self.errors > self.responses * self.error_rate):
+            self.backoff += 1
+            self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+            decision = 'backoff'
+        elif p90 is not None and self.min_latency and p90 > self.min_latency * self.latency_factor:
+            self.concurrency = max(self.min_concurrency, int(self.concurrency * 0.75))
+            decision = 'latency'
+        elif self.responses >= self.min_samples:
+            if p50 is not None:
+                self.min_latency = p50 if self.min_latency is None else min(self.min_latency, p50)
+            if self.backoff:
+                self.backoff -= 1
+                decision = 'recover'
+            elif self.concurrency < self.max_concurrency:
+                self.concurrency = min(self.max_concurrency, self.concurrency + max(1, self.concurrency // 10))
+                decision = 'increase'
+
+        self.delay = self._backoff_delay()
+        if decision == 'backoff' and self.retry_after:
+            self.delay = max(self.delay, min(self.retry_after, self.max_delay))
+        self.retry_after = 0.0
+        self._reset(time.monotonic())
+        return decision
+
+    def _backoff_delay(self):
+        if not self.backoff:
+            return self.min_latency / self.concurrency if self.min_latency else 0.0
+        cap = min(self.max_delay, self.base_delay * 2 ** (self.backoff - 1))
+        # equal jitter: 여러 노드/슬롯이 같은 순간에 다시 몰리지 않게
+        return cap / 2 + random.uniform(0, cap / 2)
+
+
 class InfoMoreDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    """엔드포인트 묶음별 적응형 동시성 (ADAPTIVE_CONCURRENCY_ENABLED)
+
+    요청 콜백으로 묶음(카테고리 API / 상품 목록 등, ADAPTIVE_CONCURRENCY_FAMILIES)을 정하고
+    묶음마다 다운로드 슬롯을 따로 두어, 응답을 보고 ConcurrencyController가 정한
+    동시성/지연을 그 슬롯에 바로 적용한다.
+    RetryMiddleware(550)보다 다운로더 쪽(585)에 두어 재시도될 429/403도 관찰한다.
+    """
+
+    def __init__(self, crawler, families, options):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        # 콜백 이름 → 묶음
+        self.families = {
+            callback: family
+            for family, callbacks in families.items()
+            for callback in callbacks
+        }
+        self.options = options
+        self.controllers = {}
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
-        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        settings = crawler.settings
+        if not settings.getbool('ADAPTIVE_CONCURRENCY_ENABLED', False):
+            raise NotConfigured
+        options = {
+            'concurrency': settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN', 8),
+            'min_concurrency': settings.getint('ADAPTIVE_CONCURRENCY_MIN', 1),
+            'max_concurrency': settings.getint('ADAPTIVE_CONCURRENCY_MAX', 64),
+            'interval': settings.getfloat('ADAPTIVE_CONCURRENCY_INTERVAL', 5.0),
+            'min_samples': settings.getint('ADAPTIVE_CONCURRENCY_MIN_SAMPLES', 10),
+            'latency_factor': settings.getfloat('ADAPTIVE_CONCURRENCY_LATENCY_FACTOR', 3.0),
+            'anomaly_ratio': settings.getfloat('ADAPTIVE_CONCURRENCY_ANOMALY_RATIO', 0.2),
+            'error_rate': settings.getfloat('ADAPTIVE_CONCURRENCY_ERROR_RATE', 0.1),
+            'base_delay': settings.getfloat('ADAPTIVE_CONCURRENCY_BASE_DELAY', 0.5),
+            'max_delay': settings.getfloat('ADAPTIVE_CONCURRENCY_MAX_DELAY', 60.0),
+        }
+        families = settings.getdict('ADAPTIVE_CONCURRENCY_FAMILIES', {
+            'category': ['parse_major_category', 'parse_sub_category'],
+            'listing': ['parse_page'],
+        })
+        s = cls(crawler, families, options)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
         return s
 
-    def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
+    def _controller(self, family):
+        controller = self.controllers.get(family)
+        if controller is None:
+            controller = self.controllers[family] = ConcurrencyController(family, **self.options)
+        return controller
 
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
+    def process_request(self, request):
+        family = self.families.get(getattr(request.callback, '__name__', None))
+        if family is not None and 'download_slot' not in request.meta:
+            request.meta['adaptive_family'] = family
+            request.meta['download_slot'] = f'{family}@{urlparse_cached(request).hostname}'
         return None
 
-    def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
-
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+    def process_response(self, request, response):
+        family = request.meta.get('adaptive_family')
+        if family is None:
+            return response
+        controller = self._controller(family)
+        retry_after = response.headers.get('Retry-After')
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        urgent = controller.observe(
+            request.meta.get('download_latency'), response.status, len(response.body), retry_after
+        )
+        if urgent or controller.due():
+            self._apply(request, controller)
         return response
 
-    def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
+    def process_exception(self, request, exception):
+        family = request.meta.get('adaptive_family')
+        if family is not None:
+            controller = self._controller(family)
+            controller.observe_error()
+            if controller.due():
+                self._apply(request, controller)
+        return None
 
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
+    def _apply(self, request, controller):
+        before = (controller.concurrency, controller.delay)
+        decision = controller.adjust()
+        slot = self.crawler.engine.downloader.slots.get(request.meta['download_slot'])
+        if slot is not None:
+            slot.concurrency = controller.concurrency
+            slot.delay = controller.delay
+        family = controller.family
+        if decision:
+            self.stats.inc_value(f'adaptive/{family}/{decision}')
+        self.stats.set_value(f'adaptive/{family}/concurrency', controller.concurrency)
+        self.stats.set_value(f'adaptive/{family}/delay', round(controller.delay, 3))
+        self.stats.max_value(f'adaptive/{family}/max_concurrency', controller.concurrency)
+        if decision in ('backoff', 'latency', 'recover'):
+            logger.info(
+                f"AdaptiveConcurrency[{family}]: {decision} 동시성 {before[0]}→{controller.concurrency}, "
+                f"지연 {before[1]:.2f}→{controller.delay:.2f}s"
+            )
 
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+    def spider_closed(self, spider):
+        for family, controller in self.controllers.items():
+            if controller.min_latency is not None:
+                self.stats.set_value(f'adaptive/{family}/base_latency_ms', round(controller.min_latency * 1000, 1))
@@ -0,0 +1,67 @@
+# info_more/normalize.py
+# 스파이더에서 뽑은 문자열 → DB 타입 (상품 카드 하나에 여러 번 불리므로 할당을 줄임)
+
+import re
+from functools import lru_cache
+
+_NON_DIGIT = re.compile(r'\D')
+_NON_FLOAT = re.compile(r'[^\d.]')
+
+
+# 배송비 문구('무료배송', '배송비 3,000원')처럼 반복되는 문자열은 결과를 재사용
+@lru_cache(maxsize=4096)
+def _parse_int(val_str):
+    cleaned = _NON_DIGIT.sub('', val_str)
+    return int(cleaned) if cleaned else None
+
+
+@lru_cache(maxsize=4096)
+def _parse_float(val_str):
+    cleaned = _NON_FLOAT.sub('', val_str)
+    if not cleaned:
+        return None
+    try:
+        return float(cleaned)
+    except ValueError:
+        # '1.2.3'처럼 점이 여러 개인 경우
+        return None
+
+
+class Normalizer:
+    """숫자 정제. 실패(숫자가 없는 문자열)는 stdout 대신 크롤러 스탯에 센다."""
+
+    def __init__(self, stats=None):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(stats=crawler.stats)
+
+    def _invalid(self, kind):
+        if self.stats:
+            self.stats.inc_value(f'normalize/{kind}_invalid')
+
+    def to_int(self, val_str):
+        # 값이 없으면 바로 None
+        if not val_str:
+            return None
+        # 이미 숫자만 있는 문자열 (가격, 랭킹 등)
+        if val_str.isdecimal():
+            return int(val_str)
+
+        value = _parse_int(val_str)
+        if value is None:
+            self._invalid('int')
+        return value
+
+    def to_float(self, val_str):
+        if not val_str:
+            return None
+        # '4.8' 같은 이미 깨끗한 소수
+        if val_str.replace('.', '', 1).isdecimal():
+            return float(val_str)
+
+        value = _parse_float(val_str)
+        if value is None:
+            self._invalid('float')
+        return value
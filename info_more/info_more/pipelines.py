@@ -1,54 +1,435 @@
 # info_more/pipelines.py
 
-import pymysql
+import time
+from datetime import datetime, timedelta
+
 from itemadapter import ItemAdapter
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.utils.project import data_path
+from twisted.internet import defer, task
+from info_more import signals as info_signals
+from info_more.caches import (
+    CategoryIdMap, ProductFingerprintIndex, ProductIdIndex, SeenProducts, SnapshotStateIndex,
+    product_fingerprint, snapshot_fingerprint,
+)
+from info_more.db import MySQLConnectionPool, MySQLWriter
+from info_more.exports import SnapshotExporter
 from info_more.items import CategoryItem, ProductItem
+from info_more.metrics import StageMetrics, timed_process_item
+from info_more.profiling import SQLTrace
+
+
+class MySQLPipelineBase:
+    """세 MySQL 파이프라인 공통 부분: 공유 커넥션 풀/라이터 + 설정 읽기.
+
+    SQL은 리액터 스레드에서 직접 실행하지 않고 self._run_sql()(→ self.writer.run())로 넘긴다.
+    """
+
+    # 단계별 계측 (METRICS_ENABLED) / SQL 타이밍 기록 (PROFILE_MODES=sql). 켜졌을 때만 from_crawler에서 설정
+    metrics = None
+    sql_trace = None
 
-class MySQLCategoryPipeline:
-    def __init__(self, host, user, password, db, port, charset):
-        self.host = host
-        self.user = user
-        self.password = password
-        self.db_name = db
-        self.port = port
-        self.charset = charset
-        self.conn = None
-        self.cursor = None
-        # naver_category_id → category.id 캐시
-        self.id_cache = {}
+    def __init__(self, pool, writer, stats=None, signals=None):
+        self.pool = pool
+        self.writer = writer
+        self.stats = stats
+        self.signals = signals
 
     @classmethod
     def from_crawler(cls, crawler):
-        settings = crawler.settings
-        return cls(
-            host=settings.get('MYSQL_HOST'),
-            user=settings.get('MYSQL_USER'),
-            password=settings.get('MYSQL_PASSWORD'),
-            db=settings.get('MYSQL_DB'),
-            port=settings.getint('MYSQL_PORT'),
-            charset=settings.get('MYSQL_CHARSET'),
+        pipeline = cls(
+            pool=MySQLConnectionPool.from_crawler(crawler),
+            writer=MySQLWriter.from_crawler(crawler),
+            stats=crawler.stats,
+            signals=crawler.signals,
+            **cls.options_from_settings(crawler.settings),
         )
+        pipeline.metrics = StageMetrics.from_crawler(crawler)
+        pipeline.sql_trace = SQLTrace.from_crawler(crawler)
+        return pipeline
+
+    @classmethod
+    def options_from_settings(cls, settings):
+        """파이프라인별 추가 설정 (하위 클래스에서 확장)"""
+        return {}
 
     def open_spider(self, spider):
-        self.conn = pymysql.connect(
-            host=self.host,
-            user=self.user,
-            password=self.password,
-            db=self.db_name,
-            port=self.port,
-            charset=self.charset,
-            cursorclass=pymysql.cursors.DictCursor,
-            autocommit=True,   # 트랜잭션 단순화
+        spider.logger.info(f"{type(self).__name__}: 커넥션 풀 사용 (size={self.pool.size})")
+
+    def close_spider(self, spider):
+        spider.logger.info(f"{type(self).__name__}: 종료")
+
+    def _run_sql(self, func, *args, rows=None):
+        """func(*args)를 라이터 스레드에서 실행.
+
+        계측 중이면 실행 시간(큐 대기 제외)을 sql_seconds로, SQL 프로파일 중이면 대기/실행 시간을 sql.jsonl에 기록
+        """
+        metrics, trace = self.metrics, self.sql_trace
+        if metrics is None and trace is None:
+            return self.writer.run(func, *args)
+        pipeline = type(self).__name__
+        operation = func.__name__.lstrip('_')
+        queued = time.perf_counter()
+
+        def _timed():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                elapsed = time.perf_counter() - started
+                if metrics is not None:
+                    metrics.observe('sql_seconds', elapsed, pipeline=pipeline)
+                if trace is not None:
+                    trace.record(pipeline, operation, started - queued, elapsed, rows)
+
+        return self.writer.run(_timed)
+
+    def _count_lookup(self, cache, hit):
+        if self.metrics is not None:
+            self.metrics.inc('cache_lookups_total', cache=cache, result='hit' if hit else 'miss')
+
+    def _with_backpressure(self, item):
+        """라이터 큐가 가득 찼으면 자리가 날 때까지 아이템 처리를 붙잡아 둠."""
+        if self.writer.saturated:
+            return self.writer.wait_for_capacity().addCallback(lambda _: item)
+        return item
+
+
+
+class BufferedMySQLPipeline(MySQLPipelineBase):
+    """행을 모아두었다가 크기/시간 기준으로 multi-row 기록하는 파이프라인 공통 부분."""
+
+    batch_size_setting = None
+    flush_interval_setting = None
+    stats_prefix = None
+
+    def __init__(self, pool, writer, stats=None, signals=None, batch_size=1, flush_interval=0):
+        super().__init__(pool, writer, stats=stats, signals=signals)
+        # 버퍼 모드 설정 (batch_size <= 1 이면 아이템마다 바로 기록)
+        self.batch_size = max(int(batch_size or 1), 1)
+        self.flush_interval = float(flush_interval or 0)
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.flush_loop = None
+        # 아직 끝나지 않은 flush Deferred
+        self.inflight = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = super().from_crawler(crawler)
+        # 체크포인트(CrawlCheckpoint)가 완료를 기록하기 전에 버퍼를 비울 수 있게 연결
+        crawler.signals.connect(pipeline.drain, signal=info_signals.buffers_drain_requested)
+        return pipeline
+
+    @classmethod
+    def options_from_settings(cls, settings):
+        return {
+            'batch_size': settings.getint(cls.batch_size_setting, 1),
+            'flush_interval': settings.getfloat(cls.flush_interval_setting, 0),
+        }
+
+    def open_spider(self, spider):
+        # 시간 기준 flush: 새 아이템이 안 들어와도 flush_interval이 지나면 기록
+        if self.batch_size > 1 and self.flush_interval > 0:
+            self.flush_loop = task.LoopingCall(self._flush_if_due, spider)
+            self.flush_loop.start(self.flush_interval, now=False)
+
+        spider.logger.info(
+            f"{type(self).__name__}: 커넥션 풀 사용 (batch_size={self.batch_size})"
+        )
+
+    def close_spider(self, spider):
+        if self.flush_loop and self.flush_loop.running:
+            self.flush_loop.stop()
+
+        # 남은 버퍼 + 진행 중인 기록이 끝날 때까지 대기
+        d = self.drain(spider)
+        d.addCallback(lambda _: self._report_stats(spider))
+        return d
+
+    def _report_stats(self, spider):
+        if self.stats:
+            prefix = self.stats_prefix
+            rows = self.stats.get_value(f'{prefix}/rows', 0)
+            flush_time = self.stats.get_value(f'{prefix}/flush_time_ms', 0)
+            flushes = self.stats.get_value(f'{prefix}/flushes', 0)
+            if flush_time:
+                self.stats.set_value(
+                    f'{prefix}/rows_per_sec', round(rows / (flush_time / 1000), 1)
+                )
+            if flushes:
+                self.stats.set_value(
+                    f'{prefix}/flush_latency_avg_ms', round(flush_time / flushes, 2)
+                )
+
+        spider.logger.info(f"{type(self).__name__}: 종료")
+
+    def _flush_if_due(self, spider):
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush(spider)
+
+    def _track(self, d):
+        self.inflight.add(d)
+
+        def _untrack(result):
+            self.inflight.discard(d)
+            return result
+
+        return d.addBoth(_untrack)
+
+    def flush(self, spider):
+        """버퍼를 기록하는 Deferred를 돌려줌 (하위 클래스에서 구현)"""
+        raise NotImplementedError
+
+    def _has_unflushed(self):
+        return bool(self.buffer)
+
+    def drain(self, spider):
+        """지금 버퍼를 flush하고, 진행 중인 flush까지 모두 끝나면 발생하는 Deferred."""
+        self.flush(spider)
+        d = defer.DeferredList(list(self.inflight))
+        # 기다리는 동안 새로 쌓인 행이 있으면 한 번 더
+        d.addCallback(lambda _: self.drain(spider) if self._has_unflushed() else None)
+        return d
+
+    def _add_row(self, row, item, spider):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush(spider)
+        return self._with_backpressure(item)
+
+    def _write_batch(self, spider, sql, rows, after=None):
+        """rows를 라이터 스레드에서 하나의 트랜잭션으로 executemany 기록.
+
+        after(cursor)가 있으면 같은 트랜잭션 안에서 실행하고 그 결과로 발생한다.
+        실패하면 rollback 후 None으로 발생.
+        """
+        prefix = self.stats_prefix
+        started = time.perf_counter()
+
+        def _write():
+            with self.pool.transaction() as cursor:
+                cursor.executemany(sql, rows)
+                return after(cursor) if after else True
+
+        def _done(result):
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if self.stats:
+                self.stats.inc_value(f'{prefix}/rows', len(rows))
+                self.stats.inc_value(f'{prefix}/flushes')
+                self.stats.inc_value(f'{prefix}/flush_time_ms', elapsed_ms)
+                self.stats.max_value(f'{prefix}/flush_latency_max_ms', round(elapsed_ms, 2))
+            return result
+
+        def _failed(failure):
+            spider.logger.error(
+                f"[{type(self).__name__}] DB error ({len(rows)} rows): {failure.value}"
+            )
+            if self.stats:
+                self.stats.inc_value(f'{prefix}/failed_rows', len(rows))
+                self.stats.inc_value('mysql/failed_batches')
+            return None
+
+        d = self._run_sql(_write, rows=len(rows))
+        d.addCallbacks(_done, _failed)
+        return d
+
+
+
+class ProductDedupPipeline:
+    """한 실행 안에서 같은 상품이 여러 카테고리 목록에 나오면 DB 파이프라인 전에 버림.
+
+    PRODUCT_DEDUP_PRECEDENCE
+        'first'   : 먼저 들어온 복사본만 통과
+        'deepest' : 더 깊은 카테고리(소 > 중 > 대) 복사본이 나중에 오면 한 번 더 통과시켜
+                    상품의 category_id만 갱신 (스냅샷은 처음 복사본으로 이미 기록)
+    """
+
+    PRECEDENCES = ('first', 'deepest')
+
+    metrics = None
+
+    def __init__(self, seen, precedence='first', stats=None):
+        if precedence not in self.PRECEDENCES:
+            raise ValueError(f"지원하지 않는 PRODUCT_DEDUP_PRECEDENCE 입니다: {precedence}")
+        self.seen = seen
+        self.deepest_wins = precedence == 'deepest'
+        self.stats = stats
+        self.dropped = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(
+            seen=SeenProducts.from_crawler(crawler),
+            precedence=crawler.settings.get('PRODUCT_DEDUP_PRECEDENCE', 'first'),
+            stats=crawler.stats,
+        )
+        pipeline.metrics = StageMetrics.from_crawler(crawler)
+        return pipeline
+
+    @staticmethod
+    def _depth(adapter):
+        if adapter.get('sub_id'):
+            return 3
+        if adapter.get('medium_id'):
+            return 2
+        return 1
+
+    @timed_process_item
+    def process_item(self, item, spider):
+        if not isinstance(item, ProductItem):
+            return item
+
+        adapter = ItemAdapter(item)
+        naver_product_id = adapter.get('naver_product_id')
+        if not naver_product_id:
+            return item
+
+        if self.seen.admit(naver_product_id, self._depth(adapter), self.deepest_wins):
+            return item
+
+        self.dropped += 1
+        if self.stats:
+            self.stats.inc_value('dedup/dropped')
+        raise DropItem(f"duplicate naver_product_id={naver_product_id}", log_level='DEBUG')
+
+    def close_spider(self, spider):
+        # 버린 복사본마다 상품 업서트 1 + 스냅샷 1, 다시 통과한 복사본은 스냅샷 1
+        skipped = self.stats.get_value('dedup/snapshots_skipped', 0) if self.stats else 0
+        saved = self.dropped * 2 + skipped
+        if self.stats:
+            self.stats.set_value('dedup/unique_products', len(self.seen))
+            self.stats.set_value('dedup/writes_saved', saved)
+        spider.logger.info(
+            f"ProductDedupPipeline: 상품 {len(self.seen)}개, 중복 {self.dropped}개 제거 (기록 {saved}건 절약)"
+        )
+
+
+
+class SnapshotExportPipeline:
+    """각 실행의 상품 스냅샷을 컬럼형 파일(Parquet / Arrow IPC)로 내보냄
+
+    분석용 가격 이력은 MySQL 대신 이 파일을 읽는다 (info_more.exports.open_dataset).
+    SNAPSHOT_EXPORT_ENABLED가 꺼져 있으면 로드되지 않는다. 켜려면 pyarrow가 필요하다.
+    """
+
+    metrics = None
+
+    def __init__(self, exporter, stats=None):
+        self.exporter = exporter
+        self.stats = stats
+        # 이번 실행에서 이미 내보낸 naver_product_id (상품마다 한 행)
+        self.exported = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('SNAPSHOT_EXPORT_ENABLED', False):
+            raise NotConfigured("SNAPSHOT_EXPORT_ENABLED = False")
+        exporter = SnapshotExporter(
+            root=settings.get('SNAPSHOT_EXPORT_DIR', 'exports/snapshots'),
+            fmt=settings.get('SNAPSHOT_EXPORT_FORMAT', 'parquet'),
+            compression=settings.get('SNAPSHOT_EXPORT_COMPRESSION', 'zstd'),
+            category_level=settings.get('SNAPSHOT_EXPORT_CATEGORY_LEVEL', 'major'),
+            row_group_size=settings.getint('SNAPSHOT_EXPORT_ROW_GROUP_SIZE', 50000),
+            max_buffered_rows=settings.getint('SNAPSHOT_EXPORT_MAX_BUFFERED_ROWS', 200000),
+        )
+        pipeline = cls(exporter, stats=crawler.stats)
+        pipeline.metrics = StageMetrics.from_crawler(crawler)
+        return pipeline
+
+    @timed_process_item
+    def process_item(self, item, spider):
+        if not isinstance(item, ProductItem):
+            return item
+
+        adapter = ItemAdapter(item)
+        naver_product_id = adapter.get('naver_product_id')
+        if not naver_product_id:
+            return item
+
+        # 스냅샷 파이프라인과 같이 상품마다 한 번만: category_id 갱신용으로 다시 통과한 복사본은
+        # 앞 단계(상품 업서트)가 늦어지면 먼저 도착할 수도 있으므로 도착 순서가 아니라 내보낸 기록으로 판단
+        key = str(naver_product_id)
+        if key in self.exported:
+            if self.stats:
+                self.stats.inc_value('export/duplicates_skipped')
+            return item
+        self.exported.add(key)
+
+        # 컬럼 순서는 info_more.exports.COLUMNS
+        # 카테고리 id 컬럼은 string이므로 스파이더 JSON의 숫자 id도 문자열로 (None은 그대로)
+        major_id, medium_id, sub_id = (
+            None if value is None else str(value)
+            for value in (adapter.get('major_id'), adapter.get('medium_id'), adapter.get('sub_id'))
         )
-        self.cursor = self.conn.cursor()
-        spider.logger.info("MySQLCategoryPipeline: DB 연결 완료")
+        self.exporter.add(spider.snapshot_time, (
+            key,
+            spider.snapshot_time,
+            major_id,
+            medium_id,
+            sub_id,
+            adapter.get('name'),
+            adapter.get('mall_name'),
+            adapter.get('original_price'),
+            adapter.get('discount_rate'),
+            adapter.get('price'),
+            adapter.get('delivery_fee'),
+            adapter.get('rating'),
+            adapter.get('review_count'),
+            adapter.get('ranking'),
+        ))
+        return item
 
     def close_spider(self, spider):
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
-        spider.logger.info("MySQLCategoryPipeline: DB 연결 종료")
+        files, total_bytes = self.exporter.close()
+        if self.stats:
+            self.stats.set_value('export/rows', self.exporter.rows)
+            self.stats.set_value('export/row_groups', self.exporter.row_groups)
+            self.stats.set_value('export/files', files)
+            self.stats.set_value('export/bytes', total_bytes)
+        spider.logger.info(
+            f"SnapshotExportPipeline: {self.exporter.rows}행 → 파일 {files}개 "
+            f"({total_bytes / 1024:.1f}KB, {self.exporter.root})"
+        )
+
+
+
+class MySQLCategoryPipeline(MySQLPipelineBase):
+    # id = LAST_INSERT_ID(id): 이미 있던 행이어도 cursor.lastrowid로 id를 돌려받기 위함
+    UPSERT_SQL = """
+        INSERT INTO category (naver_category_id, name, level, parent_id)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            id = LAST_INSERT_ID(id),
+            name = VALUES(name),
+            level = VALUES(level),
+            parent_id = VALUES(parent_id)
+        """
+
+    def __init__(self, pool, writer, stats=None, signals=None):
+        super().__init__(pool, writer, stats=stats, signals=signals)
+        # naver_category_id → category.id 캐시 (from_crawler에서 파이프라인 공용 캐시로 교체)
+        self.id_cache = CategoryIdMap()
+        # 부모 카테고리가 먼저 기록되어야 하므로 카테고리 기록은 순서대로 하나씩
+        self.lock = defer.DeferredLock()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = super().from_crawler(crawler)
+        pipeline.id_cache = CategoryIdMap.from_crawler(crawler)
+        return pipeline
+
+    def open_spider(self, spider):
+        super().open_spider(spider)
+
+        def _loaded(count):
+            spider.logger.info(f"MySQLCategoryPipeline: 카테고리 {count}개 id 적재")
+            if self.stats:
+                self.stats.set_value('mysql/category/preloaded', count)
+
+        # 카테고리 id 전체를 한 번에 적재 (아이템은 open_spider가 끝난 뒤에 들어옴)
+        return self.id_cache.ensure_loaded(self.writer, self.pool).addCallback(_loaded)
 
     def _get_level_int(self, level_str):
         if level_str == "major":
@@ -60,34 +441,49 @@ class MySQLCategoryPipeline:
         else:
             return 0  # 예외 케이스
 
-    def _get_parent_id(self, parent_naver_id):
+    def _get_parent_id(self, cursor, parent_naver_id):
         if parent_naver_id is None:
             return None
 
         parent_naver_id = str(parent_naver_id)
 
-        # 캐시 먼저 확인
+        # 캐시 먼저 확인 (부모는 보통 바로 앞에 기록되어 캐시에 있음)
         if parent_naver_id in self.id_cache:
-            return self.id_cache[parent_naver_id]
+            return self.id_cache.get(parent_naver_id)
 
         # DB에서 조회
         sql = "SELECT id FROM category WHERE naver_category_id = %s"
-        self.cursor.execute(sql, (parent_naver_id,))
-        row = self.cursor.fetchone()
+        cursor.execute(sql, (parent_naver_id,))
+        row = cursor.fetchone()
         if row:
-            self.id_cache[parent_naver_id] = row['id']
+            self.id_cache.set_id(parent_naver_id, row['id'])
             return row['id']
         return None
 
-    def _save_and_cache_id(self, naver_category_id: str):
-        """INSERT 후 해당 naver_category_id의 id를 캐시에 넣기 위한 헬퍼."""
+    def _write_category(self, naver_category_id, name, level, parent_naver_id):
+        """라이터 스레드에서 실행. 바뀐 게 없으면 SQL 없이 끝."""
         naver_category_id = str(naver_category_id)
-        sql = "SELECT id FROM category WHERE naver_category_id = %s"
-        self.cursor.execute(sql, (naver_category_id,))
-        row = self.cursor.fetchone()
-        if row:
-            self.id_cache[naver_category_id] = row['id']
 
+        with self.pool.cursor() as cursor:
+            # parent_id 조회
+            parent_id = self._get_parent_id(cursor, parent_naver_id)
+
+            if self.id_cache.is_unchanged(naver_category_id, name, level, parent_id):
+                return False
+
+            # INSERT ... ON DUPLICATE KEY UPDATE
+            cursor.execute(self.UPSERT_SQL, (naver_category_id, name, level, parent_id))
+
+            # 캐시 업데이트 (부모로 쓰일 수 있는 major / medium은 특히 중요)
+            self.id_cache.set(naver_category_id, cursor.lastrowid, name, level, parent_id)
+        return True
+
+    def _count_write(self, written):
+        if self.stats:
+            key = 'written' if written else 'unchanged'
+            self.stats.inc_value(f'mysql/category/{key}')
+
+    @timed_process_item
     def process_item(self, item, spider):
         if not isinstance(item, CategoryItem):
             return item
@@ -115,96 +511,186 @@ class MySQLCategoryPipeline:
             name = adapter.get("sub_name")
             parent_naver_id = adapter.get("medium_id")
 
-        # parent_id 조회
-        parent_id = self._get_parent_id(parent_naver_id)
+        d = self.lock.run(
+            self._run_sql, self._write_category,
+            naver_category_id, name, level, parent_naver_id,
+        )
+        d.addCallback(self._count_write)
+        d.addCallback(lambda _: item)
+        return d
+    
 
-        # INSERT ... ON DUPLICATE KEY UPDATE
-        sql = """
-        INSERT INTO category (naver_category_id, name, level, parent_id)
-        VALUES (%s, %s, %s, %s)
+    
+class MySQLProductPipeline(BufferedMySQLPipeline):
+    # 상품 업서트 SQL (executemany 시 pymysql이 multi-row VALUES로 묶어서 전송)
+    UPSERT_SQL = """
+        INSERT INTO product (
+            naver_product_id,
+            category_id,
+            mall_name,
+            name,
+            original_price,
+            discount_rate,
+            price,
+            delivery_fee,
+            rating,
+            review_count,
+            ranking,
+            detail_url
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         ON DUPLICATE KEY UPDATE
-            name = VALUES(name),
-            level = VALUES(level),
-            parent_id = VALUES(parent_id)
+            category_id    = VALUES(category_id),
+            mall_name      = VALUES(mall_name),
+            name           = VALUES(name),
+            original_price = VALUES(original_price),
+            discount_rate  = VALUES(discount_rate),
+            price          = VALUES(price),
+            delivery_fee   = VALUES(delivery_fee),
+            rating         = VALUES(rating),
+            review_count   = VALUES(review_count),
+            ranking        = VALUES(ranking),
+            detail_url     = VALUES(detail_url),
+            updated_at     = CURRENT_TIMESTAMP
         """
 
-        self.cursor.execute(
-            sql,
-            (str(naver_category_id), name, level, parent_id)
-        )
-
-        # 캐시 업데이트 (부모로 쓰일 수 있는 major / medium은 특히 중요)
-        self._save_and_cache_id(naver_category_id)
-
-        return item    
-    
+    batch_size_setting = 'MYSQL_PRODUCT_BATCH_SIZE'
+    flush_interval_setting = 'MYSQL_PRODUCT_FLUSH_INTERVAL'
+    stats_prefix = 'mysql/product'
 
-    
-class MySQLProductPipeline:
-    def __init__(self, host, user, password, db, port, charset):
-        self.host = host
-        self.user = user
-        self.password = password
-        self.db_name = db
-        self.port = port
-        self.charset = charset
-        self.conn = None
-        self.cursor = None
-        # naver_category_id → category.id 캐시
-        self.category_id_cache = {}
+    def __init__(self, pool, writer, stats=None, signals=None, batch_size=1, flush_interval=0,
+                 skip_unchanged=False, fingerprint_path=None):
+        super().__init__(
+            pool, writer, stats=stats, signals=signals,
+            batch_size=batch_size, flush_interval=flush_interval,
+        )
+        # naver_category_id → category.id 캐시 (from_crawler에서 카테고리 파이프라인과 공유)
+        self.category_id_cache = CategoryIdMap()
+        # 마지막으로 기록한 행과 같은 상품은 업서트하지 않음 (naver_product_id → fingerprint)
+        self.fingerprints = ProductFingerprintIndex() if skip_unchanged else None
+        self.fingerprint_path = fingerprint_path
 
     @classmethod
     def from_crawler(cls, crawler):
-        settings = crawler.settings
-        return cls(
-            host=settings.get('MYSQL_HOST'),
-            user=settings.get('MYSQL_USER'),
-            password=settings.get('MYSQL_PASSWORD'),
-            db=settings.get('MYSQL_DB'),
-            port=settings.getint('MYSQL_PORT'),
-            charset=settings.get('MYSQL_CHARSET'),
-        )
+        pipeline = super().from_crawler(crawler)
+        pipeline.category_id_cache = CategoryIdMap.from_crawler(crawler)
+        if pipeline.fingerprints is not None:
+            pipeline.fingerprints = ProductFingerprintIndex.from_crawler(crawler)
+        # 스냅샷 파이프라인이 기록 전에 상품 버퍼를 비워 달라고 요청할 수 있게 연결
+        crawler.signals.connect(pipeline.drain, signal=info_signals.product_flush_requested)
+        return pipeline
+
+    @classmethod
+    def options_from_settings(cls, settings):
+        options = super().options_from_settings(settings)
+        options['skip_unchanged'] = settings.getbool('MYSQL_PRODUCT_SKIP_UNCHANGED', False)
+        path = settings.get('MYSQL_PRODUCT_FINGERPRINT_PATH')
+        options['fingerprint_path'] = data_path(path) if path else None
+        return options
 
     def open_spider(self, spider):
-        self.conn = pymysql.connect(
-            host=self.host,
-            user=self.user,
-            password=self.password,
-            db=self.db_name,
-            port=self.port,
-            charset=self.charset,
-            cursorclass=pymysql.cursors.DictCursor,
-            autocommit=True,
+        super().open_spider(spider)
+        # 카테고리 파이프라인이 이미 적재했으면 바로 끝남
+        d = self.category_id_cache.ensure_loaded(self.writer, self.pool)
+        if self.fingerprints is None:
+            return d
+        return defer.DeferredList(
+            [d, self._load_fingerprints(spider)], fireOnOneErrback=True, consumeErrors=True
         )
-        self.cursor = self.conn.cursor()
-        spider.logger.info("MySQLProductPipeline: DB 연결 완료")
+
+    def _load_fingerprints(self, spider):
+        started = time.perf_counter()
+
+        def _loaded(result):
+            count, source = result
+            elapsed = time.perf_counter() - started
+            spider.logger.info(
+                f"MySQLProductPipeline: 상품 fingerprint {count}개 적재 ({source}, {elapsed:.1f}s)"
+            )
+            if self.stats:
+                self.stats.set_value('mysql/product/preloaded_fingerprints', count)
+                self.stats.set_value('mysql/product/fingerprint_source', source)
+
+        d = self.writer.run(self.fingerprints.ensure_loaded, self.pool, self.fingerprint_path)
+        return d.addCallback(_loaded)
 
     def close_spider(self, spider):
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
-        spider.logger.info("MySQLProductPipeline: DB 연결 종료")
+        d = super().close_spider(spider)
+        if self.fingerprints is not None:
+            # 기록이 모두 끝난 뒤의 테이블 상태(stamp)와 함께 보관/저장
+            d.addCallback(lambda _: self.writer.run(
+                self.fingerprints.checkpoint, self.pool, self.fingerprint_path
+            ))
+            d.addErrback(lambda failure: spider.logger.error(
+                f"MySQLProductPipeline: fingerprint 저장 실패: {failure.value}"
+            ))
+        return d
+
+    def _select_category_id(self, key):
+        """라이터 스레드에서 실행: 네이버 카테고리 ID → category.id (FK)"""
+        sql = "SELECT id FROM category WHERE naver_category_id = %s LIMIT 1"
+        with self.pool.cursor() as cursor:
+            cursor.execute(sql, (key,))
+            row = cursor.fetchone()
+        return row['id'] if row else None
 
     def _get_category_id_by_naver_id(self, naver_category_id):
-        """네이버 카테고리 ID → category.id (FK)"""
+        """네이버 카테고리 ID → category.id (FK). 캐시에 없을 때만 DB 조회(Deferred)."""
         if not naver_category_id:
-            return None
+            return defer.succeed(None)
 
         key = str(naver_category_id)
 
         # 캐시 확인
         if key in self.category_id_cache:
-            return self.category_id_cache[key]
-
-        sql = "SELECT id FROM category WHERE naver_category_id = %s LIMIT 1"
-        self.cursor.execute(sql, (key,))
-        row = self.cursor.fetchone()
-        if row:
-            self.category_id_cache[key] = row['id']
-            return row['id']
-        return None
+            return defer.succeed(self.category_id_cache.get(key))
+
+        def _cache(category_id):
+            if category_id:
+                self.category_id_cache.set_id(key, category_id)
+            return category_id
+
+        return self._run_sql(self._select_category_id, key).addCallback(_cache)
+
+    @staticmethod
+    def _select_product_ids(cursor, naver_product_ids):
+        """방금 업서트한 배치의 naver_product_id → product.id (배치당 한 번 조회)"""
+        keys = list(dict.fromkeys(str(key) for key in naver_product_ids))
+        placeholders = ', '.join(['%s'] * len(keys))
+        sql = f"SELECT id, naver_product_id FROM product WHERE naver_product_id IN ({placeholders})"
+        cursor.execute(sql, keys)
+        return {str(row['naver_product_id']): row['id'] for row in cursor.fetchall()}
+
+    def flush(self, spider):
+        """버퍼에 쌓인 상품을 하나의 트랜잭션 안에서 multi-row 업서트."""
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return defer.succeed(None)
+
+        rows, self.buffer = self.buffer, []
+        d = self._write_batch(
+            spider, self.UPSERT_SQL, rows,
+            after=lambda cursor: self._select_product_ids(cursor, [row[0] for row in rows]),
+        )
+        d.addCallback(self._remember_written, rows)
+        d.addCallback(self._hand_over_ids, spider)
+        return self._track(d)
+
+    def _remember_written(self, product_ids, rows):
+        # 기록에 실패한 배치(None)는 fingerprint를 갱신하지 않아 다음에 다시 기록됨
+        if product_ids is not None and self.fingerprints is not None:
+            for row in rows:
+                self.fingerprints.remember(row[0], product_fingerprint(*row[1:]))
+        return product_ids
+
+    def _hand_over_ids(self, product_ids, spider):
+        # 스냅샷 파이프라인에 id 전달 (상품마다 SELECT 하지 않도록)
+        if product_ids and self.signals:
+            self.signals.send_catch_log(
+                signal=info_signals.product_ids_resolved, product_ids=product_ids, spider=spider
+            )
 
+    @timed_process_item
     def process_item(self, item, spider):
         # ProductItem만 처리
         if not isinstance(item, ProductItem):
@@ -212,8 +698,6 @@ class MySQLProductPipeline:
 
         adapter = ItemAdapter(item)
 
-        naver_product_id = adapter.get('naver_product_id')
-
         # 어떤 카테고리를 FK로 쓸지: sub → medium → major 우선
         naver_category_id = (
             adapter.get('sub_id')
@@ -221,7 +705,21 @@ class MySQLProductPipeline:
             or adapter.get('major_id')
         )
 
-        category_id = self._get_category_id_by_naver_id(naver_category_id)
+        key = str(naver_category_id) if naver_category_id else None
+        hit = key is None or key in self.category_id_cache
+        self._count_lookup('category_id', hit)
+        if hit:
+            category_id = self.category_id_cache.get(key)
+            return self._buffer_product(category_id, adapter, naver_category_id, item, spider)
+
+        # 캐시에 없으면 라이터 스레드에서 조회한 뒤 버퍼에 넣음
+        d = self._get_category_id_by_naver_id(naver_category_id)
+        d.addCallback(self._buffer_product, adapter, naver_category_id, item, spider)
+        return d
+
+    def _buffer_product(self, category_id, adapter, naver_category_id, item, spider):
+        naver_product_id = adapter.get('naver_product_id')
+
         if not category_id:
             spider.logger.warning(
                 f"[PRODUCT] category not found for naver_category_id={naver_category_id}, "
@@ -230,141 +728,255 @@ class MySQLProductPipeline:
             # FK 에러를 막기 위해 그냥 스킵
             return item
 
-        mall_name = adapter.get('mall_name')
-        name = adapter.get('name')
-        detail_url = adapter.get('detail_url')
-
-        # 숫자 필드 변환 (DB 타입에 맞춤)
-        price = adapter.get('price')  # NOT NULL이라 0 기본
-        original_price = adapter.get('original_price')
-        discount_rate = adapter.get('discount_rate')
-        delivery_fee = adapter.get('delivery_fee')
-        rating = adapter.get('rating')
-        review_count = adapter.get('review_count')
-        ranking = adapter.get('ranking')
-
-        sql = """
-        INSERT INTO product (
+        # 숫자 필드는 스파이더에서 이미 DB 타입에 맞게 정제됨 (price는 NOT NULL)
+        row = (
             naver_product_id,
             category_id,
-            mall_name,
-            name,
+            adapter.get('mall_name'),
+            adapter.get('name'),
+            adapter.get('original_price'),
+            adapter.get('discount_rate'),
+            adapter.get('price'),
+            adapter.get('delivery_fee'),
+            adapter.get('rating'),
+            adapter.get('review_count'),
+            adapter.get('ranking'),
+            adapter.get('detail_url'),
+        )
+        # 마지막으로 기록한 행과 같으면 SQL 없이 통과 (스냅샷 파이프라인은 IN 조회로 id 확보)
+        if self.fingerprints is not None and not self.fingerprints.changed(
+            naver_product_id, product_fingerprint(*row[1:])
+        ):
+            if self.stats:
+                self.stats.inc_value('mysql/product/unchanged')
+            return item
+        return self._add_row(row, item, spider)
+    
+
+
+class MySQLProductSnapshotPipeline(BufferedMySQLPipeline):
+    # 샤드 실행에서는 여러 대분류에 걸친 상품을 두 샤드가 같은 snapshot_time으로 기록할 수 있으므로
+    # 키가 겹치면 먼저 기록된 행을 그대로 둠 (배치 전체가 실패하지 않게)
+    INSERT_SQL = """
+        INSERT INTO product_snapshot (
+            product_id,
+            snapshot_time,
             original_price,
             discount_rate,
             price,
             delivery_fee,
             rating,
             review_count,
-            ranking,
-            detail_url
+            ranking
         )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            category_id    = VALUES(category_id),
-            mall_name      = VALUES(mall_name),
-            name           = VALUES(name),
-            original_price = VALUES(original_price),
-            discount_rate  = VALUES(discount_rate),
-            price          = VALUES(price),
-            delivery_fee   = VALUES(delivery_fee),
-            rating         = VALUES(rating),
-            review_count   = VALUES(review_count),
-            ranking        = VALUES(ranking),
-            detail_url     = VALUES(detail_url),
-            updated_at     = CURRENT_TIMESTAMP
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE product_id = product_id
         """
 
-        try:
-            self.cursor.execute(
-                sql,
-                (
-                    naver_product_id,
-                    category_id,
-                    mall_name,
-                    name,
-                    original_price,
-                    discount_rate,
-                    price,
-                    delivery_fee,
-                    rating,
-                    review_count,
-                    ranking,
-                    detail_url,
-                )
-            )
-        except Exception as e:
-            spider.logger.error(f"[PRODUCT] DB error: {e}")
-
-        return item
-    
+    batch_size_setting = 'MYSQL_SNAPSHOT_BATCH_SIZE'
+    flush_interval_setting = 'MYSQL_SNAPSHOT_FLUSH_INTERVAL'
+    stats_prefix = 'mysql/snapshot'
 
+    MODES = ('full', 'delta')
 
-class MySQLProductSnapshotPipeline:
-    def __init__(self, host, user, password, db, port, charset):
-        self.host = host
-        self.user = user
-        self.password = password
-        self.db_name = db
-        self.port = port
-        self.charset = charset
-        self.conn = None
-        self.cursor = None
-        # naver_product_id -> product.id 캐시
-        self.product_id_cache = {}
+    def __init__(self, pool, writer, stats=None, signals=None, batch_size=1, flush_interval=0,
+                 preload_ids=False, mode='full', keyframe_hours=0):
+        super().__init__(
+            pool, writer, stats=stats, signals=signals,
+            batch_size=batch_size, flush_interval=flush_interval,
+        )
+        if mode not in self.MODES:
+            raise ValueError(f"지원하지 않는 MYSQL_SNAPSHOT_MODE 입니다: {mode}")
+        # delta 모드: 추적 필드가 바뀐 상품만 기록 (product.id → 마지막 상태 fingerprint)
+        # keyframe_hours마다 한 번은 모든 상품을 기록 (0이면 keyframe 없음)
+        self.state = SnapshotStateIndex() if mode == 'delta' else None
+        self.keyframe_hours = keyframe_hours
+        self.keyframe = False
+        # naver_product_id -> product.id 캐시 (상품 수가 많아도 메모리를 덜 쓰는 정렬 배열 인덱스)
+        # from_crawler에서 crawler 공용으로 교체 (데몬 모드에서는 다음 실행까지 이어짐)
+        self.preload_ids = preload_ids
+        self.product_id_cache = ProductIdIndex()
+        # 아직 product_id를 모르는 행: naver_product_id -> [행(product_id 제외), ...]
+        # (product_id까지 확정된 행은 self.buffer)
+        self.pending = {}
+        self.pending_count = 0
+        # 지금 id를 확정하는 중인 naver_product_id
+        self.resolving = set()
+        # 중복 제거 파이프라인이 category_id 갱신용으로 다시 통과시킨 상품 (from_crawler에서 연결)
+        self.seen_products = None
 
     @classmethod
     def from_crawler(cls, crawler):
-        settings = crawler.settings
-        return cls(
-            host=settings.get('MYSQL_HOST'),
-            user=settings.get('MYSQL_USER'),
-            password=settings.get('MYSQL_PASSWORD'),
-            db=settings.get('MYSQL_DB'),
-            port=settings.getint('MYSQL_PORT'),
-            charset=settings.get('MYSQL_CHARSET'),
+        pipeline = super().from_crawler(crawler)
+        pipeline.seen_products = SeenProducts.from_crawler(crawler)
+        pipeline.product_id_cache = ProductIdIndex.from_crawler(crawler)
+        # 상품 파이프라인이 기록한 id를 별도 조회 없이 넘겨받음
+        crawler.signals.connect(
+            pipeline._on_product_ids_resolved, signal=info_signals.product_ids_resolved
         )
+        return pipeline
 
-    def open_spider(self, spider):
-        self.conn = pymysql.connect(
-            host=self.host,
-            user=self.user,
-            password=self.password,
-            db=self.db_name,
-            port=self.port,
-            charset=self.charset,
-            cursorclass=pymysql.cursors.DictCursor,
-            autocommit=True,
-        )
-        self.cursor = self.conn.cursor()
-        spider.logger.info("MySQLProductSnapshotPipeline: DB 연결 완료")
+    @classmethod
+    def options_from_settings(cls, settings):
+        options = super().options_from_settings(settings)
+        options['preload_ids'] = settings.getbool('MYSQL_SNAPSHOT_PRELOAD_IDS', False)
+        options['mode'] = settings.get('MYSQL_SNAPSHOT_MODE', 'full')
+        options['keyframe_hours'] = settings.getint('MYSQL_SNAPSHOT_KEYFRAME_HOURS', 0)
+        return options
+
+    def _is_keyframe(self, snapshot_time):
+        """snapshot_time이 keyframe_hours 간격(로컬 시각 기준)에 걸리면 keyframe 실행"""
+        if not self.keyframe_hours:
+            return False
+        hours = (snapshot_time - datetime(1970, 1, 1)) // timedelta(hours=1)
+        return hours % self.keyframe_hours == 0
 
-    def close_spider(self, spider):
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
-        spider.logger.info("MySQLProductSnapshotPipeline: DB 연결 종료")
-
-    def _get_product_id_by_naver_product_id(self, naver_product_id):
-        """네이버 상품 ID -> product.id 조회 (FK). 캐시 사용."""
-        if not naver_product_id:
+    def open_spider(self, spider):
+        super().open_spider(spider)
+
+        loads = []
+        if self.state is not None:
+            self.keyframe = self._is_keyframe(spider.snapshot_time)
+            if self.stats:
+                self.stats.set_value('mysql/snapshot/keyframe', self.keyframe)
+            # keyframe 실행은 모두 기록하므로 상태가 필요 없음
+            if not self.keyframe:
+                loads.append(self._preload(spider, self.state, '스냅샷 상태', 'preloaded_states'))
+        # 이전 실행에서 이어받아 이미 적재된 인덱스는 다시 읽지 않음
+        if self.preload_ids and not self.product_id_cache.loaded:
+            loads.append(self._preload(spider, self.product_id_cache, '상품 id', 'preloaded_ids'))
+
+        if not loads:
             return None
+        return defer.DeferredList(loads, fireOnOneErrback=True, consumeErrors=True)
 
-        key = str(naver_product_id)
+    def _preload(self, spider, index, label, stat):
+        """아이템이 들어오기 전에 라이터 스레드에서 index.load로 일괄 적재"""
+        started = time.perf_counter()
 
-        # 캐시 확인
-        if key in self.product_id_cache:
-            return self.product_id_cache[key]
+        def _loaded(count):
+            elapsed = time.perf_counter() - started
+            spider.logger.info(
+                f"MySQLProductSnapshotPipeline: {label} {count}개 적재 ({elapsed:.1f}s)"
+            )
+            if self.stats:
+                self.stats.set_value(f'mysql/snapshot/{stat}', count)
+
+        return self.writer.run(index.load, self.pool).addCallback(_loaded)
+
+    def _on_product_ids_resolved(self, product_ids, spider):
+        """상품 배치 기록 직후 호출: 캐시 갱신 + 대기 중인 행을 버퍼로 이동."""
+        self.product_id_cache.update(product_ids)
+
+        if not self.pending:
+            return
+
+        for naver_product_id, product_id in product_ids.items():
+            rows = self.pending.pop(naver_product_id, None)
+            if rows:
+                self.pending_count -= len(rows)
+                self.buffer.extend((product_id,) + row for row in rows)
+
+    def _select_product_ids(self, keys):
+        """라이터 스레드에서 실행: 배치당 한 번의 IN 조회"""
+        placeholders = ', '.join(['%s'] * len(keys))
+        sql = f"SELECT id, naver_product_id FROM product WHERE naver_product_id IN ({placeholders})"
+        with self.pool.cursor() as cursor:
+            cursor.execute(sql, keys)
+            return {str(row['naver_product_id']): row['id'] for row in cursor.fetchall()}
+
+    def _resolve_pending(self, keys, spider):
+        """이번 실행에서 상품 단계를 거치지 않은 행은 배치당 한 번의 IN 조회로 id 확보."""
+        keys = [key for key in keys if key in self.pending]
+        if not keys:
+            return defer.succeed(None)
+
+        def _apply(found):
+            self._on_product_ids_resolved(found, spider)
+
+            # 그래도 못 찾은 상품은 스냅샷 스킵(FK 에러 방지)
+            for naver_product_id in keys:
+                rows = self.pending.pop(naver_product_id, None)
+                if rows is None:
+                    continue
+                self.pending_count -= len(rows)
+                spider.logger.warning(
+                    f"[PRODUCT_SNAPSHOT] product not found for naver_product_id={naver_product_id}"
+                )
+                if self.stats:
+                    self.stats.inc_value('mysql/snapshot/skipped_rows', len(rows))
+
+        return self._run_sql(self._select_product_ids, keys).addCallback(_apply)
+
+    def _has_unflushed(self):
+        return bool(self.buffer or self.pending)
+
+    def flush(self, spider):
+        """product_id를 확정한 뒤 스냅샷을 multi-row INSERT로 기록."""
+        self.last_flush = time.monotonic()
+        keys = [key for key in self.pending if key not in self.resolving]
+        if not self.buffer and not keys:
+            return defer.succeed(None)
+
+        d = defer.succeed(None)
+        if keys:
+            # 지금 대기 중인 상품들만 대상으로: 상품 버퍼/진행 중인 기록을 먼저 끝내서 id를 넘겨받고,
+            # 그래도 모르는 것만 DB에서 조회
+            self.resolving.update(keys)
+
+            def _resolved(result):
+                self.resolving.difference_update(keys)
+                return result
+
+            d.addCallback(lambda _: self.signals.send_catch_log_deferred(
+                signal=info_signals.product_flush_requested, spider=spider
+            ))
+            d.addCallback(lambda _: self._resolve_pending(keys, spider))
+            d.addBoth(_resolved)
+        d.addCallback(lambda _: self._write_buffer(spider))
+        return self._track(d)
+
+    def _write_buffer(self, spider):
+        if not self.buffer:
+            return None
+        rows, self.buffer = self.buffer, []
+        if self.state is None or self.keyframe:
+            return self._write_batch(spider, self.INSERT_SQL, rows)
+        rows, states = self._changed_rows(rows)
+        if not rows:
+            return None
+        d = self._write_batch(spider, self.INSERT_SQL, rows)
+        d.addCallback(self._remember_states, states)
+        return d
 
-        sql = "SELECT id FROM product WHERE naver_product_id = %s LIMIT 1"
-        self.cursor.execute(sql, (key,))
-        row = self.cursor.fetchone()
-        if row:
-            product_id = row['id']
-            self.product_id_cache[key] = product_id
-            return product_id
-        return None
+    def _changed_rows(self, rows):
+        """delta 모드: 마지막 상태와 같은 행은 버림 (행 = product_id, snapshot_time, 추적 필드...)
 
+        남은 행과 그 (product_id, fingerprint) 목록을 돌려준다. 상태는 기록이 끝난 뒤에 갱신.
+        """
+        changed, states = [], {}
+        for row in rows:
+            fingerprint = snapshot_fingerprint(*row[2:])
+            # 같은 배치에 같은 상품이 두 번 오면 앞 행 기준으로 비교
+            if row[0] in states:
+                if states[row[0]] == fingerprint:
+                    continue
+            elif not self.state.changed(row[0], fingerprint):
+                continue
+            changed.append(row)
+            states[row[0]] = fingerprint
+        if self.stats:
+            self.stats.inc_value('mysql/snapshot/delta_skipped', len(rows) - len(changed))
+        return changed, states
+
+    def _remember_states(self, result, states):
+        # 기록에 실패한 배치(None)는 상태를 갱신하지 않아 다음 실행에 다시 기록됨
+        if result is not None:
+            for product_id, fingerprint in states.items():
+                self.state.remember(product_id, fingerprint)
+        return result
+
+    @timed_process_item
     def process_item(self, item, spider):
         # ProductItem만 처리
         if not isinstance(item, ProductItem):
@@ -373,61 +985,39 @@ class MySQLProductSnapshotPipeline:
         adapter = ItemAdapter(item)
 
         naver_product_id = adapter.get('naver_product_id')
-        product_id = self._get_product_id_by_naver_product_id(naver_product_id)
+        if not naver_product_id:
+            return item
 
-        if not product_id:
-            spider.logger.warning(
-                f"[PRODUCT_SNAPSHOT] product not found for naver_product_id={naver_product_id}"
-            )
-            # product 테이블에 없는 상품은 스냅샷 스킵(FK 에러 방지)
+        # 이번 실행에서 이미 스냅샷을 남긴 상품
+        if self.seen_products is not None and self.seen_products.pop_upgraded(naver_product_id):
+            if self.stats:
+                self.stats.inc_value('dedup/snapshots_skipped')
             return item
 
         # 숫자 필드 (스파이더에서 이미 정제했다고 가정)
-        original_price = adapter.get('original_price')
-        discount_rate = adapter.get('discount_rate')
-        price = adapter.get('price')
-        delivery_fee = adapter.get('delivery_fee')
-        rating = adapter.get('rating')
-        review_count = adapter.get('review_count')
-        ranking = adapter.get('ranking')
-
-        sql = """
-        INSERT INTO product_snapshot (
-            product_id,
-            snapshot_time,
-            original_price,
-            discount_rate,
-            price,
-            delivery_fee,
-            rating,
-            review_count,
-            ranking
+        row = (
+            spider.snapshot_time,   # ← 여기서 실행 고정 시간 사용
+            adapter.get('original_price'),
+            adapter.get('discount_rate'),
+            adapter.get('price'),
+            adapter.get('delivery_fee'),
+            adapter.get('rating'),
+            adapter.get('review_count'),
+            adapter.get('ranking'),
         )
-        VALUES (
-            %s,
-            %s,
-            %s, %s, %s, %s, %s, %s, %s
-        )
-        """
 
-        try:
-            self.cursor.execute(
-                sql,
-                (
-                    product_id,
-                    spider.snapshot_time,   # ← 여기서 실행 고정 시간 사용
-                    original_price,
-                    discount_rate,
-                    price,
-                    delivery_fee,
-                    rating,
-                    review_count,
-                    ranking,
-                )
-            )
+        key = str(naver_product_id)
+        product_id = self.product_id_cache.get(key)
+        self._count_lookup('product_id', bool(product_id))
+        if product_id:
+            self.buffer.append((product_id,) + row)
+        else:
+            self.pending.setdefault(key, []).append(row)
+            self.pending_count += 1
 
-        except Exception as e:
-            # spider.logger.error(f"[PRODUCT_SNAPSHOT] DB error: {e}")
-            pass
+        # id 확정 중인 행은 곧 버퍼로 넘어오므로 다시 flush를 걸지 않음
+        waiting = 0 if self.resolving else self.pending_count
+        if len(self.buffer) + waiting >= self.batch_size:
+            self.flush(spider)
 
-        return item
\ No newline at end of file
+        return self._with_backpressure(item)
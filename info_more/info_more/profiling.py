@@ -0,0 +1,363 @@
+# info_more/profiling.py
+# 필요할 때만 켜는 실행 프로파일링 (PROFILE_MODES가 비어 있으면 확장이 로드되지 않아 비용 없음)
+#
+#   scrapy crawl naver -s PROFILE_MODES=cpu                 # 리액터 스레드 CPU 프로파일 (cProfile)
+#   scrapy crawl naver -s PROFILE_MODES=cpu -s PROFILE_CPU_ENGINE=pyinstrument   # 샘플링 (pip install pyinstrument)
+#   scrapy crawl naver -s PROFILE_MODES=memory,sql          # tracemalloc 스냅샷 + SQL 타이밍 기록
+#
+#   python -m info_more.profiling .scrapy/profiles/naver-20260101T0600 [이전 실행 디렉터리]   # 요약 / 비교
+#
+# 결과는 PROFILE_DIR/<스파이더>-<snapshot_time>[-shardN]/ 아래에 모드별 파일로 남는다.
+#   cpu.prof / cpu.txt      cProfile 통계 (pstats로 읽음) / 상위 함수 (pyinstrument면 cpu.html / cpu.txt)
+#   memory-NNN.tracemalloc  PROFILE_MEMORY_INTERVAL초마다 tracemalloc 스냅샷 (요약 명령이 증가한 할당 위치를 보여 줌)
+#   memory.txt              스냅샷마다 현재 / 최대 추적 메모리
+#   sql.jsonl               SQL 한 번마다 {t, pipeline, operation, rows, wait_ms, ms}
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
+from twisted.internet import task
+
+logger = logging.getLogger(__name__)
+
+MODES = ('cpu', 'memory', 'sql')
+CPU_ENGINES = ('cprofile', 'pyinstrument')
+PROFILER_FILES = ('tracemalloc.py', 'cProfile.py', 'pstats.py', 'profiling.py')
+
+# crawler 하나당 하나 (프로파일러 확장이 열고 닫고, 파이프라인이 기록)
+_sql_traces = weakref.WeakKeyDictionary()
+
+# tracemalloc은 프로세스 전체에 하나. 이 모듈이 시작한 추적만, 쓰는 프로파일러가 모두 끝났을 때 멈춘다
+# (데몬 모드처럼 한 프로세스에서 실행이 이어지거나 겹쳐도 다른 코드가 켠 추적은 건드리지 않음)
+_tracemalloc_users = set()
+_tracemalloc_owned = False
+
+
+def _start_tracemalloc(user, frames):
+    global _tracemalloc_owned
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        _tracemalloc_owned = True
+        _tracemalloc_users.clear()
+    _tracemalloc_users.add(user)
+
+
+def _stop_tracemalloc(user):
+    global _tracemalloc_owned
+    _tracemalloc_users.discard(user)
+    if _tracemalloc_owned and not _tracemalloc_users:
+        _tracemalloc_owned = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def _modes(settings):
+    modes = settings.getlist('PROFILE_MODES', [])
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        raise ValueError(f"지원하지 않는 PROFILE_MODES 입니다: {unknown} (가능: {', '.join(MODES)})")
+    return modes
+
+
+class SQLTrace:
+    """파이프라인 SQL 한 번마다 한 줄씩 JSON Lines로 기록 (라이터 스레드에서 호출)"""
+
+    def __init__(self):
+        self.file = None
+        self.started = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """PROFILE_MODES에 sql이 없으면 None (파이프라인에서 건너뜀)"""
+        if 'sql' not in _modes(crawler.settings):
+            return None
+        trace = _sql_traces.get(crawler)
+        if trace is None:
+            trace = _sql_traces[crawler] = cls()
+        return trace
+
+    def open(self, path):
+        # 실행마다 새 디렉터리에 새 파일 (이전 실행의 파일이 열려 있으면 먼저 닫음)
+        self.close()
+        with self._lock:
+            self.file = open(path, 'w', encoding='utf-8', buffering=1024 * 1024)
+            self.started = time.perf_counter()
+
+    def record(self, pipeline, operation, wait, elapsed, rows=None):
+        with self._lock:
+            if self.file is None:
+                return
+            self.file.write(json.dumps({
+                't': round(time.perf_counter() - self.started, 4),
+                'pipeline': pipeline,
+                'operation': operation,
+                'rows': rows,
+                'wait_ms': round(wait * 1000, 3),
+                'ms': round(elapsed * 1000, 3),
+            }) + '\n')
+
+    def close(self):
+        with self._lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class CrawlProfiler:
+    """PROFILE_MODES로 켠 프로파일러를 spider_opened ~ spider_closed 동안 실행하는 확장"""
+
+    def __init__(self, crawler, modes, root, cpu_engine='cprofile', cpu_interval=0.001,
+                 memory_interval=60.0, memory_frames=1, memory_top=25):
+        if cpu_engine not in CPU_ENGINES:
+            raise ValueError(f"지원하지 않는 PROFILE_CPU_ENGINE 입니다: {cpu_engine}")
+        self.crawler = crawler
+        self.modes = modes
+        self.root = root
+        self.cpu_engine = cpu_engine
+        self.cpu_interval = cpu_interval
+        self.memory_interval = memory_interval
+        self.memory_frames = memory_frames
+        self.memory_top = memory_top
+        self.directory = None
+        self.profiler = None
+        self.memory_loop = None
+        self.snapshots = 0
+        self.sql_trace = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        modes = _modes(settings)
+        if not modes:
+            raise NotConfigured
+        profiler = cls(
+            crawler,
+            modes,
+            root=data_path(settings.get('PROFILE_DIR', 'profiles'), createdir=True),
+            cpu_engine=settings.get('PROFILE_CPU_ENGINE', 'cprofile'),
+            cpu_interval=settings.getfloat('PROFILE_CPU_INTERVAL', 0.001),
+            memory_interval=settings.getfloat('PROFILE_MEMORY_INTERVAL', 60),
+            memory_frames=settings.getint('PROFILE_MEMORY_FRAMES', 1),
+            memory_top=settings.getint('PROFILE_MEMORY_TOP', 25),
+        )
+        profiler.sql_trace = SQLTrace.from_crawler(crawler)
+        crawler.signals.connect(profiler.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(profiler.spider_closed, signal=signals.spider_closed)
+        return profiler
+
+    def _directory(self, spider):
+        name = f'{spider.name}-{spider.snapshot_time:%Y%m%dT%H%M}'
+        shard = getattr(spider, 'shard', None)
+        if shard is not None:
+            name += f'-shard{shard}'
+        # 같은 snapshot_time으로 이어서 실행한 경우 앞 실행의 프로파일을 덮어쓰지 않음
+        path = os.path.join(self.root, name)
+        attempt = 1
+        while os.path.exists(path):
+            attempt += 1
+            path = os.path.join(self.root, f'{name}-{attempt}')
+        os.makedirs(path)
+        return path
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def spider_opened(self, spider):
+        self.directory = self._directory(spider)
+        self.snapshots = 0
+        if 'memory' in self.modes:
+            if tracemalloc.is_tracing():
+                spider.logger.info("CrawlProfiler: 이미 켜져 있는 tracemalloc을 그대로 사용 (PROFILE_MEMORY_FRAMES 무시)")
+            _start_tracemalloc(self, self.memory_frames)
+            self._take_snapshot()
+            self.memory_loop = task.LoopingCall(self._take_snapshot)
+            self.memory_loop.start(self.memory_interval, now=False)
+        if self.sql_trace is not None:
+            self.sql_trace.open(self._path('sql.jsonl'))
+        # CPU 프로파일은 마지막에 시작해 다른 프로파일러 준비 시간이 섞이지 않게
+        if 'cpu' in self.modes:
+            self._start_cpu()
+        spider.logger.info(f"CrawlProfiler: {', '.join(self.modes)} → {self.directory}")
+
+    def _start_cpu(self):
+        if self.cpu_engine == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError as e:
+                raise ImportError("PROFILE_CPU_ENGINE=pyinstrument에는 pyinstrument가 필요합니다: pip install pyinstrument") from e
+            self.profiler = Profiler(interval=self.cpu_interval)
+            self.profiler.start()
+        else:
+            import cProfile
+
+            # cProfile은 시작한 스레드(리액터 스레드)만 측정
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def _stop_cpu(self):
+        profiler, self.profiler = self.profiler, None
+        if self.cpu_engine == 'pyinstrument':
+            profiler.stop()
+            with open(self._path('cpu.html'), 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+            with open(self._path('cpu.txt'), 'w', encoding='utf-8') as f:
+                f.write(profiler.output_text(unicode=True))
+            return
+        import pstats
+
+        profiler.disable()
+        profiler.dump_stats(self._path('cpu.prof'))
+        with open(self._path('cpu.txt'), 'w', encoding='utf-8') as f:
+            stats = pstats.Stats(profiler, stream=f).strip_dirs()
+            stats.sort_stats('cumulative').print_stats(40)
+            stats.sort_stats('tottime').print_stats(40)
+
+    def _take_snapshot(self):
+        """스냅샷을 파일로 남기고 현재/최대 사용량을 memory.txt에 한 줄 기록
+
+        스냅샷 비교(compare_to)는 할당마다 파이썬으로 묶는 작업이라 실행 중에는 하지 않고
+        python -m info_more.profiling 으로 나중에 한다.
+        """
+        if not tracemalloc.is_tracing():
+            logger.warning("CrawlProfiler: 다른 코드가 tracemalloc을 멈춰 메모리 스냅샷을 건너뜀")
+            return
+        snapshot = tracemalloc.take_snapshot()
+        snapshot.dump(self._path(f'memory-{self.snapshots:03d}.tracemalloc'))
+        current, peak = tracemalloc.get_traced_memory()
+        with open(self._path('memory.txt'), 'a', encoding='utf-8') as f:
+            f.write(
+                f'스냅샷 {self.snapshots:03d} +{self._elapsed():.0f}s '
+                f'현재 {current / 1024:.0f}KB 최대 {peak / 1024:.0f}KB\n'
+            )
+        self.snapshots += 1
+
+    def _elapsed(self):
+        start_time = self.crawler.stats.get_value('start_time')
+        if start_time is None:
+            return 0.0
+        return (datetime.now(timezone.utc) - start_time).total_seconds()
+
+    def spider_closed(self, spider, reason):
+        if self.profiler is not None:
+            self._stop_cpu()
+        if self.memory_loop is not None:
+            if self.memory_loop.running:
+                self.memory_loop.stop()
+            self.memory_loop = None
+            self._take_snapshot()
+            _stop_tracemalloc(self)
+        if self.sql_trace is not None:
+            self.sql_trace.close()
+        spider.logger.info(f"CrawlProfiler: 프로파일 저장 {self.directory}")
+
+
+def summarize_sql(path):
+    """sql.jsonl → {(pipeline, operation): 요약}"""
+    samples = defaultdict(list)
+    rows = defaultdict(int)
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            key = (record['pipeline'], record['operation'])
+            samples[key].append(record['ms'])
+            rows[key] += record['rows'] or 0
+    summary = {}
+    for key, values in samples.items():
+        values.sort()
+        summary[key] = {
+            'count': len(values),
+            'rows': rows[key],
+            'total_ms': round(sum(values), 1),
+            'p50_ms': values[len(values) // 2],
+            'p90_ms': values[min(int(len(values) * 0.9), len(values) - 1)],
+        }
+    return summary
+
+
+def memory_growth(baseline_path, path, limit=25):
+    """두 tracemalloc 스냅샷 파일 사이에 가장 많이 늘어난 할당 위치 (프로파일러 자신은 제외)"""
+    baseline = tracemalloc.Snapshot.load(baseline_path)
+    snapshot = tracemalloc.Snapshot.load(path)
+    growth = []
+    # compare_to는 size_diff의 절댓값 순이라 크게 줄어든 위치가 늘어난 위치 사이에 섞여 있음
+    for stat in snapshot.compare_to(baseline, 'lineno'):
+        if len(growth) >= limit:
+            break
+        if stat.size_diff <= 0:
+            continue
+        if os.path.basename(stat.traceback[0].filename) in PROFILER_FILES:
+            continue
+        growth.append(stat)
+    return growth
+
+
+def summarize_cpu(path, limit=20):
+    """cpu.prof → [(함수, 자체 시간 s, 누적 시간 s)] 자체 시간 순"""
+    import pstats
+
+    stats = pstats.Stats(path).strip_dirs()
+    entries = [
+        (pstats.func_std_string(func), tottime, cumtime)
+        for func, (_, _, tottime, cumtime, _) in stats.stats.items()
+    ]
+    entries.sort(key=lambda entry: -entry[1])
+    return entries[:limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="프로파일 요약 (이전 실행 디렉터리를 주면 차이도 표시)")
+    parser.add_argument('run', help="프로파일 디렉터리 (PROFILE_DIR/<스파이더>-<snapshot_time>)")
+    parser.add_argument('baseline', nargs='?', help="비교할 이전 실행 디렉터리")
+    args = parser.parse_args(argv)
+
+    cpu_path = os.path.join(args.run, 'cpu.prof')
+    if os.path.exists(cpu_path):
+        baseline = {}
+        baseline_path = args.baseline and os.path.join(args.baseline, 'cpu.prof')
+        if baseline_path and os.path.exists(baseline_path):
+            baseline = {name: tottime for name, tottime, _ in summarize_cpu(baseline_path, limit=None)}
+        print("## CPU (자체 시간 상위)")
+        for name, tottime, cumtime in summarize_cpu(cpu_path):
+            diff = f' ({tottime - baseline[name]:+.3f}s)' if name in baseline else ''
+            print(f'  {tottime:8.3f}s{diff:>12} 누적 {cumtime:8.3f}s  {name}')
+
+    sql_path = os.path.join(args.run, 'sql.jsonl')
+    if os.path.exists(sql_path):
+        baseline = {}
+        baseline_path = args.baseline and os.path.join(args.baseline, 'sql.jsonl')
+        if baseline_path and os.path.exists(baseline_path):
+            baseline = summarize_sql(baseline_path)
+        print("## SQL (파이프라인 / 작업)")
+        for (pipeline, operation), summary in sorted(summarize_sql(sql_path).items()):
+            before = baseline.get((pipeline, operation))
+            diff = f" (이전 {before['total_ms']}ms)" if before else ''
+            print(
+                f"  {pipeline}.{operation}: {summary['count']}회, 행 {summary['rows']}, "
+                f"합 {summary['total_ms']}ms{diff}, p50 {summary['p50_ms']}ms, p90 {summary['p90_ms']}ms"
+            )
+
+    snapshots = sorted(name for name in os.listdir(args.run) if name.endswith('.tracemalloc'))
+    if len(snapshots) >= 2:
+        # 첫 스냅샷은 파이프라인 캐시 적재 전이므로 두 번째부터 마지막까지의 증가를 봄
+        first = snapshots[1] if len(snapshots) > 2 else snapshots[0]
+        print(f"## 메모리 증가 ({first} → {snapshots[-1]})")
+        for stat in memory_growth(os.path.join(args.run, first), os.path.join(args.run, snapshots[-1])):
+            print(f'  {stat}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
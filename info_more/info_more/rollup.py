@@ -0,0 +1,354 @@
+# info_more/rollup.py
+# product_snapshot 롤업 + 보존 기간 정리
+#
+# 오래된 스냅샷을 상품별 일/주 단위 집계(product_snapshot_daily / product_snapshot_weekly)로 줄이고,
+# 보존 기간이 지난 원본 행은 지운다. 크롤링 사이에 따로 실행한다.
+#
+#   cd info_more && python -m info_more.rollup [--max-days N]
+#
+# - 하루치를 product_id 구간(ROLLUP_CHUNK_PRODUCTS)으로 나눠 구간마다 짧은 트랜잭션으로 처리
+# - 진행 위치(day, product_cursor)를 snapshot_rollup_state에 같은 트랜잭션으로 기록 → 중단돼도 이어서 실행
+# - 집계는 INSERT ... SELECT ... ON DUPLICATE KEY UPDATE 라서 같은 구간을 다시 처리해도 결과가 같음
+# - 원본 삭제는 롤업이 끝난 날짜 이전만, ROLLUP_PURGE_BATCH 행씩
+
+import argparse
+import json
+import logging
+import time
+from datetime import date, datetime, timedelta
+
+from info_more.db import MySQLConnectionPool
+from info_more.schema import ROLLUP_TABLES_DDL, drop_snapshot_partitions_before
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'daily'
+
+# 하루 [day_start, day_end) 안의 product_id 구간 [lo, hi) 집계
+DAILY_ROLLUP_SQL = """
+    INSERT INTO product_snapshot_daily (
+        product_id, day, samples, min_price, max_price, avg_price,
+        last_price, last_original_price, last_discount_rate, last_delivery_fee, last_rating, last_ranking,
+        first_review_count, last_review_count, review_delta, last_snapshot_time
+    )
+    SELECT a.product_id, %s, a.samples, a.min_price, a.max_price, a.avg_price,
+           l.price, l.original_price, l.discount_rate, l.delivery_fee, l.rating, l.ranking,
+           f.review_count, l.review_count, l.review_count - f.review_count, a.last_time
+    FROM (
+        SELECT product_id, COUNT(*) AS samples,
+               MIN(price) AS min_price, MAX(price) AS max_price, AVG(price) AS avg_price,
+               MIN(snapshot_time) AS first_time, MAX(snapshot_time) AS last_time
+        FROM product_snapshot
+        WHERE snapshot_time >= %s AND snapshot_time < %s
+          AND product_id >= %s AND product_id < %s
+        GROUP BY product_id
+    ) a
+    JOIN product_snapshot f ON f.product_id = a.product_id AND f.snapshot_time = a.first_time
+    JOIN product_snapshot l ON l.product_id = a.product_id AND l.snapshot_time = a.last_time
+    ON DUPLICATE KEY UPDATE
+        samples             = VALUES(samples),
+        min_price           = VALUES(min_price),
+        max_price           = VALUES(max_price),
+        avg_price           = VALUES(avg_price),
+        last_price          = VALUES(last_price),
+        last_original_price = VALUES(last_original_price),
+        last_discount_rate  = VALUES(last_discount_rate),
+        last_delivery_fee   = VALUES(last_delivery_fee),
+        last_rating         = VALUES(last_rating),
+        last_ranking        = VALUES(last_ranking),
+        first_review_count  = VALUES(first_review_count),
+        last_review_count   = VALUES(last_review_count),
+        review_delta        = VALUES(review_delta),
+        last_snapshot_time  = VALUES(last_snapshot_time)
+    """
+
+# 주 [week_start, week_end) 의 일 집계를 product_id 구간 [lo, hi) 단위로 다시 묶음
+WEEKLY_ROLLUP_SQL = """
+    INSERT INTO product_snapshot_weekly (
+        product_id, week_start, days, samples, min_price, max_price, avg_price,
+        last_price, last_original_price, last_discount_rate, last_delivery_fee, last_rating, last_ranking,
+        first_review_count, last_review_count, review_delta, last_snapshot_time
+    )
+    SELECT a.product_id, %s, a.days, a.samples, a.min_price, a.max_price, a.avg_price,
+           l.last_price, l.last_original_price, l.last_discount_rate, l.last_delivery_fee,
+           l.last_rating, l.last_ranking,
+           f.first_review_count, l.last_review_count, l.last_review_count - f.first_review_count,
+           l.last_snapshot_time
+    FROM (
+        SELECT product_id, COUNT(*) AS days, SUM(samples) AS samples,
+               MIN(min_price) AS min_price, MAX(max_price) AS max_price,
+               SUM(avg_price * samples) / SUM(samples) AS avg_price,
+               MIN(day) AS first_day, MAX(day) AS last_day
+        FROM product_snapshot_daily
+        WHERE day >= %s AND day < %s
+          AND product_id >= %s AND product_id < %s
+        GROUP BY product_id
+    ) a
+    JOIN product_snapshot_daily f ON f.product_id = a.product_id AND f.day = a.first_day
+    JOIN product_snapshot_daily l ON l.product_id = a.product_id AND l.day = a.last_day
+    ON DUPLICATE KEY UPDATE
+        days                = VALUES(days),
+        samples             = VALUES(samples),
+        min_price           = VALUES(min_price),
+        max_price           = VALUES(max_price),
+        avg_price           = VALUES(avg_price),
+        last_price          = VALUES(last_price),
+        last_original_price = VALUES(last_original_price),
+        last_discount_rate  = VALUES(last_discount_rate),
+        last_delivery_fee   = VALUES(last_delivery_fee),
+        last_rating         = VALUES(last_rating),
+        last_ranking        = VALUES(last_ranking),
+        first_review_count  = VALUES(first_review_count),
+        last_review_count   = VALUES(last_review_count),
+        review_delta        = VALUES(review_delta),
+        last_snapshot_time  = VALUES(last_snapshot_time)
+    """
+
+SAVE_STATE_SQL = """
+    INSERT INTO snapshot_rollup_state (job, day, product_cursor)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE day = VALUES(day), product_cursor = VALUES(product_cursor)
+    """
+
+
+def week_start(day):
+    """day가 속한 주의 월요일"""
+    return day - timedelta(days=day.weekday())
+
+
+class SnapshotRollup:
+    """product_snapshot → 일/주 집계 + 보존 기간 정리
+
+    raw_retention_days  : 원본 스냅샷 보존 일수 (롤업이 끝난 날짜만 지움)
+    daily_retention_days: 일 집계 보존 일수 (0이면 계속 보존, 주 집계는 항상 보존)
+    keyframe_hours      : delta 스냅샷 모드의 keyframe 간격. 원본 보존 기간이 이보다 짧으면
+                          state_at으로 상태를 복원할 수 없으므로 거부한다.
+    delta               : delta 스냅샷 모드 여부. keyframe 없이(keyframe_hours=0) 쓰면 바뀌지 않은
+                          상품은 처음 기록한 행만 남으므로 원본을 지우지 않는다.
+
+    집계 행은 그날(그 주) 스냅샷이 있는 상품만 생긴다. delta 모드에서는 값이 바뀐 시점과
+    keyframe 행만 집계되므로 samples는 실행 횟수가 아니라 기록된 행 수다.
+    """
+
+    def __init__(self, pool, raw_retention_days=35, daily_retention_days=0, chunk_products=5000,
+                 purge_batch=5000, pause=0.05, keyframe_hours=0, delta=False):
+        if raw_retention_days < 1:
+            raise ValueError(f"ROLLUP_RAW_RETENTION_DAYS는 1 이상이어야 합니다: {raw_retention_days}")
+        if keyframe_hours and raw_retention_days * 24 <= keyframe_hours:
+            raise ValueError(
+                f"ROLLUP_RAW_RETENTION_DAYS({raw_retention_days}일)가 "
+                f"MYSQL_SNAPSHOT_KEYFRAME_HOURS({keyframe_hours}시간)보다 길어야 합니다"
+            )
+        if daily_retention_days and daily_retention_days < 14:
+            # 주 집계를 다시 계산할 때 이번 주 일 집계가 남아 있어야 함
+            raise ValueError(
+                f"ROLLUP_DAILY_RETENTION_DAYS는 0 또는 14 이상이어야 합니다: {daily_retention_days}"
+            )
+        self.pool = pool
+        self.raw_retention_days = raw_retention_days
+        self.daily_retention_days = daily_retention_days
+        self.chunk_products = max(int(chunk_products), 1)
+        self.purge_batch = max(int(purge_batch), 1)
+        self.pause = pause
+        # keyframe 없는 delta 모드에서는 원본 행이 상품의 유일한 상태 기록일 수 있음
+        self.purge_raw = not delta or bool(keyframe_hours)
+
+    @classmethod
+    def from_settings(cls, settings, pool=None):
+        keyframe_hours = 0
+        delta = settings.get('MYSQL_SNAPSHOT_MODE', 'full') == 'delta'
+        if delta:
+            keyframe_hours = settings.getint('MYSQL_SNAPSHOT_KEYFRAME_HOURS', 0)
+        return cls(
+            pool=pool or MySQLConnectionPool.from_settings(settings),
+            raw_retention_days=settings.getint('ROLLUP_RAW_RETENTION_DAYS', 35),
+            daily_retention_days=settings.getint('ROLLUP_DAILY_RETENTION_DAYS', 0),
+            chunk_products=settings.getint('ROLLUP_CHUNK_PRODUCTS', 5000),
+            purge_batch=settings.getint('ROLLUP_PURGE_BATCH', 5000),
+            pause=settings.getfloat('ROLLUP_PAUSE', 0.05),
+            keyframe_hours=keyframe_hours,
+            delta=delta,
+        )
+
+    def ensure_tables(self):
+        with self.pool.cursor() as cursor:
+            for ddl in ROLLUP_TABLES_DDL:
+                cursor.execute(ddl)
+
+    def _fetchone(self, sql, args=()):
+        with self.pool.cursor() as cursor:
+            cursor.execute(sql, args)
+            return cursor.fetchone()
+
+    def _load_state(self):
+        """(다음에 처리할 날짜, 그 날짜에서 다음 product_id). 처음이면 가장 오래된 스냅샷 날짜부터"""
+        row = self._fetchone(
+            "SELECT day, product_cursor FROM snapshot_rollup_state WHERE job = %s", (JOB_NAME,)
+        )
+        if row:
+            return row['day'], row['product_cursor']
+        row = self._fetchone("SELECT MIN(snapshot_time) AS first_time FROM product_snapshot")
+        if not row or row['first_time'] is None:
+            return None, 0
+        return row['first_time'].date(), 0
+
+    def _id_range(self, table, column, start, end):
+        row = self._fetchone(
+            f"SELECT MIN(product_id) AS lo, MAX(product_id) AS hi FROM {table} "
+            f"WHERE {column} >= %s AND {column} < %s",
+            (start, end),
+        )
+        if not row or row['lo'] is None:
+            return None
+        return row['lo'], row['hi'] + 1
+
+    def _chunks(self, lo, hi):
+        for start in range(lo, hi, self.chunk_products):
+            yield start, min(start + self.chunk_products, hi)
+
+    def _rollup_day(self, day, cursor_from):
+        """day의 원본을 product_id 구간마다 집계하고 진행 위치를 같은 트랜잭션으로 저장"""
+        day_start = datetime.combine(day, datetime.min.time())
+        day_end = day_start + timedelta(days=1)
+        rows = 0
+        id_range = self._id_range('product_snapshot', 'snapshot_time', day_start, day_end)
+        if id_range:
+            lo, hi = id_range
+            for start, end in self._chunks(max(lo, cursor_from), hi):
+                with self.pool.transaction() as cursor:
+                    cursor.execute(DAILY_ROLLUP_SQL, (day, day_start, day_end, start, end))
+                    rows += cursor.rowcount
+                    cursor.execute(SAVE_STATE_SQL, (JOB_NAME, day, end))
+                if self.pause:
+                    time.sleep(self.pause)
+        return rows
+
+    def _rollup_week(self, day):
+        """day가 속한 주의 주 집계를 다시 계산 (일 집계 기준, 같은 값으로 덮어씀)"""
+        start_day = week_start(day)
+        end_day = start_day + timedelta(days=7)
+        rows = 0
+        id_range = self._id_range('product_snapshot_daily', 'day', start_day, end_day)
+        if id_range:
+            for start, end in self._chunks(*id_range):
+                with self.pool.transaction() as cursor:
+                    cursor.execute(WEEKLY_ROLLUP_SQL, (start_day, start_day, end_day, start, end))
+                    rows += cursor.rowcount
+                if self.pause:
+                    time.sleep(self.pause)
+        return rows
+
+    def _purge(self, sql, before):
+        """before 이전 행을 purge_batch씩 지움 (한 번에 짧게 잠그도록 LIMIT, autocommit)"""
+        deleted = 0
+        while True:
+            with self.pool.cursor() as cursor:
+                cursor.execute(sql, (before, self.purge_batch))
+                count = cursor.rowcount
+            deleted += count
+            if count < self.purge_batch:
+                return deleted
+            if self.pause:
+                time.sleep(self.pause)
+
+    def run(self, today=None, max_days=None):
+        """완료된 날짜(today 이전)까지 롤업 후 보존 기간 정리. 처리 결과 요약 dict를 돌려줌"""
+        today = today or date.today()
+        summary = {'days': 0, 'daily_rows': 0, 'weekly_rows': 0, 'purged_raw': 0, 'purged_daily': 0}
+
+        self.ensure_tables()
+        day, cursor_from = self._load_state()
+        while day is not None and day < today:
+            if max_days is not None and summary['days'] >= max_days:
+                break
+            started = time.perf_counter()
+            next_day = day + timedelta(days=1)
+            daily = self._rollup_day(day, cursor_from)
+            # 주 집계는 주의 마지막 날짜와 이번 실행의 마지막 날짜에서만 다시 계산
+            # (도중에 멈춰도 다음 실행의 마지막 날짜에서 그 주 전체를 다시 계산함)
+            last_of_run = next_day >= today or (max_days is not None and summary['days'] + 1 >= max_days)
+            weekly = 0
+            if last_of_run or week_start(next_day) != week_start(day):
+                weekly = self._rollup_week(day)
+            with self.pool.cursor() as cursor:
+                cursor.execute(SAVE_STATE_SQL, (JOB_NAME, next_day, 0))
+            logger.info(
+                f"롤업 {day}: 일 집계 {daily}행, 주 집계 {weekly}행 "
+                f"({time.perf_counter() - started:.1f}s)"
+            )
+            summary['days'] += 1
+            summary['daily_rows'] += daily
+            summary['weekly_rows'] += weekly
+            day, cursor_from = next_day, 0
+
+        # 원본은 보존 기간이 지났고 롤업도 끝난 날짜만 삭제
+        rolled_until = day if day is not None else today
+        raw_cutoff = min(today - timedelta(days=self.raw_retention_days), rolled_until)
+        if self.purge_raw:
+            # 파티션 테이블이면 통째로 지난 달은 DROP PARTITION, 남은 경계 구간만 DELETE
+            summary['purged_raw'] = drop_snapshot_partitions_before(self.pool, raw_cutoff)
+            summary['purged_raw'] += self._purge(
+                "DELETE FROM product_snapshot WHERE snapshot_time < %s LIMIT %s",
+                datetime.combine(raw_cutoff, datetime.min.time()),
+            )
+        else:
+            logger.warning(
+                "delta 스냅샷 모드에 keyframe이 없어(MYSQL_SNAPSHOT_KEYFRAME_HOURS=0) "
+                "원본 스냅샷 정리를 건너뜀"
+            )
+        if self.daily_retention_days:
+            summary['purged_daily'] = self._purge(
+                "DELETE FROM product_snapshot_daily WHERE day < %s LIMIT %s",
+                min(today - timedelta(days=self.daily_retention_days), week_start(rolled_until)),
+            )
+        return summary
+
+
+HISTORY_SQL = {
+    'daily': """
+        SELECT day AS period, samples, min_price, max_price, avg_price, last_price, last_ranking,
+               last_review_count, review_delta
+        FROM product_snapshot_daily
+        WHERE product_id = %s AND day >= %s AND day < %s
+        ORDER BY day
+        """,
+    'weekly': """
+        SELECT week_start AS period, samples, min_price, max_price, avg_price, last_price, last_ranking,
+               last_review_count, review_delta
+        FROM product_snapshot_weekly
+        WHERE product_id = %s AND week_start >= %s AND week_start < %s
+        ORDER BY week_start
+        """,
+}
+
+
+def price_history(pool, product_id, since, until, grain='daily'):
+    """상품 하나의 가격 이력 (집계 테이블의 기본키 범위 조회라 원본이 커져도 빠름)"""
+    if grain not in HISTORY_SQL:
+        raise ValueError(f"지원하지 않는 grain 입니다: {grain}")
+    if grain == 'weekly':
+        since = week_start(since)
+    with pool.cursor() as cursor:
+        cursor.execute(HISTORY_SQL[grain], (product_id, since, until))
+        return cursor.fetchall()
+
+
+def main(argv=None):
+    from scrapy.utils.project import get_project_settings
+
+    parser = argparse.ArgumentParser(description="product_snapshot 일/주 롤업 + 보존 기간 정리")
+    parser.add_argument('--max-days', type=int, default=None, help="이번 실행에서 롤업할 최대 일수")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(name)s] %(levelname)s: %(message)s')
+    settings = get_project_settings()
+    rollup = SnapshotRollup.from_settings(settings)
+    try:
+        summary = rollup.run(max_days=args.max_days)
+    finally:
+        rollup.pool.close()
+    print(json.dumps(summary, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
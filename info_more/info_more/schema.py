@@ -0,0 +1,453 @@
+# info_more/schema.py
+# category / product / product_snapshot (+ 롤업 테이블) 스키마와 버전별 마이그레이션
+#
+#   cd info_more
+#   python -m info_more.schema status                 # 적용된 버전
+#   python -m info_more.schema migrate                # 남은 마이그레이션 적용
+#   python -m info_more.schema check                  # 파이프라인이 기대하는 인덱스 확인 (없으면 종료 코드 1)
+#   python -m info_more.schema partition [--months-ahead N]   # product_snapshot 월 단위 RANGE 파티션 (선택)
+#
+# 마이그레이션은 schema_migrations 테이블에 기록한다.
+# MySQL DDL은 트랜잭션으로 묶이지 않으므로 각 단계는 다시 실행해도 되게(IF NOT EXISTS / 존재 확인) 작성한다.
+
+import argparse
+import sys
+from datetime import date, datetime
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from info_more.db import MySQLConnectionPool, MySQLWriter
+
+MIGRATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version     INT NOT NULL PRIMARY KEY,
+        description VARCHAR(200) NOT NULL,
+        applied_at  DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+
+# check/status는 DDL 없이 읽기만 하므로 schema_migrations 테이블이 있는지 먼저 확인
+MIGRATIONS_TABLE_SQL = """
+    SELECT COUNT(*) AS tables
+    FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'schema_migrations'
+    """
+
+BASE_TABLES_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS category (
+        id                INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        naver_category_id VARCHAR(20) NOT NULL,
+        name              VARCHAR(100) NOT NULL,
+        level             TINYINT NOT NULL,
+        parent_id         INT NULL,
+        created_at        DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE KEY uk_category_naver_id (naver_category_id),
+        KEY idx_category_parent (parent_id),
+        CONSTRAINT fk_category_parent FOREIGN KEY (parent_id) REFERENCES category (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS product (
+        id               INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        naver_product_id VARCHAR(30) NOT NULL,
+        category_id      INT NOT NULL,
+        mall_name        VARCHAR(100),
+        name             VARCHAR(500),
+        original_price   INT,
+        discount_rate    INT,
+        price            INT NOT NULL,
+        delivery_fee     INT,
+        rating           DECIMAL(3, 2),
+        review_count     INT,
+        ranking          INT,
+        detail_url       VARCHAR(1000),
+        created_at       DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at       DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE KEY uk_product_naver_id (naver_product_id),
+        KEY idx_product_category (category_id),
+        CONSTRAINT fk_product_category FOREIGN KEY (category_id) REFERENCES category (id)
+    )
+    """,
+    # 기본키 (product_id, snapshot_time): 상품별 이력/최신 값 조회가 클러스터드 인덱스 범위 조회로 끝나고,
+    # 모든 unique 키에 snapshot_time이 들어 있어 나중에 RANGE 파티션으로 바꿀 수 있다.
+    """
+    CREATE TABLE IF NOT EXISTS product_snapshot (
+        product_id     INT NOT NULL,
+        snapshot_time  DATETIME NOT NULL,
+        original_price INT,
+        discount_rate  INT,
+        price          INT NOT NULL,
+        delivery_fee   INT,
+        rating         DECIMAL(3, 2),
+        review_count   INT,
+        ranking        INT,
+        PRIMARY KEY (product_id, snapshot_time),
+        KEY idx_snapshot_time (snapshot_time),
+        CONSTRAINT fk_snapshot_product FOREIGN KEY (product_id) REFERENCES product (id)
+    )
+    """,
+)
+
+ROLLUP_TABLES_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS product_snapshot_daily (
+        product_id          INT NOT NULL,
+        day                 DATE NOT NULL,
+        samples             INT NOT NULL,
+        min_price           INT,
+        max_price           INT,
+        avg_price           DECIMAL(12, 2),
+        last_price          INT,
+        last_original_price INT,
+        last_discount_rate  INT,
+        last_delivery_fee   INT,
+        last_rating         DECIMAL(3, 2),
+        last_ranking        INT,
+        first_review_count  INT,
+        last_review_count   INT,
+        review_delta        INT,
+        last_snapshot_time  DATETIME NOT NULL,
+        PRIMARY KEY (product_id, day),
+        KEY idx_product_snapshot_daily_day (day)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS product_snapshot_weekly (
+        product_id          INT NOT NULL,
+        week_start          DATE NOT NULL,
+        days                INT NOT NULL,
+        samples             INT NOT NULL,
+        min_price           INT,
+        max_price           INT,
+        avg_price           DECIMAL(12, 2),
+        last_price          INT,
+        last_original_price INT,
+        last_discount_rate  INT,
+        last_delivery_fee   INT,
+        last_rating         DECIMAL(3, 2),
+        last_ranking        INT,
+        first_review_count  INT,
+        last_review_count   INT,
+        review_delta        INT,
+        last_snapshot_time  DATETIME NOT NULL,
+        PRIMARY KEY (product_id, week_start),
+        KEY idx_product_snapshot_weekly_week (week_start)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS snapshot_rollup_state (
+        job            VARCHAR(32) NOT NULL PRIMARY KEY,
+        day            DATE NOT NULL,
+        product_cursor INT NOT NULL DEFAULT 0,
+        updated_at     DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+    """,
+)
+
+# 파이프라인/롤업이 기대하는 인덱스: (테이블, 인덱스 이름, 컬럼, unique, 쓰는 곳)
+# 이름이 달라도 같은 컬럼으로 시작하는 인덱스(unique는 컬럼이 정확히 같은 unique 인덱스)가 있으면 통과
+REQUIRED_INDEXES = (
+    ('category', 'uk_category_naver_id', ('naver_category_id',), True,
+     "카테고리 업서트(ON DUPLICATE KEY) / naver_category_id 조회"),
+    ('category', 'idx_category_parent', ('parent_id',), False, "부모 카테고리 FK"),
+    ('product', 'uk_product_naver_id', ('naver_product_id',), True,
+     "상품 업서트(ON DUPLICATE KEY) / naver_product_id → id 조회"),
+    ('product', 'idx_product_category', ('category_id',), False, "카테고리 FK / 카테고리별 상품"),
+    ('product_snapshot', 'idx_snapshot_product_time', ('product_id', 'snapshot_time'), False,
+     "상품별 이력 / 최신 가격(state_at) / 롤업 JOIN"),
+    ('product_snapshot', 'idx_snapshot_time', ('snapshot_time',), False,
+     "시점 범위 조회 / 롤업 / 보존 기간 삭제"),
+    ('product_snapshot_daily', 'PRIMARY', ('product_id', 'day'), True, "일 집계 업서트 / 이력 조회"),
+    ('product_snapshot_weekly', 'PRIMARY', ('product_id', 'week_start'), True, "주 집계 업서트 / 이력 조회"),
+)
+
+INDEXES_SQL = """
+    SELECT TABLE_NAME AS table_name, INDEX_NAME AS index_name, NON_UNIQUE AS non_unique,
+           COLUMN_NAME AS column_name
+    FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE()
+    ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """
+
+
+def _execute_all(statements):
+    def _step(cursor):
+        for sql in statements:
+            cursor.execute(sql)
+    return _step
+
+
+def existing_indexes(cursor):
+    """{테이블: {인덱스 이름: (unique, (컬럼, ...))}}"""
+    cursor.execute(INDEXES_SQL)
+    indexes = {}
+    for row in cursor.fetchall():
+        table = indexes.setdefault(row['table_name'], {})
+        unique, columns = table.get(row['index_name'], (not int(row['non_unique']), ()))
+        table[row['index_name']] = (unique, columns + (row['column_name'],))
+    return indexes
+
+
+def _satisfied(indexes, table, columns, unique):
+    for index_unique, index_columns in indexes.get(table, {}).values():
+        if unique:
+            if index_unique and index_columns == columns:
+                return True
+        elif index_columns[:len(columns)] == columns:
+            return True
+    return False
+
+
+def missing_indexes(cursor):
+    """REQUIRED_INDEXES 중 없는 것 (테이블이 아예 없으면 그 테이블의 요구 사항 전부)"""
+    indexes = existing_indexes(cursor)
+    return [
+        (table, name, columns, unique, purpose)
+        for table, name, columns, unique, purpose in REQUIRED_INDEXES
+        if not _satisfied(indexes, table, columns, unique)
+    ]
+
+
+def _add_missing_indexes(cursor):
+    """손으로 만든 기존 테이블에 빠진 인덱스 추가 (unique 추가는 중복 행이 있으면 실패)"""
+    for table, name, columns, unique, _ in missing_indexes(cursor):
+        if name == 'PRIMARY':
+            raise ValueError(f"{table} 테이블의 기본키가 {columns}가 아닙니다. 테이블을 다시 만들어야 합니다.")
+        kind = 'UNIQUE INDEX' if unique else 'INDEX'
+        cursor.execute(f"ALTER TABLE {table} ADD {kind} {name} ({', '.join(columns)})")
+
+
+# (버전, 설명, 단계(cursor를 받는 함수))
+MIGRATIONS = (
+    (1, "category / product / product_snapshot 테이블", _execute_all(BASE_TABLES_DDL)),
+    (2, "스냅샷 롤업 테이블", _execute_all(ROLLUP_TABLES_DDL)),
+    (3, "파이프라인 조회 경로 인덱스 (기존 테이블 보강)", _add_missing_indexes),
+)
+
+
+def applied_versions(cursor, create=True):
+    """적용된 버전 집합. create=False면 읽기만 한다 (schema_migrations가 없으면 빈 집합 = 버전 0)"""
+    if create:
+        cursor.execute(MIGRATIONS_DDL)
+    else:
+        cursor.execute(MIGRATIONS_TABLE_SQL)
+        if not cursor.fetchone()['tables']:
+            return set()
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row['version'] for row in cursor.fetchall()}
+
+
+def migrate(pool, log=print):
+    """아직 적용하지 않은 마이그레이션을 순서대로 적용. 적용한 버전 목록을 돌려줌"""
+    applied = []
+    with pool.cursor() as cursor:
+        done = applied_versions(cursor)
+        for version, description, step in MIGRATIONS:
+            if version in done:
+                continue
+            log(f"마이그레이션 {version}: {description}")
+            step(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description),
+            )
+            applied.append(version)
+    return applied
+
+
+def check(pool):
+    """크롤링 전에 확인할 문제 목록 (비어 있으면 통과). 운영 DB에서도 돌리므로 SELECT만 한다."""
+    with pool.cursor() as cursor:
+        problems = []
+        latest = MIGRATIONS[-1][0]
+        current = max(applied_versions(cursor, create=False), default=0)
+        if current < latest:
+            problems.append(f"스키마 버전 {current} < {latest}: python -m info_more.schema migrate 필요")
+        for table, name, columns, unique, purpose in missing_indexes(cursor):
+            kind = 'UNIQUE ' if unique else ''
+            problems.append(f"{table}: {kind}인덱스 ({', '.join(columns)}) 없음 [{name}] - {purpose}")
+    return problems
+
+
+# ---------------------------------------------------------------------------
+# product_snapshot 월 단위 RANGE 파티션 (선택)
+# 파티션 테이블은 외래 키를 가질 수 없으므로 fk_snapshot_product를 지운다.
+# 보존 기간이 지난 달은 롤업 작업이 DELETE 대신 DROP PARTITION으로 지운다.
+
+PARTITIONS_SQL = """
+    SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS bound, TABLE_ROWS AS table_rows
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'product_snapshot' AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+    """
+
+
+def _next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def _month_partition(month):
+    """month(1일) 한 달치 파티션 정의"""
+    return f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{_next_month(month):%Y-%m-%d}')"
+
+
+def snapshot_partitions(cursor):
+    """[(이름, 상한 date 또는 None(MAXVALUE), 대략의 행 수)]"""
+    cursor.execute(PARTITIONS_SQL)
+    partitions = []
+    for row in cursor.fetchall():
+        bound = row['bound'].strip("'")
+        upper = None if bound == 'MAXVALUE' else datetime.strptime(bound[:10], '%Y-%m-%d').date()
+        partitions.append((row['name'], upper, row['table_rows'] or 0))
+    return partitions
+
+
+def partition_snapshots(pool, months_ahead=3, today=None, log=print):
+    """파티션이 없으면 가장 오래된 스냅샷 달부터 월 단위로 나누고, 있으면 앞으로 months_ahead달치를 추가"""
+    today = today or date.today()
+    until = today.replace(day=1)
+    for _ in range(months_ahead):
+        until = _next_month(until)
+
+    with pool.cursor() as cursor:
+        partitions = snapshot_partitions(cursor)
+        if not partitions:
+            # 파티션 컬럼이 모든 unique 키(기본키)에 들어 있어야 함
+            primary = existing_indexes(cursor).get('product_snapshot', {}).get('PRIMARY', (True, ()))[1]
+            if 'snapshot_time' not in primary:
+                raise ValueError(
+                    f"product_snapshot 기본키 {primary}에 snapshot_time이 없어 파티션으로 바꿀 수 없습니다"
+                )
+            cursor.execute("SELECT MIN(snapshot_time) AS first_time FROM product_snapshot")
+            first_time = cursor.fetchone()['first_time']
+            month = (first_time.date() if first_time else today).replace(day=1)
+            definitions = []
+            while month <= until:
+                definitions.append(_month_partition(month))
+                month = _next_month(month)
+            definitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+
+            cursor.execute(
+                "SELECT CONSTRAINT_NAME AS name FROM information_schema.TABLE_CONSTRAINTS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'product_snapshot' "
+                "AND CONSTRAINT_TYPE = 'FOREIGN KEY'"
+            )
+            for row in cursor.fetchall():
+                log(f"외래 키 제거: {row['name']} (파티션 테이블은 외래 키 불가)")
+                cursor.execute(f"ALTER TABLE product_snapshot DROP FOREIGN KEY {row['name']}")
+
+            log(f"product_snapshot 파티션 생성: {len(definitions)}개")
+            cursor.execute(
+                "ALTER TABLE product_snapshot PARTITION BY RANGE COLUMNS (snapshot_time) "
+                f"({', '.join(definitions)})"
+            )
+            return len(definitions)
+
+        last_upper = max((upper for _, upper, _ in partitions if upper), default=None)
+        if last_upper is None or partitions[-1][1] is not None:
+            raise ValueError("product_snapshot 파티션이 pmax(MAXVALUE)로 끝나지 않아 자동으로 늘릴 수 없습니다")
+        month = last_upper
+        definitions = []
+        while month <= until:
+            definitions.append(_month_partition(month))
+            month = _next_month(month)
+        if definitions:
+            log(f"product_snapshot 파티션 추가: {len(definitions)}개")
+            definitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+            cursor.execute(
+                f"ALTER TABLE product_snapshot REORGANIZE PARTITION {partitions[-1][0]} "
+                f"INTO ({', '.join(definitions)})"
+            )
+        return len(definitions)
+
+
+def drop_snapshot_partitions_before(pool, cutoff):
+    """상한이 cutoff 이하인(전부 cutoff 이전인) 파티션을 통째로 삭제. 지운 대략의 행 수를 돌려줌"""
+    dropped = 0
+    with pool.cursor() as cursor:
+        for name, upper, rows in snapshot_partitions(cursor):
+            if upper is not None and upper <= cutoff:
+                cursor.execute(f"ALTER TABLE product_snapshot DROP PARTITION {name}")
+                dropped += rows
+    return dropped
+
+
+class SchemaCheck:
+    """크롤링 시작 시 스키마 확인 (MYSQL_SCHEMA_CHECK). 문제가 있으면 경고를 남긴다.
+
+    MYSQL_SCHEMA_CHECK_STRICT일 때만 스파이더를 닫는다
+    (schema_migrations가 없는 기존 DB도 migrate 전까지 그대로 크롤링되게).
+    """
+
+    def __init__(self, crawler, strict=False):
+        self.crawler = crawler
+        self.strict = strict
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('MYSQL_SCHEMA_CHECK', False):
+            raise NotConfigured("MYSQL_SCHEMA_CHECK = False")
+        extension = cls(crawler, strict=settings.getbool('MYSQL_SCHEMA_CHECK_STRICT', False))
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        return extension
+
+    def spider_opened(self, spider):
+        pool = MySQLConnectionPool.from_crawler(self.crawler)
+        d = MySQLWriter.from_crawler(self.crawler).run(check, pool)
+        d.addCallback(self._checked, spider)
+        return d
+
+    def _checked(self, problems, spider):
+        if not problems:
+            spider.logger.info("SchemaCheck: 스키마/인덱스 확인 완료")
+            return
+        if not self.strict:
+            for problem in problems:
+                spider.logger.warning(f"SchemaCheck: {problem}")
+            return
+        for problem in problems:
+            spider.logger.error(f"SchemaCheck: {problem}")
+        self.crawler.engine.close_spider(spider, 'schema_check_failed')
+
+
+def main(argv=None):
+    from scrapy.utils.project import get_project_settings
+
+    parser = argparse.ArgumentParser(description="info_more DB 스키마 관리")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help="적용된 마이그레이션 버전")
+    commands.add_parser('migrate', help="남은 마이그레이션 적용")
+    commands.add_parser('check', help="파이프라인이 기대하는 인덱스 확인")
+    partition = commands.add_parser('partition', help="product_snapshot 월 단위 파티션 생성/추가")
+    partition.add_argument('--months-ahead', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    pool = MySQLConnectionPool.from_settings(get_project_settings(), stats=None)
+    try:
+        if args.command == 'status':
+            with pool.cursor() as cursor:
+                done = applied_versions(cursor, create=False)
+            for version, description, _ in MIGRATIONS:
+                print(f"{'✔' if version in done else ' '} {version}: {description}")
+        elif args.command == 'migrate':
+            applied = migrate(pool)
+            print(f"적용: {applied}" if applied else "이미 최신 버전입니다")
+        elif args.command == 'check':
+            problems = check(pool)
+            for problem in problems:
+                print(problem)
+            if problems:
+                return 1
+            print("OK")
+        elif args.command == 'partition':
+            partition_snapshots(pool, months_ahead=args.months_ahead)
+    finally:
+        pool.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -46,18 +46,40 @@ DOWNLOAD_DELAY = 0
 #SPIDER_MIDDLEWARES = {
 #    "info_more.middlewares.InfoMoreSpiderMiddleware": 543,
 #}
+SPIDER_MIDDLEWARES = {
+    # 끝난 상품 목록 기록 / 재시작 시 건너뛰기 (CHECKPOINT_ENABLED)
+    "info_more.checkpoint.CrawlCheckpoint": 40,
+    # 분산 프런티어에서 꺼낸 요청의 완료 표시 (FRONTIER_URL이 있을 때만)
+    "info_more.frontier.FrontierMiddleware": 50,
+    # 콜백 실행 CPU 시간 / 응답당 아이템 수 (METRICS_ENABLED, 스파이더에 가장 가깝게)
+    "info_more.metrics.ParseTimingMiddleware": 950,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 #DOWNLOADER_MIDDLEWARES = {
 #    "info_more.middlewares.InfoMoreDownloaderMiddleware": 543,
 #}
+DOWNLOADER_MIDDLEWARES = {
+    # 적응형 동시성: RetryMiddleware(550)보다 다운로더 쪽에 두어 재시도 전 429/403도 관찰
+    "info_more.middlewares.InfoMoreDownloaderMiddleware": 585,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
 #EXTENSIONS = {
 #    "scrapy.extensions.telnet.TelnetConsole": None,
 #}
+EXTENSIONS = {
+    # 크롤링 시작 시 스키마/인덱스 확인 (MYSQL_SCHEMA_CHECK)
+    "info_more.schema.SchemaCheck": 500,
+    # STATS_DUMP_PATH가 있으면 종료 시 스탯을 JSON으로 기록 (샤드 실행 보고서)
+    "info_more.shards.ShardStatsDump": 510,
+    # 단계별 지연/처리량 요약 + Prometheus 텍스트 (METRICS_ENABLED)
+    "info_more.metrics.MetricsExporter": 520,
+    # 필요할 때만: scrapy crawl naver -s PROFILE_MODES=cpu,memory,sql
+    "info_more.profiling.CrawlProfiler": 530,
+}
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
@@ -86,6 +108,18 @@ DOWNLOAD_DELAY = 0
 #HTTPCACHE_IGNORE_HTTP_CODES = []
 #HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
 
+# 카테고리 트리 디스크 캐시 (.scrapy/ 아래에 저장)
+# TTL 안이면 카테고리 문서를 요청하지 않고, 지났으면 ETag/Last-Modified로 재검증
+# 트리가 바뀌지 않았으면 CategoryItem 기록을 생략하고 바로 상품 목록 요청으로 진행
+CATEGORY_TREE_CACHE_ENABLED = True
+CATEGORY_TREE_CACHE_PATH = 'category_tree.json'
+CATEGORY_TREE_CACHE_TTL = 43200     # 초
+
+# 상품 카드 추출 엔진
+# 'selector': 카드마다 CSS/XPath 질의 (기존 방식)
+# 'lxml': 파싱된 lxml 트리를 카드당 한 번 순회 (같은 ProductItem, benchmarks/parse_page.py 참고)
+NAVER_PARSER_ENGINE = 'selector'
+
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
 
@@ -96,9 +130,130 @@ MYSQL_USER = 'root'
 MYSQL_PASSWORD = '1234'
 MYSQL_DB = 'naver_store'
 MYSQL_CHARSET = 'utf8mb4'
+# 크롤링 시작 시 info_more.schema의 마이그레이션 버전과 인덱스를 확인 (읽기만 하며 문제는 경고 로그)
+# STRICT면 문제가 있을 때 스파이더 종료 (python -m info_more.schema migrate / check)
+MYSQL_SCHEMA_CHECK = True
+MYSQL_SCHEMA_CHECK_STRICT = False
+
+# 세 MySQL 파이프라인이 공유하는 커넥션 풀
+MYSQL_POOL_SIZE = 4              # 최대 커넥션 수
+MYSQL_POOL_RECYCLE = 3600        # 이 시간(초)보다 오래된 커넥션은 새로 연결
+MYSQL_POOL_PING_INTERVAL = 30    # 이 시간(초) 이상 쉬던 커넥션은 ping으로 확인 후 사용
+MYSQL_POOL_TIMEOUT = 30          # 풀이 가득 찼을 때 최대 대기 시간(초)
+
+# SQL은 리액터 스레드 밖 라이터 스레드에서 실행 (다운로드/파싱과 DB 기록이 겹쳐서 진행)
+MYSQL_WRITER_THREADS = 4         # 라이터 스레드 수 (MYSQL_POOL_SIZE 이하 권장)
+MYSQL_WRITER_QUEUE_SIZE = 16     # 대기/실행 중인 작업이 이만큼 쌓이면 아이템 처리를 멈추고 기다림
 
 ITEM_PIPELINES = {
     'info_more.pipelines.MySQLCategoryPipeline': 300,
+    'info_more.pipelines.ProductDedupPipeline': 350,
     'info_more.pipelines.MySQLProductPipeline': 400,
+    'info_more.pipelines.SnapshotExportPipeline': 450,
     'info_more.pipelines.MySQLProductSnapshotPipeline': 500,
-}
\ No newline at end of file
+}
+# 같은 상품이 대/중/소분류 목록에 여러 번 나올 때 어느 복사본을 남길지 ('first' / 'deepest')
+# 'deepest': 더 깊은 카테고리 복사본이 나중에 오면 상품의 category_id만 갱신 (스냅샷은 한 번)
+PRODUCT_DEDUP_PRECEDENCE = 'deepest'
+
+# 상품 업서트 버퍼 모드
+# MYSQL_PRODUCT_BATCH_SIZE 개가 모이거나 MYSQL_PRODUCT_FLUSH_INTERVAL 초가 지나면
+# 하나의 트랜잭션 안에서 multi-row INSERT ... ON DUPLICATE KEY UPDATE로 기록
+# (1이면 상품마다 바로 기록)
+MYSQL_PRODUCT_BATCH_SIZE = 500
+MYSQL_PRODUCT_FLUSH_INTERVAL = 5.0
+# 마지막으로 기록한 행과 컬럼 값이 모두 같은 상품은 업서트하지 않음 (updated_at도 갱신되지 않음)
+# fingerprint는 시작할 때 product 테이블에서 일괄 계산하거나, 테이블이 그대로면 저장해 둔 파일(.scrapy/)에서 적재
+MYSQL_PRODUCT_SKIP_UNCHANGED = True
+MYSQL_PRODUCT_FINGERPRINT_PATH = 'product_fingerprints.bin'   # 비우면 저장하지 않고 매번 테이블에서 계산
+
+# 스냅샷 버퍼 모드
+# product_id는 상품 파이프라인이 배치 기록 후 넘겨주고, 나머지는 배치당 한 번의 IN 조회로 확보
+MYSQL_SNAPSHOT_BATCH_SIZE = 500
+MYSQL_SNAPSHOT_FLUSH_INTERVAL = 5.0
+# 스냅샷 저장 방식
+# 'full' : 실행마다 모든 상품의 스냅샷 기록
+# 'delta': 가격/할인율/배송비/평점/리뷰 수/랭킹 중 하나라도 바뀐 상품만 기록
+#          (임의 시점의 상태는 info_more.snapshots.state_at으로 복원)
+MYSQL_SNAPSHOT_MODE = 'full'
+MYSQL_SNAPSHOT_KEYFRAME_HOURS = 24   # delta 모드에서 이 간격(시)마다 모든 상품 기록 (0이면 안 함)
+# 시작할 때 알려진 naver_product_id → product.id를 모두 적재 (상품 테이블이 크면 IN 조회가 크게 줄어듦)
+MYSQL_SNAPSHOT_PRELOAD_IDS = False
+
+# 스냅샷 롤업 + 보존 기간 (python -m info_more.rollup, main.py가 매일 03:00에 실행)
+# 완료된 날짜의 product_snapshot을 product_snapshot_daily / product_snapshot_weekly로 집계하고
+# 원본은 ROLLUP_RAW_RETENTION_DAYS 일이 지나면 삭제
+ROLLUP_RAW_RETENTION_DAYS = 35
+ROLLUP_DAILY_RETENTION_DAYS = 0     # 0이면 일 집계는 계속 보존
+ROLLUP_CHUNK_PRODUCTS = 5000        # 트랜잭션 하나가 처리할 product_id 구간 크기
+ROLLUP_PURGE_BATCH = 5000           # DELETE 한 번에 지울 최대 행 수
+ROLLUP_PAUSE = 0.05                 # 구간 사이 쉬는 시간(초): 크롤러 기록과 번갈아 실행되도록
+
+# 스냅샷 컬럼형 내보내기 (분석용, pyarrow 필요)
+# {SNAPSHOT_EXPORT_DIR}/snapshot_date=YYYY-MM-DD/category_id=.../part-YYYYmmddTHHMM[-N].parquet (이어서 실행하면 -2, -3 ...)
+SNAPSHOT_EXPORT_ENABLED = False
+SNAPSHOT_EXPORT_DIR = 'exports/snapshots'
+SNAPSHOT_EXPORT_FORMAT = 'parquet'           # 'parquet' / 'arrow' (Arrow IPC: 메모리 매핑으로 읽기)
+SNAPSHOT_EXPORT_COMPRESSION = 'zstd'
+SNAPSHOT_EXPORT_CATEGORY_LEVEL = 'major'     # 파티션 기준 카테고리 단계 ('major' / 'medium' / 'sub')
+SNAPSHOT_EXPORT_ROW_GROUP_SIZE = 50000       # 파티션마다 이만큼 모이면 row group 하나로 기록
+SNAPSHOT_EXPORT_MAX_BUFFERED_ROWS = 200000   # 전체 버퍼가 이만큼 차면 가장 큰 파티션부터 기록
+
+# 데몬 모드 (python -m info_more.daemon): 한 프로세스에서 스케줄마다 크롤링
+DAEMON_SPIDER = 'naver'
+DAEMON_SCHEDULE = ['00:00', '06:00', '12:00', '18:00']   # 'HH:MM' 매일 / ':MM' 매시
+DAEMON_ROLLUP_AT = '03:00'                               # 스냅샷 롤업 시각 (비우면 실행 안 함)
+DAEMON_WARM_CACHES = True                                # 카테고리/상품 id 캐시를 다음 실행에 넘김
+
+# 샤드 실행 (python -m info_more.shards): 대분류를 나눠 프로세스 여러 개로 크롤링
+SHARD_SPIDER = 'naver'
+SHARD_COUNT = 0                  # 샤드(프로세스) 수, 0이면 CPU 코어 수
+SHARD_RUN_DIR = 'shard_runs'     # .scrapy/ 아래 실행별 계획/로그/스탯/보고서(report.json)
+
+# 분산 프런티어 (info_more/frontier.py): 여러 노드가 상품 목록 요청을 공유 큐에서 나눠 처리
+# FRONTIER_URL이 비어 있으면 FrontierScheduler는 Scrapy 기본 스케줄러와 같음
+SCHEDULER = "info_more.frontier.FrontierScheduler"
+FRONTIER_URL = ''                    # 'sqlite:///frontier.sqlite3' / 'redis://host:6379/0'
+FRONTIER_RUN_ID = ''                 # 노드들이 같은 실행에 참여하도록 맞출 id (FRONTIER_URL을 쓰면 필수)
+FRONTIER_CALLBACKS = ['parse_page']  # 공유 큐로 보낼 요청의 콜백
+FRONTIER_LEASE_SECONDS = 300         # 꺼낸 요청을 이 시간 안에 끝내지 못하면 다른 노드가 다시 가져감
+FRONTIER_MAX_ATTEMPTS = 3            # 임대 만료로 다시 큐에 넣는 최대 횟수
+
+# 체크포인트 (info_more/checkpoint.py): 중단된 실행을 같은 snapshot_time으로 다시 띄우면 끝난 목록은 건너뜀
+CHECKPOINT_ENABLED = True
+CHECKPOINT_DIR = 'checkpoints'            # .scrapy/ 아래 snapshot_time별 파일
+CHECKPOINT_CALLBACKS = ['parse_page']     # 완료를 기록할 요청의 콜백
+CHECKPOINT_INTERVAL = 30                  # 초, 이 간격으로 버퍼를 기록하고 완료 목록을 덧붙임
+
+# 적응형 동시성 (InfoMoreDownloaderMiddleware): 카테고리 API / 상품 목록마다 다운로드 슬롯을 따로 두고
+# 지연 백분위수, 429/403 비율, 비정상 본문 크기를 보고 동시성/지연을 조정 (시작값은 CONCURRENT_REQUESTS_PER_DOMAIN)
+ADAPTIVE_CONCURRENCY_ENABLED = True
+ADAPTIVE_CONCURRENCY_FAMILIES = {
+    'category': ['parse_major_category', 'parse_sub_category'],
+    'listing': ['parse_page'],
+}
+ADAPTIVE_CONCURRENCY_MIN = 1
+ADAPTIVE_CONCURRENCY_MAX = 64
+ADAPTIVE_CONCURRENCY_INTERVAL = 5.0          # 초, 조정 구간
+ADAPTIVE_CONCURRENCY_MIN_SAMPLES = 10        # 구간마다 최소 응답 수
+ADAPTIVE_CONCURRENCY_LATENCY_FACTOR = 3.0    # p90 지연이 기준 지연의 이 배수를 넘으면 줄임
+ADAPTIVE_CONCURRENCY_ANOMALY_RATIO = 0.2     # 본문이 최근 중앙값의 이 비율보다 작으면 차단 페이지로 봄
+ADAPTIVE_CONCURRENCY_ERROR_RATE = 0.1        # 다운로드 오류 비율이 이보다 높으면 백오프
+ADAPTIVE_CONCURRENCY_BASE_DELAY = 0.5        # 초, 첫 백오프 지연 (단계마다 2배, 지터 포함)
+ADAPTIVE_CONCURRENCY_MAX_DELAY = 60.0
+
+# 단계별 계측 (info_more/metrics.py): 다운로드 지연 / 파싱 CPU / 파이프라인 / SQL 시간 / 캐시 적중률
+METRICS_ENABLED = True
+METRICS_INTERVAL = 60          # 초, 이 간격으로 스탯(metrics/...)과 로그에 요약
+METRICS_FILE = ''              # Prometheus 텍스트 파일 경로 (예: node_exporter textfile collector 디렉터리의 info_more.prom)
+METRICS_PORT = 0               # 0이 아니면 http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_HOST = '127.0.0.1'
+
+# 프로파일링 (info_more/profiling.py): 비어 있으면 확장이 로드되지 않음
+PROFILE_MODES = []                 # 'cpu' (리액터 스레드 CPU) / 'memory' (tracemalloc) / 'sql' (SQL 타이밍 기록)
+PROFILE_DIR = 'profiles'           # .scrapy/ 아래 <스파이더>-<snapshot_time>/ 디렉터리
+PROFILE_CPU_ENGINE = 'cprofile'    # 'cprofile' / 'pyinstrument' (샘플링, pip install pyinstrument)
+PROFILE_CPU_INTERVAL = 0.001       # 초, pyinstrument 샘플 간격
+PROFILE_MEMORY_INTERVAL = 60       # 초, tracemalloc 스냅샷 간격
+PROFILE_MEMORY_FRAMES = 1          # 할당 위치마다 남길 스택 깊이 (깊을수록 느림)
+PROFILE_MEMORY_TOP = 25            # memory.txt에 남길 증가 상위 위치 수
@@ -0,0 +1,285 @@
+# info_more/shards.py
+# 샤드 실행: 대분류 카테고리를 N개 샤드로 나눠 샤드마다 scrapy 프로세스 하나씩 실행
+#
+#   cd info_more
+#   python -m info_more.shards               # SHARD_COUNT개(0이면 CPU 코어 수) 프로세스
+#   python -m info_more.shards --shards 4
+#
+# 스크래피 프로세스 하나는 파싱/파이프라인을 한 코어에서만 처리하므로
+# 카탈로그 전체 실행은 대분류 단위로 나눠 여러 코어에서 동시에 돌린다.
+# - 대분류는 지난 실행까지 쌓인 상품 수로 무게를 매겨 가장 가벼운 샤드부터 채운다.
+# - 모든 샤드는 같은 snapshot_time을 쓴다 (샤드 계획 파일에 기록해 스파이더에 넘김).
+# - DB에 아직 없는 대분류는 id 해시로 샤드를 정하므로 어느 샤드에서든 한 번만 크롤링된다.
+# - 샤드별 스탯(ShardStatsDump)을 모아 실행 보고서 하나로 합친다.
+
+import argparse
+import heapq
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import zlib
+from datetime import datetime
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+logger = logging.getLogger(__name__)
+
+# 대분류(부모가 없는 카테고리)별 상품 수. product.category_id는 가장 깊은 카테고리를 가리키므로 최상위 조상까지 올라감
+MAJOR_WEIGHTS_SQL = """
+    SELECT COALESCE(gc.naver_category_id, pc.naver_category_id, c.naver_category_id) AS major_id,
+           COUNT(*) AS products
+    FROM product p
+    JOIN category c ON c.id = p.category_id
+    LEFT JOIN category pc ON pc.id = c.parent_id
+    LEFT JOIN category gc ON gc.id = pc.parent_id
+    GROUP BY major_id
+    """
+
+MAJORS_SQL = "SELECT naver_category_id FROM category WHERE parent_id IS NULL"
+
+# 합칠 때 더하지 않고 최댓값을 쓰는 스탯 (프로세스마다 따로 재는 값)
+MAX_STATS = ('elapsed_time_seconds', 'memusage/max', 'memusage/startup')
+
+
+class ShardPlan:
+    """대분류 id → 샤드 번호 배정과 이번 실행의 snapshot_time"""
+
+    def __init__(self, shards, snapshot_time, weights=None):
+        # shards: 샤드별 대분류 id 목록
+        self.shards = [[str(major_id) for major_id in majors] for majors in shards]
+        self.snapshot_time = snapshot_time
+        self.weights = dict(weights or {})
+        self.owners = {
+            major_id: index
+            for index, majors in enumerate(self.shards)
+            for major_id in majors
+        }
+
+    def __len__(self):
+        return len(self.shards)
+
+    @classmethod
+    def build(cls, weights, count, snapshot_time):
+        """무게가 큰 대분류부터 지금 가장 가벼운 샤드에 넣음 (LPT)"""
+        if count < 1:
+            raise ValueError(f"샤드 수는 1 이상이어야 합니다: {count}")
+        shards = [[] for _ in range(count)]
+        heap = [(0, index) for index in range(count)]
+        for major_id, weight in sorted(weights.items(), key=lambda item: (-item[1], item[0])):
+            load, index = heapq.heappop(heap)
+            shards[index].append(major_id)
+            heapq.heappush(heap, (load + weight, index))
+        return cls(shards, snapshot_time, weights)
+
+    def owner(self, major_id):
+        """대분류를 맡을 샤드 번호. 계획에 없는(새) 대분류는 id 해시로 정함"""
+        major_id = str(major_id)
+        index = self.owners.get(major_id)
+        if index is None:
+            index = zlib.crc32(major_id.encode()) % len(self.shards)
+        return index
+
+    def loads(self):
+        """샤드별 무게 합"""
+        return [sum(self.weights.get(major_id, 0) for major_id in majors) for majors in self.shards]
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'snapshot_time': self.snapshot_time.isoformat(),
+                'shards': self.shards,
+                'weights': self.weights,
+            }, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['shards'], datetime.fromisoformat(data['snapshot_time']), data.get('weights'))
+
+
+def major_weights(pool):
+    """{대분류 naver_category_id: 상품 수}. 상품이 없는 대분류는 0"""
+    with pool.cursor() as cursor:
+        cursor.execute(MAJORS_SQL)
+        weights = {str(row['naver_category_id']): 0 for row in cursor.fetchall()}
+        cursor.execute(MAJOR_WEIGHTS_SQL)
+        for row in cursor.fetchall():
+            weights[str(row['major_id'])] = int(row['products'])
+    return weights
+
+
+def merge_stats(shard_stats):
+    """샤드별 스탯 dict들을 하나로: 숫자는 합(MAX_STATS는 최댓값), 시작/종료 시각은 가장 이른/늦은 값, 나머지는 값 목록"""
+    merged = {}
+    for stats in shard_stats:
+        for key, value in stats.items():
+            if key not in merged:
+                merged[key] = [value] if isinstance(value, str) and key not in ('start_time', 'finish_time') else value
+                continue
+            current = merged[key]
+            if key == 'start_time':
+                merged[key] = min(current, value)
+            elif key == 'finish_time':
+                merged[key] = max(current, value)
+            elif isinstance(value, (int, float)) and isinstance(current, (int, float)):
+                merged[key] = max(current, value) if key in MAX_STATS else current + value
+            elif isinstance(current, list) and value not in current:
+                current.append(value)
+    return merged
+
+
+class ShardStatsDump:
+    """STATS_DUMP_PATH가 설정되면 종료 시 크롤러 스탯을 JSON 파일로 기록 (샤드 실행 보고서용)"""
+
+    def __init__(self, path, stats):
+        self.path = path
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get('STATS_DUMP_PATH')
+        if not path:
+            raise NotConfigured
+        extension = cls(path, crawler.stats)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def spider_closed(self, spider, reason):
+        stats = dict(self.stats.get_stats())
+        stats.setdefault('finish_reason', reason)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_path, self.path)
+
+
+class ShardLauncher:
+    """샤드 계획을 만들고 샤드마다 scrapy crawl 프로세스를 띄운 뒤 스탯을 합침"""
+
+    def __init__(self, settings, count, spider_name='naver', run_root='shard_runs'):
+        self.settings = settings
+        self.count = count
+        self.spider_name = spider_name
+        self.run_root = run_root
+
+    @classmethod
+    def from_settings(cls, settings, count=None):
+        from scrapy.utils.project import data_path
+
+        return cls(
+            settings,
+            count=count or settings.getint('SHARD_COUNT', 0) or os.cpu_count() or 1,
+            spider_name=settings.get('SHARD_SPIDER', 'naver'),
+            run_root=data_path(settings.get('SHARD_RUN_DIR', 'shard_runs')),
+        )
+
+    def _weights(self):
+        from info_more.db import MySQLConnectionPool
+
+        pool = MySQLConnectionPool.from_settings(self.settings)
+        try:
+            return major_weights(pool)
+        except Exception as e:
+            # 첫 실행(빈 DB) 등: 모든 대분류를 id 해시로 나눔
+            logger.warning(f"ShardLauncher: 대분류별 상품 수를 읽지 못해 해시로 나눕니다: {e}")
+            return {}
+        finally:
+            pool.close()
+
+    def plan(self, snapshot_time):
+        weights = self._weights()
+        # 대분류보다 샤드가 많으면 빈 샤드가 생기므로 줄임 (대분류를 모르면 그대로)
+        count = min(self.count, len(weights)) if weights else self.count
+        return ShardPlan.build(weights, max(count, 1), snapshot_time)
+
+    def _command(self, run_dir, index):
+        return [
+            sys.executable, '-m', 'scrapy', 'crawl', self.spider_name,
+            '-a', f"shard_plan={os.path.join(run_dir, 'plan.json')}",
+            '-a', f'shard={index}',
+            '-s', f"STATS_DUMP_PATH={os.path.join(run_dir, f'stats-{index}.json')}",
+            '-s', f"LOG_FILE={os.path.join(run_dir, f'shard-{index}.log')}",
+            # 지문 파일은 샤드들이 서로 덮어쓰게 되므로 샤드 실행에서는 매번 테이블에서 계산
+            '-s', 'MYSQL_PRODUCT_FINGERPRINT_PATH=',
+        ]
+
+    def run(self, snapshot_time=None):
+        """샤드를 모두 실행하고 보고서 dict를 돌려줌 (run_dir/report.json에도 기록)"""
+        snapshot_time = snapshot_time or datetime.now().replace(minute=0, second=0, microsecond=0)
+        run_dir = os.path.join(self.run_root, f'run-{snapshot_time:%Y%m%dT%H%M}')
+        plan_path = os.path.join(run_dir, 'plan.json')
+        if os.path.exists(plan_path):
+            # 같은 snapshot_time으로 다시 실행: 샤드 배정을 그대로 써야 샤드별 체크포인트에서 이어짐
+            plan = ShardPlan.load(plan_path)
+        else:
+            plan = self.plan(snapshot_time)
+            os.makedirs(run_dir, exist_ok=True)
+            plan.save(plan_path)
+        logger.info(f"ShardLauncher: 샤드 {len(plan)}개, 무게 {plan.loads()}, snapshot_time {snapshot_time}")
+
+        started = time.perf_counter()
+        processes = [
+            subprocess.Popen(self._command(run_dir, index))
+            for index in range(len(plan))
+        ]
+        shards = []
+        for index, process in enumerate(processes):
+            returncode = process.wait()
+            stats_path = os.path.join(run_dir, f'stats-{index}.json')
+            try:
+                with open(stats_path, encoding='utf-8') as f:
+                    stats = json.load(f)
+            except (FileNotFoundError, ValueError):
+                stats = {}
+            shards.append({
+                'shard': index,
+                'majors': plan.shards[index],
+                'weight': plan.loads()[index],
+                'returncode': returncode,
+                'stats': stats,
+            })
+            logger.info(
+                f"ShardLauncher: 샤드 {index} 종료 (코드 {returncode}, "
+                f"아이템 {stats.get('item_scraped_count', 0)}개, {stats.get('elapsed_time_seconds', '-')}s)"
+            )
+
+        report = {
+            'snapshot_time': snapshot_time.isoformat(),
+            'wall_s': round(time.perf_counter() - started, 1),
+            'failed': [shard['shard'] for shard in shards if shard['returncode'] != 0],
+            'stats': merge_stats([shard['stats'] for shard in shards]),
+            'shards': shards,
+        }
+        with open(os.path.join(run_dir, 'report.json'), 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        return report
+
+
+def main(argv=None):
+    from scrapy.utils.log import configure_logging
+    from scrapy.utils.project import get_project_settings
+
+    parser = argparse.ArgumentParser(description="info_more 샤드 실행 (대분류별로 나눠 여러 프로세스)")
+    parser.add_argument('--shards', type=int, default=None, help="샤드(프로세스) 수 (기본: SHARD_COUNT, 0이면 CPU 코어 수)")
+    parser.add_argument('--snapshot-time', type=datetime.fromisoformat, default=None,
+                        help="중단된 실행을 이어서 (예: 2026-01-01T06:00, 기본: 지금 시각)")
+    args = parser.parse_args(argv)
+
+    settings = get_project_settings()
+    configure_logging(settings)
+    report = ShardLauncher.from_settings(settings, count=args.shards).run(args.snapshot_time)
+    stats = report['stats']
+    print(
+        f"샤드 {len(report['shards'])}개 완료 ({report['wall_s']}s): "
+        f"아이템 {stats.get('item_scraped_count', 0)}개, 실패한 샤드 {report['failed'] or '없음'}"
+    )
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
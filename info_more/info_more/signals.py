@@ -0,0 +1,14 @@
+# info_more/signals.py
+# 파이프라인 간 데이터 전달용 커스텀 시그널 (scrapy.signals와 같은 방식으로 사용)
+
+# 상품 배치 업서트 후 방금 기록한 naver_product_id → product.id 전달
+# args: product_ids(dict), spider
+product_ids_resolved = object()
+
+# 스냅샷 기록 전에 상품 버퍼를 먼저 flush 하도록 요청
+# args: spider
+product_flush_requested = object()
+
+# 체크포인트 기록 전에 모든 버퍼 파이프라인의 버퍼를 기록해 달라는 요청 (핸들러는 Deferred를 돌려줌)
+# args: spider
+buffers_drain_requested = object()
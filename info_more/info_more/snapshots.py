@@ -0,0 +1,40 @@
+# info_more/snapshots.py
+# product_snapshot 시점 조회
+# delta 모드에서는 바뀐 상품만 기록되므로 "T 시점 상태" = 상품별로 T 이전의 마지막 스냅샷 행
+
+STATE_AT_SQL = """
+    SELECT s.product_id, s.snapshot_time, s.original_price, s.discount_rate, s.price,
+           s.delivery_fee, s.rating, s.review_count, s.ranking
+    FROM product_snapshot s
+    JOIN (
+        SELECT product_id, MAX(snapshot_time) AS snapshot_time
+        FROM product_snapshot
+        WHERE snapshot_time <= %s {where}
+        GROUP BY product_id
+    ) last
+      ON last.product_id = s.product_id
+     AND last.snapshot_time = s.snapshot_time
+    """
+
+
+def state_at(pool, at, lookback_hours=None, product_ids=None):
+    """at 시점의 상품별 스냅샷 상태 (dict 행 목록)
+
+    lookback_hours: 이 시간 안의 행만 본다. keyframe 간격(MYSQL_SNAPSHOT_KEYFRAME_HOURS)을
+                    주면 keyframe 이후만 훑으므로 테이블이 커도 빠르다.
+    product_ids: 특정 상품(product.id)만 조회
+    """
+    where = []
+    args = [at]
+    if lookback_hours:
+        where.append("AND snapshot_time > %s - INTERVAL %s HOUR")
+        args.extend([at, lookback_hours])
+    if product_ids:
+        product_ids = list(product_ids)
+        where.append(f"AND product_id IN ({', '.join(['%s'] * len(product_ids))})")
+        args.extend(product_ids)
+
+    sql = STATE_AT_SQL.format(where=' '.join(where))
+    with pool.cursor() as cursor:
+        cursor.execute(sql, args)
+        return cursor.fetchall()
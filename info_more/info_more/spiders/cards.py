@@ -0,0 +1,158 @@
+# info_more/spiders/cards.py
+# 상품 목록 페이지에서 상품 카드별 원본 값(문자열)을 뽑는 엔진
+# NAVER_PARSER_ENGINE 설정으로 선택하며, 어느 엔진이든 같은 ProductCard를 돌려준다.
+
+from collections import namedtuple
+
+from lxml import etree
+
+CARD_CLASS = 'basicProductCard_view_type_grid2__vKr1n'
+LINK_CLASS = 'basicProductCard_link__urzND'
+MALL_NAME_CLASS = 'productCardMallLink_mall_name__5oWPw'
+ORIGINAL_PRICE_CLASS = 'priceTag_original_price__jyZRY'
+DISCOUNT_RATE_CLASS = 'priceTag_discount_ratio__VE866'
+DELIVERY_FEE_CLASS = 'productCardDeliveryFeeInfo_delivery_text__54pei'
+REVIEW_CLASS = 'productCardReview_text__A9N9N'
+REVIEW_STAR_CLASS = 'productCardReview_star__7iHNO'
+
+# 정제 전 값 (contents_dtl은 data-shp-contents-dtl JSON 문자열)
+ProductCard = namedtuple('ProductCard', [
+    'contents_dtl',
+    'detail_url',
+    'ranking',
+    'mall_name',
+    'original_price',
+    'discount_rate',
+    'delivery_fee',
+    'rating',
+    'review_count',
+])
+
+
+
+### selector 엔진 (카드마다 CSS/XPath 질의)
+def parse_cards_selector(response):
+    for product in response.css(f'ul div.{CARD_CLASS}'):
+        head_meta = product.css(f'a.{LINK_CLASS}')
+        body_id = head_meta.attrib.get('aria-labelledby')
+
+        # 본문
+        body_meta = product.css(f'#{body_id}')
+        review_span = body_meta.css(f'span.{REVIEW_CLASS}:not(.{REVIEW_STAR_CLASS})')
+
+        yield ProductCard(
+            contents_dtl=head_meta.attrib.get('data-shp-contents-dtl'),
+            detail_url=head_meta.attrib.get('href'),
+            ranking=head_meta.attrib.get('data-shp-contents-rank'),
+            mall_name=body_meta.css(f'div span.{MALL_NAME_CLASS}::text').get(),
+            original_price=body_meta.css(f'span.{ORIGINAL_PRICE_CLASS}').xpath("string()").get(),
+            discount_rate=body_meta.css(f'span.{DISCOUNT_RATE_CLASS}::text').get(),
+            delivery_fee=body_meta.css(f'span.{DELIVERY_FEE_CLASS}::text').get(),
+            rating=body_meta.css(f'span.{REVIEW_CLASS}::text').get(),
+            review_count=review_span.xpath("string()").get(),
+        )
+
+
+
+### lxml 엔진 (이미 파싱된 lxml 트리를 카드당 한 번씩 순회)
+def _first_text(el):
+    """::text 의 첫 번째 값과 같음: 직접 자식 텍스트 노드 중 첫 번째"""
+    if el.text is not None:
+        return el.text
+    for child in el:
+        if child.tail is not None:
+            return child.tail
+    return None
+
+
+def _has_div_between(el, top):
+    """'div span' 조건: top(포함)과 el 사이에 div가 있는지"""
+    if el is top:
+        return False
+    parent = el.getparent()
+    while parent is not None:
+        if parent.tag == 'div':
+            return True
+        if parent is top:
+            return False
+        parent = parent.getparent()
+    return False
+
+
+def _parse_body(body):
+    mall_name = original_price = discount_rate = delivery_fee = rating = review_count = None
+    original_price_found = review_found = False
+
+    for el in body.iter('span'):
+        class_attr = el.get('class')
+        if not class_attr:
+            continue
+        classes = class_attr.split()
+
+        if REVIEW_CLASS in classes:
+            if rating is None:
+                rating = _first_text(el)
+            if not review_found and REVIEW_STAR_CLASS not in classes:
+                review_found = True
+                review_count = str(el.xpath('string()'))
+        elif MALL_NAME_CLASS in classes:
+            if mall_name is None and _has_div_between(el, body):
+                mall_name = _first_text(el)
+        elif ORIGINAL_PRICE_CLASS in classes:
+            if not original_price_found:
+                original_price_found = True
+                original_price = str(el.xpath('string()'))
+        elif DISCOUNT_RATE_CLASS in classes:
+            if discount_rate is None:
+                discount_rate = _first_text(el)
+        elif DELIVERY_FEE_CLASS in classes:
+            if delivery_fee is None:
+                delivery_fee = _first_text(el)
+
+    return mall_name, original_price, discount_rate, delivery_fee, rating, review_count
+
+
+def _iter_card_elements(root):
+    for el in root.iter('div'):
+        class_attr = el.get('class')
+        if class_attr and CARD_CLASS in class_attr.split() and next(el.iterancestors('ul'), None) is not None:
+            yield el
+
+
+def parse_cards_lxml(response):
+    for card in _iter_card_elements(response.selector.root):
+        head = None
+        ids = {}
+        for el in card.iter(etree.Element):
+            el_id = el.get('id')
+            if el_id is not None and el_id not in ids:
+                ids[el_id] = el
+            if head is None and el.tag == 'a':
+                class_attr = el.get('class')
+                if class_attr and LINK_CLASS in class_attr.split():
+                    head = el
+
+        attrib = head.attrib if head is not None else {}
+        body = ids.get(str(attrib.get('aria-labelledby')))
+        fields = _parse_body(body) if body is not None else (None,) * 6
+
+        yield ProductCard(
+            attrib.get('data-shp-contents-dtl'),
+            attrib.get('href'),
+            attrib.get('data-shp-contents-rank'),
+            *fields,
+        )
+
+
+
+CARD_PARSERS = {
+    'selector': parse_cards_selector,
+    'lxml': parse_cards_lxml,
+}
+
+
+def get_card_parser(engine):
+    try:
+        return CARD_PARSERS[engine]
+    except KeyError:
+        raise ValueError(f"지원하지 않는 NAVER_PARSER_ENGINE 입니다: {engine}")
@@ -1,9 +1,12 @@
 import scrapy
 import json
-import re
 from urllib.parse import urlencode
 from . import constant as ENV
-from ..items import CategoryItem, ProductItem
+from .cards import get_card_parser
+from ..caches import CategoryIdMap, CategoryTreeCache
+from ..items import CategoryContext, CategoryItem, ProductItem
+from ..normalize import Normalizer
+from ..shards import ShardPlan
 from datetime import datetime
 
 
@@ -12,11 +15,45 @@ class NaverStoreSpider(scrapy.Spider):
 
 
     ### 인스턴스 변수
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, snapshot_time=None, shard_plan=None, shard=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.category_list_url = ENV.CATEGORY_LIST_URL
         self.base_url = ENV.BASE_URL
-        self.snapshot_time = datetime.now().replace(minute=0, second=0, microsecond=0)
+        # -a snapshot_time=2026-01-01T06:00 : 중단된 실행을 같은 시각으로 이어서 (체크포인트)
+        if snapshot_time is not None:
+            self.snapshot_time = datetime.fromisoformat(snapshot_time)
+        else:
+            self.snapshot_time = datetime.now().replace(minute=0, second=0, microsecond=0)
+        # 샤드 실행 (python -m info_more.shards): -a shard_plan=계획 파일 -a shard=번호
+        # 이 샤드가 맡은 대분류만 크롤링하고 snapshot_time은 모든 샤드가 계획 파일의 값을 같이 씀
+        self.shard_plan = None
+        self.shard = None
+        if shard_plan is not None:
+            if shard is None:
+                raise ValueError("shard_plan을 주면 shard 번호도 필요합니다")
+            self.shard_plan = ShardPlan.load(shard_plan)
+            self.shard = int(shard)
+            self.snapshot_time = self.shard_plan.snapshot_time
+        # 상품 카드 추출 엔진 (from_crawler에서 NAVER_PARSER_ENGINE 설정으로 교체)
+        self.card_parser = get_card_parser('selector')
+        # 숫자 정제 (from_crawler에서 실패 횟수를 크롤러 스탯에 세도록 교체)
+        self.normalizer = Normalizer()
+        # 카테고리 트리 디스크 캐시 (CATEGORY_TREE_CACHE_ENABLED일 때 from_crawler에서 생성)
+        self.category_cache = None
+        # 파이프라인이 open_spider에서 DB로부터 적재한 naver_category_id → category.id
+        self.category_ids = CategoryIdMap()
+        # referer → 소분류 목록 요청 헤더 (중분류마다 한 번만 만듦)
+        self.sub_headers = {}
+
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.card_parser = get_card_parser(crawler.settings.get('NAVER_PARSER_ENGINE', 'selector'))
+        spider.normalizer = Normalizer.from_crawler(crawler)
+        spider.category_cache = CategoryTreeCache.from_crawler(crawler)
+        spider.category_ids = CategoryIdMap.from_crawler(crawler)
+        return spider
 
 
 
@@ -27,7 +64,13 @@ class NaverStoreSpider(scrapy.Spider):
         query = urlencode(params, doseq=True)
         url = f'{ENV.CATEGORY_LIST_URL}?{query}'
 
-        yield scrapy.Request(
+        # 캐시가 아직 유효하면 요청 없이 바로 상품 목록 요청으로 (카테고리 기록도 생략)
+        major_data = self._cached_category(url)
+        if major_data is not None:
+            yield from self._follow_major_category(major_data, write_categories=False)
+            return
+
+        yield self._category_request(
             url,
             callback=self.parse_major_category,
             headers=ENV.MAJOR_CATEGORY_HEADERS,
@@ -36,62 +79,119 @@ class NaverStoreSpider(scrapy.Spider):
 
 
 
+    ### 카테고리 캐시 헬퍼
+    def _cached_category(self, url):
+        if self.category_cache is None:
+            return None
+        return self.category_cache.fresh(url)
+
+
+    def _category_request(self, url, callback, headers, cookies, cb_kwargs=None):
+        # 캐시에 있던 문서는 ETag/Last-Modified로 조건부 요청 (304도 콜백으로 받음)
+        meta = None
+        if self.category_cache is not None:
+            validators = self.category_cache.validators(url)
+            if validators:
+                headers = {**headers, **validators}
+                meta = {'handle_httpstatus_list': [304]}
+
+        return scrapy.Request(
+            url,
+            callback=callback,
+            headers=headers,
+            cookies=cookies,
+            cb_kwargs=cb_kwargs,
+            meta=meta,
+        )
+
+
+    def _should_write(self, write_categories, naver_category_id):
+        # 트리가 그대로여도 DB에 없는 카테고리(새 DB 등)는 기록
+        if write_categories:
+            return True
+        if self.category_ids.loaded and str(naver_category_id) not in self.category_ids:
+            return True
+        self.crawler.stats.inc_value('category_cache/writes_skipped')
+        return False
+
+
+    def _load_category(self, response):
+        """(JSON, 바뀌었는지). 바뀌지 않은 트리는 카테고리 기록을 생략한다."""
+        if self.category_cache is None:
+            return json.loads(response.text), True
+        if response.status == 304:
+            return self.category_cache.revalidated(response), False
+        changed = self.category_cache.store(response)
+        return json.loads(response.text), changed
+
+
+
     ### 대분류 카테고리 탐색
     def parse_major_category(self, response):
-        major_data = json.loads(response.text)
+        major_data, changed = self._load_category(response)
+        yield from self._follow_major_category(major_data, write_categories=changed)
+
 
+    def _in_shard(self, major_id):
+        if self.shard_plan is None:
+            return True
+        if self.shard_plan.owner(major_id) != self.shard:
+            self.crawler.stats.inc_value('shard/majors_skipped')
+            return False
+        self.crawler.stats.inc_value('shard/majors')
+        return True
+
+
+    def _follow_major_category(self, major_data, write_categories=True):
         for major in major_data.get('categories', []):
             major_id = major.get('id')
             major_name = major.get('name')
+
+            if not self._in_shard(major_id):
+                continue
             
             # major
-            yield CategoryItem(
-                level=ENV.LEVEL_MAJOR,
-                major_id=major_id,
-                major_name=major_name,
-            )
+            if self._should_write(write_categories, major_id):
+                yield CategoryItem(
+                    level=ENV.LEVEL_MAJOR,
+                    major_id=major_id,
+                    major_name=major_name,
+                )
 
             url = f'{ENV.BASE_URL}/{major_id}'
-            cb_kwargs = {
-                "major_id": major_id,
-                "major_name": major_name,
-            }
+            # 요청에는 카테고리 객체 하나만 (id/이름은 CategoryContext가 들고 있음)
+            category = CategoryContext.intern(major_id, major_name)
 
             yield scrapy.Request(
                 url,
                 callback=self.parse_page,
                 headers=ENV.MAJOR_HEADERS,
                 cookies=ENV.MAJOR_COOKIES,        
-                cb_kwargs=cb_kwargs  
+                cb_kwargs={'category': category}
             )
 
-            yield from self.parse_medium_category(major_id, major_name, major)
+            yield from self.parse_medium_category(category, major, write_categories)
 
 
 
     ### 중분류 카테고리 탐색
-    def parse_medium_category(self, major_id, major_name, major):
+    def parse_medium_category(self, major_category, major, write_categories=True):
         for medium in major.get("children", []):
             medium_id = medium.get('id')
             medium_name = medium.get('name')
             medium_leaf = medium.get('isLeaf')
         
-            yield CategoryItem(
-                level=ENV.LEVEL_MEDIUM,
-                major_id=major_id,
-                major_name=major_name,
-                medium_id=medium_id,
-                medium_name=medium_name,
-                is_leaf=medium_leaf,
-            )
-
-            cb_kwargs={
-                "major_id": major_id,
-                "major_name": major_name,
-                "medium_id": medium_id,
-                "medium_name": medium_name,
-            }    
-
+            if self._should_write(write_categories, medium_id):
+                yield CategoryItem(
+                    level=ENV.LEVEL_MEDIUM,
+                    major_id=major_category.major_id,
+                    major_name=major_category.major_name,
+                    medium_id=medium_id,
+                    medium_name=medium_name,
+                    is_leaf=medium_leaf,
+                )
+
+            category = major_category.medium(medium_id, medium_name)
             url = f'{ENV.BASE_URL}/{medium_id}'
 
             yield scrapy.Request(
@@ -99,174 +199,122 @@ class NaverStoreSpider(scrapy.Spider):
                 callback=self.parse_page,
                 headers=ENV.MEDIUM_HEADERS,
                 cookies=ENV.MEDIUM_COOKIES,        
-                cb_kwargs=cb_kwargs  
+                cb_kwargs={'category': category}
             )
 
             if not medium_leaf:
                 url = f'{ENV.CATEGORY_LIST_URL}/{medium_id}'
-                callback=self.parse_sub_category
-                headers=ENV.MEDIUM_CATEGORY_HEADERS
-                cookies=ENV.MEDIUM_CATEGORY_COOKIES
-                
-                yield scrapy.Request(
+
+                # 소분류 문서도 캐시가 유효하면 요청 없이 진행
+                sub_data = self._cached_category(url)
+                if sub_data is not None:
+                    yield from self._follow_sub_category(sub_data, url, False, category)
+                    continue
+
+                yield self._category_request(
                     url,
-                    callback=callback,
-                    headers=headers,
-                    cookies=cookies,        
-                    cb_kwargs=cb_kwargs  
-                )                
+                    callback=self.parse_sub_category,
+                    headers=ENV.MEDIUM_CATEGORY_HEADERS,
+                    cookies=ENV.MEDIUM_CATEGORY_COOKIES,
+                    cb_kwargs={'category': category},
+                )
 
 
 
     ### 소분류 카테고리 탐색
-    def parse_sub_category(self, response, major_id, major_name, medium_id, medium_name):
-        sub_data = json.loads(response.text)
+    def parse_sub_category(self, response, category):
+        sub_data, changed = self._load_category(response)
+        yield from self._follow_sub_category(sub_data, response.url, changed, category)
+
+
+    def _headers_for_sub(self, referer):
+        # 같은 중분류의 소분류 요청들은 헤더 dict 하나를 같이 씀 (소분류마다 복사하지 않음)
+        headers = self.sub_headers.get(referer)
+        if headers is None:
+            headers = self.sub_headers[referer] = {**ENV.SUB_HEADERS, 'referer': referer}
+        return headers
 
+
+    def _follow_sub_category(self, sub_data, referer, write_categories, medium_category):
+        headers = self._headers_for_sub(referer)
         for sub in sub_data.get('children', []):
             sub_id = sub.get('id')
             sub_name = sub.get('name')
             
-            yield CategoryItem(
-                level=ENV.LEVEL_SUB,
-                major_id=major_id,
-                major_name=major_name,
-                medium_id=medium_id,
-                medium_name=medium_name,
-                sub_id=sub_id,
-                sub_name=sub_name,
-            )
+            if self._should_write(write_categories, sub_id):
+                yield CategoryItem(
+                    level=ENV.LEVEL_SUB,
+                    major_id=medium_category.major_id,
+                    major_name=medium_category.major_name,
+                    medium_id=medium_category.medium_id,
+                    medium_name=medium_category.medium_name,
+                    sub_id=sub_id,
+                    sub_name=sub_name,
+                )
 
             url = f'{ENV.BASE_URL}/{sub_id}'
-            headers = ENV.SUB_HEADERS.copy()
-            headers['referer'] = response.url
 
             yield scrapy.Request(
                 url,
                 callback=self.parse_page,
                 headers=headers,
                 cookies=ENV.SUB_COOKIES,        
-                cb_kwargs={
-                    "major_id": major_id,
-                    "major_name": major_name,
-                    "medium_id": medium_id,
-                    "medium_name": medium_name,
-                    'sub_id': sub_id,
-                    'sub_name': sub_name,
-                }
+                cb_kwargs={'category': medium_category.sub(sub_id, sub_name)}
             )
 
 
 
-    ### 헬퍼 함수(정수 변환)
-    def _to_int(self, val_str):        
-        cleaned = re.sub(r'\D', '', val_str)
-
-        if not cleaned:
-            print(f'{val_str}는 유요한 정수값이 아닙니다.')
-            return None
-        
-        return int(cleaned)
-        
-
-
-    ### 헬퍼 함수(소수 변환)        
-    def _to_float(self, val_str):
-        cleaned = re.sub(r'[^\d.]', '', val_str)
-
-        if not cleaned:
-            print(f'{val_str}는 유요한 소수값이 아닙니다.')
-            return None
-        
-        return float(cleaned)
-    
-
-
-    ### 헬퍼 함수(유효성 검사)
-    def _validation(self, validation_target, validation_type):
-        # 값이 없으면 바로 None
-        if not validation_target:
-            return None
-
-        if validation_type == 'int':
-            return self._to_int(validation_target)
-        elif validation_type == 'float':
-            return self._to_float(validation_target)
-        else:
-            # 지원하지 않는 타입에 대한 방어 코드
-            raise ValueError(f"지원하지 않는 validation_type 입니다: {validation_type}")
-
-
-
     ### 상품 탐색
-    def parse_page(self, response, major_id, major_name, medium_id=None, medium_name=None, sub_id=None, sub_name=None):
-        for product in response.css('ul div.basicProductCard_view_type_grid2__vKr1n'):
+    def parse_page(self, response, category):
+        to_int = self.normalizer.to_int
+        to_float = self.normalizer.to_float
+
+        for card in self.card_parser(response):
         
             # meta 데이터
-            head_meta = product.css('a.basicProductCard_link__urzND')
-            head_data = head_meta.attrib.get('data-shp-contents-dtl')
-            head = json.loads(head_data)
+            head = json.loads(card.contents_dtl)
 
             lookup = {d['key']: d['value'] for d in head}
 
             # 문자 타입
             name = lookup['prod_nm']
             naver_product_id = lookup['chnl_prod_no']
-            detail_url = head_meta.attrib.get('href')
-            body_id = head_meta.attrib.get('aria-labelledby')
+            detail_url = card.detail_url
 
             # 정수 타입
-            price = self._validation(lookup['price'], ENV.VALIDATION_INT_TYPE)
-            ranking = self._validation(head_meta.attrib.get('data-shp-contents-rank'), ENV.VALIDATION_INT_TYPE)            
-
-            if sub_id:
-                category_id = sub_id
-            else:
-                category_id = medium_id
+            price = to_int(lookup['price'])
+            ranking = to_int(card.ranking)            
 
             # 본문
-            body_meta = product.css(f'#{body_id}')
-            mall_name = body_meta.css('div span.productCardMallLink_mall_name__5oWPw::text').get()
+            mall_name = card.mall_name
 
-            # original_price_str = body_meta.css('span.priceTag_original_price__jyZRY::text').get()
-            original_price_span = body_meta.css('span.priceTag_original_price__jyZRY')
-            original_price_str = original_price_span.xpath("string()").get()            
-            original_price = self._validation(original_price_str, ENV.VALIDATION_INT_TYPE)
+            original_price = to_int(card.original_price)
             if original_price is None:
                 original_price = price
             
-            discount_rate_str = body_meta.css('span.priceTag_discount_ratio__VE866::text').get()
-            discount_rate = self._validation(discount_rate_str, ENV.VALIDATION_INT_TYPE)
+            discount_rate = to_int(card.discount_rate)
             if discount_rate is None:
                 discount_rate = 0
 
-            delivery_fee_str = body_meta.css('span.productCardDeliveryFeeInfo_delivery_text__54pei::text').get()
-            delivery_fee = self._validation(delivery_fee_str, ENV.VALIDATION_INT_TYPE)
+            delivery_fee = to_int(card.delivery_fee)
             if delivery_fee is None:
                 delivery_fee = 0
 
-            rating_str = body_meta.css('span.productCardReview_text__A9N9N::text').get()
-            rating = self._validation(rating_str, ENV.VALIDATION_FLOAT_TYPE)
+            rating = to_float(card.rating)
             if rating is None:
                 rating = 0.00
 
-            review_span = body_meta.css('span.productCardReview_text__A9N9N:not(.productCardReview_star__7iHNO)')
-            review_count_str = review_span.xpath("string()").get()
-            review_count = self._validation(review_count_str, ENV.VALIDATION_INT_TYPE)
+            review_count = to_int(card.review_count)
             if review_count is None:
                 review_count = 0
                 
+            # 목록의 모든 상품이 요청의 카테고리 객체 하나를 같이 가리킴
             yield ProductItem(
-                major_id=major_id,
-                major_name=major_name,
-                medium_id=medium_id,
-                medium_name=medium_name,
-                sub_id=sub_id,
-                sub_name=sub_name,
+                category=category,
 
                 name = name,
                 price = price,
                 naver_product_id = naver_product_id,
-                category_id = category_id,
                 detail_url = detail_url,
                 ranking = ranking,
                 mall_name = mall_name,
@@ -275,4 +323,4 @@ class NaverStoreSpider(scrapy.Spider):
                 delivery_fee = delivery_fee,
                 rating = rating,
                 review_count = review_count,
-            )            
\ No newline at end of file
+            )
\ No newline at end of file
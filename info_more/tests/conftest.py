@@ -0,0 +1,39 @@
+# tests/conftest.py
+# 테스트 공통 준비
+
+import asyncio
+
+import pytest
+from scrapy.utils.test import get_crawler
+
+from benchmarks.replay import install_constant
+
+# info_more/spiders/constant.py(저장소에 없음)가 없으면 벤치마크용 상수 모듈을 대신 사용
+install_constant()
+
+
+@pytest.fixture
+def make_crawler(tmp_path):
+    """설정을 덮어쓴 crawler. 디스크를 쓰는 경로는 tmp_path 아래로"""
+
+    def make(spidercls=None, settings=None, **spider_kwargs):
+        crawler = get_crawler(spidercls, {
+            'CATEGORY_TREE_CACHE_PATH': str(tmp_path / 'category_tree.json'),
+            'CHECKPOINT_DIR': str(tmp_path / 'checkpoints'),
+            'PROFILE_DIR': str(tmp_path / 'profiles'),
+            **(settings or {}),
+        })
+        if spidercls is not None:
+            crawler.spider = crawler._create_spider(**spider_kwargs)
+        return crawler
+
+    return make
+
+
+def collect(agen):
+    """비동기 제너레이터의 출력을 리스트로"""
+
+    async def run():
+        return [value async for value in agen]
+
+    return asyncio.run(run())
@@ -0,0 +1,42 @@
+# tests/test_category_cache.py
+# CategoryTreeCache: 리다이렉트된 카테고리 문서도 스파이더가 요청한 URL로 저장/조회
+
+import json
+
+from scrapy import Request
+from scrapy.http import TextResponse
+
+from info_more.caches import CategoryTreeCache
+
+REQUESTED = 'https://smartstore.naver.com/i/v1/categories/50000000'
+REDIRECTED = 'https://smartstore.naver.com/i/v2/categories/50000000'
+BODY = json.dumps({'id': '50000000', 'name': '패션'})
+
+
+def _response(status=200):
+    # 리다이렉트 미들웨어를 거친 응답: request는 새 URL, 처음 URL은 meta['redirect_urls']
+    request = Request(REDIRECTED, meta={'redirect_urls': [REQUESTED]})
+    body = BODY.encode('utf-8') if status == 200 else b''
+    return TextResponse(
+        REDIRECTED, status=status, body=body, encoding='utf-8', request=request,
+        headers={'ETag': '"v1"'} if status == 200 else None,
+    )
+
+
+def test_redirected_document_is_found_by_requested_url(tmp_path):
+    cache = CategoryTreeCache(str(tmp_path / 'category_tree.json'), ttl=3600)
+    assert cache.store(_response())
+
+    assert cache.fresh(REQUESTED) == json.loads(BODY)
+    assert cache.validators(REQUESTED) == {'If-None-Match': '"v1"'}
+    assert REDIRECTED not in cache.entries
+
+
+def test_stale_redirected_document_is_revalidated(tmp_path):
+    cache = CategoryTreeCache(str(tmp_path / 'category_tree.json'), ttl=0)
+    cache.store(_response())
+    cache.entries[REQUESTED]['fetched_at'] -= 10
+    assert cache.fresh(REQUESTED) is None
+
+    assert cache.revalidated(_response(status=304)) == json.loads(BODY)
+    assert not cache.store(_response())
@@ -0,0 +1,111 @@
+# tests/test_checkpoint.py
+# CrawlCheckpoint: 중단된 실행을 같은 snapshot_time으로 다시 띄울 때 끝난 목록 건너뛰기
+
+import json
+import os
+import time
+
+import pytest
+import scrapy
+
+from benchmarks import constant as ENV
+from info_more.checkpoint import FINISHED, CrawlCheckpoint
+from info_more.spiders.naver import NaverStoreSpider
+from tests.conftest import collect
+
+SNAPSHOT_TIME = '2026-01-01T06:00'
+
+MAJOR_DOC = {
+    'categories': [
+        {'id': 100, 'name': '패션', 'children': [
+            {'id': 110, 'name': '여성의류', 'isLeaf': True},
+            {'id': 120, 'name': '남성의류', 'isLeaf': False},
+        ]},
+        {'id': 200, 'name': '식품', 'children': [
+            {'id': 210, 'name': '과일', 'isLeaf': True},
+        ]},
+    ]
+}
+SUB_DOC = {'children': [{'id': 121, 'name': '셔츠'}, {'id': 122, 'name': '바지'}]}
+
+
+def _catalog(category_id):
+    return f'{ENV.BASE_URL}/{category_id}'
+
+
+def _write_tree_cache(path, fetched_at):
+    """대분류 문서와 중분류 120의 소분류 문서가 모두 유효한 카테고리 트리 캐시"""
+    entries = {
+        f'{ENV.CATEGORY_LIST_URL}?depth=1': MAJOR_DOC,
+        f'{ENV.CATEGORY_LIST_URL}/120': SUB_DOC,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            url: {'body': json.dumps(doc), 'sha1': '', 'etag': None, 'last_modified': None, 'fetched_at': fetched_at}
+            for url, doc in entries.items()
+        }, f)
+
+
+def _start(spider):
+    async def start():
+        for item_or_request in spider.start_requests():
+            yield item_or_request
+    return start()
+
+
+@pytest.fixture
+def resumed(make_crawler, tmp_path):
+    """완료 목록 3개가 기록된 체크포인트 + 유효한 트리 캐시로 다시 띄운 (스파이더, 미들웨어)"""
+    _write_tree_cache(tmp_path / 'category_tree.json', time.time())
+    crawler = make_crawler(
+        NaverStoreSpider, {'CHECKPOINT_ENABLED': True, 'CATEGORY_TREE_CACHE_ENABLED': True},
+        snapshot_time=SNAPSHOT_TIME,
+    )
+    spider = crawler.spider
+
+    checkpoint = CrawlCheckpoint.from_crawler(crawler)
+    os.makedirs(checkpoint.root, exist_ok=True)
+    with open(checkpoint._file_name(spider), 'w', encoding='utf-8') as f:
+        f.write(''.join(f'{_catalog(category_id)}\n' for category_id in (100, 110, 121)))
+    checkpoint.spider_opened(spider)
+    checkpoint.loop.stop()
+    return spider, checkpoint
+
+
+def test_resume_skips_completed_listings_from_start(resumed):
+    spider, checkpoint = resumed
+    urls = [request.url for request in collect(checkpoint.process_start(_start(spider)))]
+
+    # 트리 캐시가 유효하므로 목록 요청이 모두 start()에서 나오고, 끝난 목록만 빠짐
+    assert urls == [_catalog(category_id) for category_id in (120, 122, 200, 210)]
+    assert spider.crawler.stats.get_value('checkpoint/skipped') == 3
+    assert spider.crawler.stats.get_value('checkpoint/resumed') == 3
+
+
+def test_resume_skips_completed_listings_from_callbacks(resumed):
+    spider, checkpoint = resumed
+    response = scrapy.http.TextResponse(
+        _catalog(120), request=scrapy.Request(_catalog(120), callback=spider.parse_page),
+    )
+    output = [
+        scrapy.Request(_catalog(category_id), callback=spider.parse_page)
+        for category_id in (121, 122)
+    ]
+    urls = [request.url for request in checkpoint.process_spider_output(response, output)]
+
+    assert urls == [_catalog(122)]
+
+
+def test_finished_checkpoint_starts_over(make_crawler):
+    crawler = make_crawler(NaverStoreSpider, {'CHECKPOINT_ENABLED': True}, snapshot_time=SNAPSHOT_TIME)
+    checkpoint = CrawlCheckpoint.from_crawler(crawler)
+    path = checkpoint._file_name(crawler.spider)
+    os.makedirs(checkpoint.root, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'{_catalog(100)}\n{FINISHED}\n')
+
+    checkpoint.spider_opened(crawler.spider)
+    checkpoint.loop.stop()
+
+    assert checkpoint.completed == set()
+    assert not os.path.exists(path)
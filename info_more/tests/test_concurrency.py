@@ -0,0 +1,122 @@
+# tests/test_concurrency.py
+# ConcurrencyController.adjust: 구간 관측 → 동시성/지연 결정
+
+import pytest
+
+from info_more import middlewares
+from info_more.middlewares import ConcurrencyController
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(middlewares.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def controller(clock):
+    return ConcurrencyController(
+        'listing', concurrency=10, min_concurrency=2, max_concurrency=12, interval=5.0, min_samples=10,
+        latency_factor=3.0, base_delay=0.5, max_delay=60.0,
+    )
+
+
+def _window(controller, clock, latency=0.1, status=200, size=20000, count=20):
+    for _ in range(count):
+        controller.observe(latency, status, size)
+    clock.now += controller.interval
+    assert controller.due()
+
+
+def test_healthy_window_increases_and_paces(controller, clock):
+    _window(controller, clock, latency=0.1)
+
+    assert controller.adjust() == 'increase'
+    assert controller.concurrency == 11
+    assert controller.min_latency == 0.1
+    # 백오프가 없어도 기준 지연 / 동시성 간격
+    assert controller.delay == pytest.approx(0.1 / 11)
+
+    _window(controller, clock)
+    controller.adjust()
+    _window(controller, clock)
+    assert controller.adjust() is None
+    assert controller.concurrency == 12
+
+
+def test_throttled_window_backs_off_then_recovers(controller, clock):
+    _window(controller, clock, count=15)
+    for _ in range(5):
+        controller.observe(0.01, 429, 100, retry_after=8)
+    clock.now += controller.interval
+
+    assert controller.adjust() == 'backoff'
+    assert (controller.concurrency, controller.backoff) == (5, 1)
+    # Retry-After가 지수 백오프(0.25~0.5초)보다 길면 Retry-After
+    assert controller.delay == 8
+
+    for _ in range(20):
+        controller.observe(0.01, 429, 100)
+    clock.now += controller.interval
+    assert controller.adjust() == 'backoff'
+    assert (controller.concurrency, controller.backoff) == (2, 2)
+    assert 0.5 <= controller.delay <= 1.0
+
+    _window(controller, clock)
+    assert controller.adjust() == 'recover'
+    assert (controller.concurrency, controller.backoff) == (2, 1)
+    _window(controller, clock)
+    assert controller.adjust() == 'recover'
+    _window(controller, clock)
+    assert controller.adjust() == 'increase'
+    assert controller.concurrency == 3
+
+
+def test_latency_growth_reduces_concurrency(controller, clock):
+    _window(controller, clock, latency=0.1)
+    controller.adjust()
+
+    _window(controller, clock, latency=0.5)
+    assert controller.adjust() == 'latency'
+    assert controller.concurrency == 8
+    assert controller.backoff == 0
+
+
+def test_block_pages_and_errors_back_off(controller, clock):
+    _window(controller, clock, size=20000)
+    controller.adjust()
+    # 정상 본문의 20%보다 작은 200 응답 = 차단/캡차 페이지로 봄
+    _window(controller, clock, size=500)
+    assert controller.adjust() == 'backoff'
+
+    for _ in range(12):
+        controller.observe(0.1, 200, 20000)
+    for _ in range(3):
+        controller.observe_error()
+    clock.now += controller.interval
+    assert controller.adjust() == 'backoff'
+    assert controller.backoff == 2
+
+
+def test_throttle_is_urgent_after_half_interval(controller, clock):
+    assert controller.observe(0.01, 429, 100) is False
+    clock.now += controller.interval / 2
+    assert controller.observe(0.01, 429, 100) is True
+    # 429 지연은 기준 지연에 넣지 않음
+    assert controller.latencies == []
+
+
+def test_adjust_waits_for_samples(controller, clock):
+    for _ in range(5):
+        controller.observe(0.1, 200, 20000)
+    clock.now += controller.interval
+    assert not controller.due()
@@ -0,0 +1,84 @@
+# tests/test_exports.py
+# 스냅샷 내보내기 (pyarrow가 있을 때만)
+
+import os
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from info_more.exports import open_dataset
+from info_more.items import CategoryContext, ProductItem
+from info_more.pipelines import SnapshotExportPipeline
+from info_more.spiders.naver import NaverStoreSpider
+
+
+def _product(naver_product_id, category):
+    return ProductItem(
+        category=category, name=f'상품 {naver_product_id}', price=10000,
+        naver_product_id=naver_product_id, detail_url='', ranking=1, mall_name='쇼핑몰',
+        original_price=12000, discount_rate=16, delivery_fee=0, rating=4.5, review_count=10,
+    )
+
+
+def _export_run(make_crawler, tmp_path, fmt='parquet'):
+    """같은 snapshot_time의 실행 하나 → (crawler, pipeline)"""
+    crawler = make_crawler(NaverStoreSpider, {
+        'SNAPSHOT_EXPORT_ENABLED': True,
+        'SNAPSHOT_EXPORT_DIR': str(tmp_path / 'exports'),
+        'SNAPSHOT_EXPORT_FORMAT': fmt,
+        'SNAPSHOT_EXPORT_COMPRESSION': None,
+    }, snapshot_time='2026-01-01T06:00')
+    return crawler, SnapshotExportPipeline.from_crawler(crawler)
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_integer_category_ids_are_written_as_strings(make_crawler, tmp_path, fmt):
+    crawler, pipeline = _export_run(make_crawler, tmp_path, fmt)
+    spider = crawler.spider
+
+    # 스파이더 JSON의 카테고리 id는 숫자로 올 수 있음
+    major = CategoryContext.intern(50000000, '패션')
+    sub = major.medium(50000100, '여성의류').sub(50000101, '원피스')
+    pipeline.process_item(_product(1001, major), spider)
+    pipeline.process_item(_product(1002, sub), spider)
+    pipeline.close_spider(spider)
+
+    table = open_dataset(str(tmp_path / 'exports'), fmt).to_table().sort_by('naver_product_id')
+    assert table.column('naver_product_id').to_pylist() == ['1001', '1002']
+    assert table.column('major_id').to_pylist() == ['50000000', '50000000']
+    assert table.column('medium_id').to_pylist() == [None, '50000100']
+    assert table.column('sub_id').to_pylist() == [None, '50000101']
+    assert table.column('snapshot_time').to_pylist() == [datetime(2026, 1, 1, 6, 0)] * 2
+    assert crawler.stats.get_value('export/rows') == 2
+
+
+def test_resumed_run_adds_part_file(make_crawler, tmp_path):
+    major = CategoryContext.intern('50000000', '패션')
+    # 첫 실행은 상품 1001까지 기록하고 종료, 이어서 실행한 두 번째 실행은 나머지 목록(1002)만
+    for naver_product_id in ('1001', '1002'):
+        crawler, pipeline = _export_run(make_crawler, tmp_path)
+        pipeline.process_item(_product(naver_product_id, major), crawler.spider)
+        pipeline.close_spider(crawler.spider)
+
+    partition = tmp_path / 'exports' / 'snapshot_date=2026-01-01' / 'category_id=50000000'
+    assert sorted(os.listdir(partition)) == ['part-20260101T0600-2.parquet', 'part-20260101T0600.parquet']
+    table = open_dataset(str(tmp_path / 'exports')).to_table().sort_by('naver_product_id')
+    assert table.column('naver_product_id').to_pylist() == ['1001', '1002']
+
+
+def test_each_product_is_exported_once_in_any_arrival_order(make_crawler, tmp_path):
+    crawler, pipeline = _export_run(make_crawler, tmp_path)
+    major = CategoryContext.intern('50000000', '패션')
+    sub = major.medium('50000100', '여성의류').sub('50000101', '원피스')
+
+    # 상품 업서트가 늦어져 category_id 갱신용(더 깊은) 복사본이 먼저 도착해도 한 행만
+    pipeline.process_item(_product('1001', sub), crawler.spider)
+    pipeline.process_item(_product('1001', major), crawler.spider)
+    pipeline.close_spider(crawler.spider)
+
+    table = open_dataset(str(tmp_path / 'exports')).to_table()
+    assert table.column('naver_product_id').to_pylist() == ['1001']
+    assert table.column('sub_id').to_pylist() == ['50000101']
+    assert crawler.stats.get_value('export/duplicates_skipped') == 1
@@ -0,0 +1,118 @@
+# tests/test_frontier.py
+# 분산 프런티어 (SQLite 백엔드): JSON 요청 저장, 임대/완료, 실행 id
+
+import json
+
+import pytest
+import scrapy
+
+from info_more import frontier as frontier_module
+from info_more.frontier import Frontier, SQLiteFrontierBackend
+from info_more.items import CategoryContext
+from info_more.spiders.naver import NaverStoreSpider
+
+RUN_ID = 'naver-test'
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(frontier_module.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def nodes(make_crawler, tmp_path):
+    """같은 SQLite 파일을 쓰는 두 노드의 Frontier"""
+    crawler = make_crawler(NaverStoreSpider)
+    path = str(tmp_path / 'frontier.sqlite3')
+    nodes = []
+    for worker in ('node-a', 'node-b'):
+        frontier = Frontier(SQLiteFrontierBackend(path), RUN_ID, lease_seconds=60, max_attempts=2,
+                            stats=crawler.stats)
+        frontier.fingerprinter = crawler.request_fingerprinter
+        frontier.worker = worker
+        frontier.open(crawler.spider)
+        nodes.append(frontier)
+    yield nodes
+    for frontier in nodes:
+        frontier.backend.close()
+
+
+def _listing(spider, category_id):
+    category = CategoryContext.intern('100', '패션', str(category_id), '여성의류')
+    return scrapy.Request(
+        f'https://fixture.invalid/catalog/{category_id}', callback=spider.parse_page,
+        headers={'referer': 'https://fixture.invalid/category/100'}, cb_kwargs={'category': category},
+    )
+
+
+def _state(frontier, key):
+    return frontier.backend.conn.execute(
+        "SELECT state, worker FROM frontier_request WHERE run_id = ? AND key = ?", (RUN_ID, key),
+    ).fetchone()
+
+
+def test_push_stores_json_and_claim_restores_request(nodes, clock):
+    node_a, node_b = nodes
+    request = _listing(node_a.spider, 110)
+
+    assert node_a.push(request)
+    assert not node_b.push(_listing(node_b.spider, 110))
+
+    (payload,) = node_a.backend.conn.execute("SELECT payload FROM frontier_request").fetchone()
+    assert json.loads(payload)['url'] == request.url
+
+    claimed = node_b.claim()
+    assert claimed.url == request.url
+    assert claimed.callback == node_b.spider.parse_page
+    assert claimed.headers['Referer'] == b'https://fixture.invalid/category/100'
+    # 카테고리 객체는 intern으로 복원되어 같은 객체
+    assert claimed.cb_kwargs['category'] is request.cb_kwargs['category']
+    assert _state(node_b, claimed.meta['frontier_key']) == ('leased', 'node-b')
+
+
+def test_expired_lease_cannot_complete_released_request(nodes, clock):
+    node_a, node_b = nodes
+    node_a.push(_listing(node_a.spider, 110))
+    key = node_a.claim().meta['frontier_key']
+
+    # node-a의 임대가 만료되어 node-b가 다시 가져감
+    clock.now += 61
+    assert node_b.claim().meta['frontier_key'] == key
+
+    assert not node_a.complete(key)
+    assert _state(node_a, key) == ('leased', 'node-b')
+    assert node_a.pending() == 1
+
+    assert node_b.complete(key)
+    assert _state(node_b, key) == ('done', 'node-b')
+    assert node_b.pending() == 0
+    assert node_a.stats.get_value('frontier/lease_lost') == 1
+
+
+def test_lease_expires_into_failed_after_max_attempts(nodes, clock):
+    node_a, node_b = nodes
+    node_a.push(_listing(node_a.spider, 110))
+    key = node_a.claim().meta['frontier_key']
+    clock.now += 61
+    node_b.claim()
+    clock.now += 61
+
+    assert node_a.claim() is None
+    assert _state(node_a, key)[0] == 'failed'
+    assert node_a.pending() == 0
+
+
+def test_shared_frontier_requires_run_id(make_crawler, tmp_path):
+    crawler = make_crawler(settings={'FRONTIER_URL': f"sqlite:///{tmp_path / 'frontier.sqlite3'}"})
+    with pytest.raises(ValueError):
+        Frontier.from_crawler(crawler)
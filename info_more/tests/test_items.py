@@ -0,0 +1,102 @@
+# tests/test_items.py
+# 슬롯 ProductItem + 공유 CategoryContext: ItemAdapter로 보이는 필드와 pickle 복원
+
+import io
+import json
+import pickle
+
+import pytest
+import scrapy
+from itemadapter import ItemAdapter
+from scrapy.exporters import JsonLinesItemExporter
+from scrapy.utils.request import request_from_dict
+
+from info_more.items import CATEGORY_FIELDS, PRODUCT_FIELDS, CategoryContext, ProductItem
+from info_more.spiders.naver import NaverStoreSpider
+
+
+@pytest.fixture
+def sub_category():
+    return CategoryContext.intern('100', '패션', '110', '여성의류', '111', '원피스')
+
+
+@pytest.fixture
+def product(sub_category):
+    return ProductItem(
+        category=sub_category, naver_product_id='8123456789', name='린넨 원피스', price=39000,
+        detail_url='https://smartstore.naver.com/shop/products/8123456789', ranking=3, mall_name='쇼핑몰',
+        original_price=49000, discount_rate=20, delivery_fee=3000, rating=4.8, review_count=120,
+    )
+
+
+def test_intern_returns_shared_objects(sub_category):
+    major = CategoryContext.intern('100', '패션')
+    medium = major.medium('110', '여성의류')
+
+    assert CategoryContext.intern('100', '패션') is major
+    assert medium is CategoryContext.intern('100', '패션', '110', '여성의류')
+    assert medium.sub('111', '원피스') is sub_category
+    assert (major.category_id, medium.category_id, sub_category.category_id) == (None, '110', '111')
+
+
+def test_adapter_exposes_flat_fields(product):
+    adapter = ItemAdapter(product)
+
+    assert ItemAdapter.is_item(product)
+    assert list(adapter.field_names()) == [*CATEGORY_FIELDS, *PRODUCT_FIELDS, 'category_id']
+    assert adapter.asdict() == {
+        'major_id': '100', 'major_name': '패션', 'medium_id': '110', 'medium_name': '여성의류',
+        'sub_id': '111', 'sub_name': '원피스',
+        'naver_product_id': '8123456789', 'name': '린넨 원피스', 'price': 39000,
+        'detail_url': 'https://smartstore.naver.com/shop/products/8123456789', 'ranking': 3,
+        'mall_name': '쇼핑몰', 'original_price': 49000, 'discount_rate': 20, 'delivery_fee': 3000,
+        'rating': 4.8, 'review_count': 120, 'category_id': '111',
+    }
+
+
+def test_adapter_writes(product, sub_category):
+    adapter = ItemAdapter(product)
+
+    adapter['price'] = 35000
+    assert product.price == 35000
+
+    # 카테고리 필드를 바꾸면 다른 상품과 같이 쓰던 객체는 그대로 두고 intern한 객체로 교체
+    adapter['sub_id'] = '112'
+    assert product.category is CategoryContext.intern('100', '패션', '110', '여성의류', '112', '원피스')
+    assert sub_category.sub_id == '111'
+    assert adapter['category_id'] == '112'
+
+    with pytest.raises(KeyError):
+        adapter['category_id'] = '999'
+    with pytest.raises(KeyError):
+        del adapter['price']
+
+
+def test_feed_export_sees_flat_fields(product):
+    output = io.BytesIO()
+    exporter = JsonLinesItemExporter(output, ensure_ascii=False)
+    exporter.start_exporting()
+    exporter.export_item(product)
+    exporter.finish_exporting()
+
+    assert json.loads(output.getvalue()) == ItemAdapter(product).asdict()
+
+
+def test_pickle_reinterns_category(product, sub_category):
+    assert pickle.loads(pickle.dumps(sub_category)) is sub_category
+
+    restored = pickle.loads(pickle.dumps(product))
+    assert restored == product
+    assert restored.category is sub_category
+
+
+def test_disk_queue_request_keeps_shared_category(make_crawler, sub_category):
+    # 스크래피 디스크 큐(JOBDIR)는 request.to_dict()를 pickle로 저장함
+    spider = make_crawler(NaverStoreSpider).spider
+    request = scrapy.Request(
+        'https://fixture.invalid/catalog/111', callback=spider.parse_page, cb_kwargs={'category': sub_category},
+    )
+    restored = request_from_dict(pickle.loads(pickle.dumps(request.to_dict(spider=spider))), spider=spider)
+
+    assert restored.callback == spider.parse_page
+    assert restored.cb_kwargs['category'] is sub_category
@@ -0,0 +1,114 @@
+# tests/test_product_fingerprints.py
+# MYSQL_PRODUCT_SKIP_UNCHANGED: 마지막으로 기록한 행과 같은 상품은 업서트하지 않음
+
+from decimal import Decimal
+
+import pytest
+from twisted.internet import defer
+
+from benchmarks.fakedb import FakeConnectionPool, FakeDatabase
+from info_more.caches import ProductFingerprintIndex, product_fingerprint
+from info_more.items import CategoryContext, ProductItem
+from info_more.pipelines import MySQLProductPipeline
+from info_more.spiders.naver import NaverStoreSpider
+
+CATEGORY_ID = 7
+
+
+class InlineWriter:
+    """MySQLWriter 대신 SQL을 호출한 자리에서 바로 실행 (리액터/스레드 없이)"""
+
+    saturated = False
+
+    def run(self, func, *args):
+        return defer.maybeDeferred(func, *args)
+
+
+def _product(naver_product_id='8123456789', price=39000, rating=4.5):
+    return ProductItem(
+        category=CategoryContext.intern('100', '패션', '110', '여성의류', '111', '원피스'),
+        naver_product_id=naver_product_id, name='린넨 원피스', price=price,
+        detail_url=f'https://smartstore.naver.com/shop/products/{naver_product_id}', ranking=3,
+        mall_name='쇼핑몰', original_price=49000, discount_rate=20, delivery_fee=0, rating=rating, review_count=120,
+    )
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase()
+
+
+@pytest.fixture
+def run(make_crawler, db):
+    """실행 하나 (crawler마다 새 인덱스) → (파이프라인, 스파이더, 스탯)"""
+
+    def start(path=None):
+        crawler = make_crawler(NaverStoreSpider)
+        pipeline = MySQLProductPipeline(
+            FakeConnectionPool(db), InlineWriter(), stats=crawler.stats,
+            skip_unchanged=True, fingerprint_path=path,
+        )
+        pipeline.fingerprints = ProductFingerprintIndex.from_crawler(crawler)
+        pipeline.category_id_cache.set('111', CATEGORY_ID)
+        pipeline.category_id_cache.loaded = True
+        pipeline.open_spider(crawler.spider)
+        return pipeline, crawler.spider, crawler.stats
+
+    return start
+
+
+def _upserts(db):
+    return db.product_updated_at
+
+
+def test_fingerprint_matches_db_values():
+    # DB에서 읽은 DECIMAL 평점 / 정수 가격과 스파이더 값이 같은 fingerprint
+    assert product_fingerprint(CATEGORY_ID, 39000, Decimal('4.50'), None) == product_fingerprint(CATEGORY_ID, 39000.0, 4.5, None)
+    assert product_fingerprint(CATEGORY_ID, 39000) != product_fingerprint(CATEGORY_ID, 39001)
+
+
+def test_unchanged_product_is_not_upserted(run, db):
+    pipeline, spider, stats = run()
+
+    pipeline.process_item(_product(), spider)
+    assert _upserts(db) == 1
+
+    pipeline.process_item(_product(), spider)
+    assert _upserts(db) == 1
+    assert stats.get_value('mysql/product/unchanged') == 1
+
+    pipeline.process_item(_product(price=35000), spider)
+    assert _upserts(db) == 2
+    # fakedb 행: [id, category_id, mall_name, name, original_price, discount_rate, price, ...]
+    assert db.products['8123456789'][6] == 35000
+
+
+def test_next_run_loads_fingerprints_from_table(run, db):
+    pipeline, spider, _ = run()
+    pipeline.process_item(_product(), spider)
+    pipeline.process_item(_product('8000000001', rating=4.0), spider)
+
+    pipeline, spider, stats = run()
+    assert stats.get_value('mysql/product/fingerprint_source') == 'table'
+    pipeline.process_item(_product(), spider)
+    pipeline.process_item(_product('8000000001', rating=4.0), spider)
+
+    assert _upserts(db) == 2
+    assert stats.get_value('mysql/product/unchanged') == 2
+
+
+def test_saved_fingerprints_are_reused_while_table_is_unchanged(run, db, tmp_path):
+    path = str(tmp_path / 'product_fingerprints.bin')
+    pipeline, spider, _ = run(path)
+    pipeline.process_item(_product(), spider)
+    pipeline.close_spider(spider)
+
+    pipeline, spider, stats = run(path)
+    assert stats.get_value('mysql/product/fingerprint_source') == 'file'
+    pipeline.process_item(_product(), spider)
+    assert stats.get_value('mysql/product/unchanged') == 1
+
+    # 다른 곳에서 product가 바뀌면(stamp 변경) 파일 대신 테이블에서 다시 계산
+    db.product_updated_at += 1
+    _, _, stats = run(path)
+    assert stats.get_value('mysql/product/fingerprint_source') == 'table'
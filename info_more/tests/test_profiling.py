@@ -0,0 +1,88 @@
+# tests/test_profiling.py
+# CrawlProfiler: 프로세스 전체에 하나인 tracemalloc은 자신이 시작한 추적만 멈춤
+
+import os
+import tracemalloc
+
+import pytest
+
+from info_more.profiling import CrawlProfiler, SQLTrace, memory_growth
+from info_more.spiders.naver import NaverStoreSpider
+
+
+@pytest.fixture(autouse=True)
+def no_tracing():
+    if tracemalloc.is_tracing():
+        pytest.skip("이미 tracemalloc이 켜진 상태 (pytest -X tracemalloc 등)")
+    yield
+    tracemalloc.stop()
+
+
+def _profiler(make_crawler, modes):
+    crawler = make_crawler(NaverStoreSpider, {'PROFILE_MODES': modes}, snapshot_time='2026-01-01T06:00')
+    return CrawlProfiler.from_crawler(crawler), crawler.spider
+
+
+def _run(profiler, spider):
+    profiler.spider_opened(spider)
+    profiler.spider_closed(spider, 'finished')
+
+
+def test_memory_profile_stops_only_tracing_it_started(make_crawler):
+    profiler, spider = _profiler(make_crawler, ['memory'])
+    _run(profiler, spider)
+
+    assert not tracemalloc.is_tracing()
+    assert sorted(os.listdir(profiler.directory)) == [
+        'memory-000.tracemalloc', 'memory-001.tracemalloc', 'memory.txt',
+    ]
+
+
+def test_memory_profile_keeps_tracing_started_elsewhere(make_crawler):
+    tracemalloc.start()
+    profiler, spider = _profiler(make_crawler, ['memory'])
+    _run(profiler, spider)
+
+    assert tracemalloc.is_tracing()
+
+
+def test_overlapping_runs_share_tracing(make_crawler):
+    first, first_spider = _profiler(make_crawler, ['memory'])
+    second, second_spider = _profiler(make_crawler, ['memory'])
+    first.spider_opened(first_spider)
+    second.spider_opened(second_spider)
+
+    first.spider_closed(first_spider, 'finished')
+    assert tracemalloc.is_tracing()
+    second.spider_closed(second_spider, 'finished')
+    assert not tracemalloc.is_tracing()
+    assert second.snapshots == 2
+
+
+def test_memory_growth_skips_shrinking_locations(tmp_path):
+    tracemalloc.start()
+    freed = bytearray(8 * 1024 * 1024)
+    tracemalloc.take_snapshot().dump(str(tmp_path / 'baseline.tracemalloc'))
+    del freed
+    kept = [bytes(1024) for _ in range(256)]
+    tracemalloc.take_snapshot().dump(str(tmp_path / 'after.tracemalloc'))
+
+    # 절댓값이 가장 큰 차이는 해제한 bytearray(감소)지만, 그 뒤의 증가도 보고됨
+    growth = memory_growth(str(tmp_path / 'baseline.tracemalloc'), str(tmp_path / 'after.tracemalloc'))
+    assert growth and all(stat.size_diff > 0 for stat in growth)
+    assert any(stat.size_diff >= 256 * 1024 for stat in growth)
+    assert len(kept) == 256
+
+
+def test_sql_trace_writes_fresh_file_per_run(make_crawler, tmp_path):
+    crawler = make_crawler(settings={'PROFILE_MODES': ['sql']})
+    trace = SQLTrace.from_crawler(crawler)
+    for run, rows in (('run-1', 10), ('run-2', 20)):
+        trace.open(str(tmp_path / f'{run}.jsonl'))
+        trace.record('MySQLProductPipeline', 'write_batch', wait=0.001, elapsed=0.002, rows=rows)
+    trace.close()
+
+    with open(tmp_path / 'run-1.jsonl', encoding='utf-8') as f:
+        assert len(f.readlines()) == 1
+    with open(tmp_path / 'run-2.jsonl', encoding='utf-8') as f:
+        assert '"rows": 20' in f.read()
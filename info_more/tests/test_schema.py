@@ -0,0 +1,109 @@
+# tests/test_schema.py
+# 스키마 확인: 읽기 전용이고, 기본 설정에서는 경고만 남김
+
+import logging
+import re
+from contextlib import contextmanager
+
+import pytest
+from scrapy.exceptions import NotConfigured
+
+from info_more.schema import MIGRATIONS, REQUIRED_INDEXES, SchemaCheck, check
+
+
+class RecordingCursor:
+    """check()가 보내는 SELECT에만 답하는 DictCursor 대신. 그 밖의 SQL(DDL 등)은 실패"""
+
+    def __init__(self, versions=None, indexes=REQUIRED_INDEXES):
+        # versions=None: schema_migrations 테이블 자체가 없음
+        self.versions = versions
+        self.indexes = indexes
+        self.executed = []
+        self.rows = []
+
+    def execute(self, sql, args=None):
+        sql = re.sub(r'\s+', ' ', sql).strip()
+        self.executed.append(sql)
+        if 'FROM information_schema.TABLES' in sql:
+            self.rows = [{'tables': int(self.versions is not None)}]
+        elif sql == 'SELECT version FROM schema_migrations':
+            assert self.versions is not None, "없는 테이블을 조회함"
+            self.rows = [{'version': version} for version in self.versions]
+        elif 'FROM information_schema.STATISTICS' in sql:
+            self.rows = [
+                {'table_name': table, 'index_name': name, 'non_unique': int(not unique), 'column_name': column}
+                for table, name, columns, unique, _ in self.indexes
+                for column in columns
+            ]
+        else:
+            raise AssertionError(f"check()에서 예상하지 못한 SQL: {sql}")
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+
+class RecordingPool:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    @contextmanager
+    def cursor(self):
+        yield self._cursor
+
+
+LATEST = MIGRATIONS[-1][0]
+
+
+def test_check_passes_on_migrated_schema():
+    cursor = RecordingCursor(versions={version for version, _, _ in MIGRATIONS})
+    assert check(RecordingPool(cursor)) == []
+
+
+def test_check_without_migrations_table_is_read_only():
+    cursor = RecordingCursor(versions=None)
+    problems = check(RecordingPool(cursor))
+
+    assert problems == [f"스키마 버전 0 < {LATEST}: python -m info_more.schema migrate 필요"]
+    assert all(sql.startswith('SELECT') for sql in cursor.executed)
+
+
+def test_check_reports_missing_index():
+    indexes = [index for index in REQUIRED_INDEXES if index[1] != 'idx_snapshot_time']
+    cursor = RecordingCursor(versions={version for version, _, _ in MIGRATIONS}, indexes=indexes)
+    problems = check(RecordingPool(cursor))
+
+    assert len(problems) == 1
+    assert problems[0].startswith('product_snapshot: 인덱스 (snapshot_time) 없음')
+
+
+class ClosingEngine:
+    def __init__(self):
+        self.closed = []
+
+    def close_spider(self, spider, reason):
+        self.closed.append(reason)
+
+
+@pytest.mark.parametrize('strict, closed, level', [
+    (False, [], logging.WARNING),
+    (True, ['schema_check_failed'], logging.ERROR),
+])
+def test_schema_check_closes_spider_only_when_strict(make_crawler, caplog, strict, closed, level):
+    crawler = make_crawler(settings={'MYSQL_SCHEMA_CHECK': True, 'MYSQL_SCHEMA_CHECK_STRICT': strict})
+    crawler.engine = ClosingEngine()
+    crawler.spider = crawler._create_spider('schema')
+    extension = SchemaCheck.from_crawler(crawler)
+
+    with caplog.at_level(logging.WARNING):
+        extension._checked(['스키마 버전 0 < 3'], crawler.spider)
+
+    assert crawler.engine.closed == closed
+    assert [record.levelno for record in caplog.records] == [level]
+
+
+def test_schema_check_is_off_by_setting(make_crawler):
+    with pytest.raises(NotConfigured):
+        SchemaCheck.from_crawler(make_crawler(settings={'MYSQL_SCHEMA_CHECK': False}))
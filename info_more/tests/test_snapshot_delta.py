@@ -0,0 +1,106 @@
+# tests/test_snapshot_delta.py
+# delta 스냅샷 모드: 기록이 끝난 뒤에만 상태 갱신, keyframe 없는 delta 모드는 원본을 지우지 않음
+
+from datetime import date, datetime
+
+import pytest
+from scrapy.settings import Settings
+from twisted.internet import defer
+
+from benchmarks.fakedb import FakeConnectionPool, FakeDatabase
+from info_more import rollup
+from info_more.caches import snapshot_fingerprint
+from info_more.pipelines import MySQLProductSnapshotPipeline
+from info_more.rollup import SnapshotRollup
+from info_more.spiders.naver import NaverStoreSpider
+
+SNAPSHOT_TIME = datetime(2026, 10, 1, 9)
+
+
+class InlineWriter:
+    """MySQLWriter 대신 SQL을 호출한 자리에서 바로 실행 (리액터/스레드 없이)"""
+
+    saturated = False
+
+    def run(self, func, *args):
+        return defer.maybeDeferred(func, *args)
+
+
+class FlakyDatabase(FakeDatabase):
+    """fail이 켜져 있으면 스냅샷 INSERT가 실패"""
+
+    fail = False
+
+    def _dispatch(self, sql, args):
+        if self.fail and sql.startswith('INSERT INTO product_snapshot'):
+            raise RuntimeError('lost connection')
+        return super()._dispatch(sql, args)
+
+
+def _row(product_id=1, price=39000):
+    # (product_id, snapshot_time, original_price, discount_rate, price, delivery_fee, rating, review_count, ranking)
+    return (product_id, SNAPSHOT_TIME, 49000, 20, price, 0, 4.5, 120, 3)
+
+
+@pytest.fixture
+def delta(make_crawler):
+    crawler = make_crawler(NaverStoreSpider)
+    db = FlakyDatabase()
+    pipeline = MySQLProductSnapshotPipeline(
+        FakeConnectionPool(db), InlineWriter(), stats=crawler.stats, mode='delta',
+    )
+    return pipeline, crawler.spider, db
+
+
+def _write(pipeline, spider, *rows):
+    pipeline.buffer.extend(rows)
+    pipeline._write_buffer(spider)
+
+
+def test_state_is_kept_when_write_fails(delta):
+    pipeline, spider, db = delta
+
+    db.fail = True
+    _write(pipeline, spider, _row())
+    assert db.snapshots == 0
+    assert pipeline.state.get(1) is None
+
+    # 실패한 행은 다음 기록에서 다시 바뀐 행으로 취급
+    db.fail = False
+    _write(pipeline, spider, _row())
+    assert db.snapshots == 1
+    assert pipeline.state.get(1) == snapshot_fingerprint(*_row()[2:])
+
+    _write(pipeline, spider, _row())
+    assert db.snapshots == 1
+    assert spider.crawler.stats.get_value('mysql/snapshot/delta_skipped') == 1
+
+
+def test_same_product_twice_in_one_batch(delta):
+    pipeline, spider, db = delta
+    _write(pipeline, spider, _row(), _row(), _row(price=35000))
+    assert spider.crawler.stats.get_value('mysql/snapshot/delta_skipped') == 1
+    assert pipeline.state.get(1) == snapshot_fingerprint(*_row(price=35000)[2:])
+
+
+def _settings(**values):
+    return Settings({'MYSQL_SNAPSHOT_MODE': 'delta', **values})
+
+
+def test_delta_without_keyframes_keeps_raw_snapshots(monkeypatch):
+    purged = []
+    monkeypatch.setattr(rollup, 'drop_snapshot_partitions_before', lambda pool, cutoff: purged.append(cutoff) or 0)
+    monkeypatch.setattr(SnapshotRollup, 'ensure_tables', lambda self: None)
+    monkeypatch.setattr(SnapshotRollup, '_load_state', lambda self: (None, 0))
+    monkeypatch.setattr(SnapshotRollup, '_purge', lambda self, sql, cutoff: purged.append(cutoff) or 0)
+
+    job = SnapshotRollup.from_settings(_settings(MYSQL_SNAPSHOT_KEYFRAME_HOURS=0), pool=object())
+    assert not job.purge_raw
+    assert job.run(today=date(2026, 10, 17))['purged_raw'] == 0
+    assert purged == []
+
+    for settings in (_settings(MYSQL_SNAPSHOT_KEYFRAME_HOURS=24), _settings(MYSQL_SNAPSHOT_MODE='full')):
+        job = SnapshotRollup.from_settings(settings, pool=object())
+        assert job.purge_raw
+        job.run(today=date(2026, 10, 17))
+    assert len(purged) == 4